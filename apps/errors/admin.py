@@ -1,57 +1,46 @@
 from django.contrib import admin
-from .models import ErrorLog
+from .models import ErrorGroup
 
 
-@admin.register(ErrorLog)
-class ErrorLogAdmin(admin.ModelAdmin):
+@admin.register(ErrorGroup)
+class ErrorGroupAdmin(admin.ModelAdmin):
     list_display = [
         'title',
         'severity',
         'error_type',
         'endpoint',
         'status_code',
-        'user_email',
+        'count',
+        'last_seen',
         'resolved',
-        'created_at',
     ]
     list_filter = [
         'severity',
         'error_type',
         'resolved',
-        'created_at',
+        'last_seen',
     ]
     search_fields = [
         'title',
         'message',
         'endpoint',
-        'user_email',
+        'fingerprint',
     ]
     readonly_fields = [
-        'id',
-        'traceback',
-        'created_at',
-        'updated_at',
+        'fingerprint',
+        'count',
+        'first_seen',
+        'last_seen',
+        'samples',
     ]
-    fieldsets = (
-        ('Error Information', {
-            'fields': ('id', 'title', 'message', 'error_type', 'severity')
-        }),
-        ('Request Details', {
-            'fields': ('endpoint', 'method', 'status_code', 'user_email')
-        }),
-        ('Data', {
-            'fields': ('request_data', 'response_data'),
-            'classes': ('collapse',)
-        }),
-        ('Traceback', {
-            'fields': ('traceback',),
-            'classes': ('collapse',)
-        }),
-        ('Status', {
-            'fields': ('resolved', 'created_at', 'updated_at')
-        }),
-    )
-    ordering = ['-created_at']
+    ordering = ['-last_seen']
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # The changelist never shows samples; don't load them for every row
+        if request.resolver_match and request.resolver_match.url_name.endswith('changelist'):
+            queryset = queryset.defer('samples')
+        return queryset
 
     def has_add_permission(self, request):
         return False
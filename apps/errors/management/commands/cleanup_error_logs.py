@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.errors.services import ErrorTrackingService
+
+
+class Command(BaseCommand):
+    help = 'Delete errors not seen in the last N days (default 30)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        deleted_count = ErrorTrackingService.cleanup_old_errors(days=options['days'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully deleted {deleted_count} errors not seen in {options['days']} days"
+            )
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errors', '0002_rename_errors_error_created_idx_errors_erro_created_724838_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='errorlog',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:08
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errors', '0003_error_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('error_type', models.CharField(choices=[('validation', 'Validation Error'), ('authentication', 'Authentication Error'), ('authorization', 'Authorization Error'), ('network', 'Network Error'), ('database', 'Database Error'), ('server', 'Server Error'), ('unknown', 'Unknown Error')], default='unknown', max_length=20)),
+                ('severity', models.CharField(choices=[('critical', 'Critical'), ('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], default='medium', max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('endpoint', models.CharField(blank=True, max_length=500, null=True)),
+                ('method', models.CharField(blank=True, max_length=10, null=True)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('samples', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('resolved', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['-last_seen'],
+                'indexes': [models.Index(fields=['-last_seen'], name='errgroup_last_seen_idx'), models.Index(fields=['resolved', '-last_seen'], name='errgroup_resolved_idx'), models.Index(fields=['severity', '-last_seen'], name='errgroup_severity_idx')],
+            },
+        ),
+    ]
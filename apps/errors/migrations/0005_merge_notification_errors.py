@@ -0,0 +1,72 @@
+"""
+Move the rows of the old notifications.ErrorLog table into errors.ErrorLog
+(the user foreign key becomes user_email) before notifications drops it, and
+drop the single-column indexes the composite (column, -created_at) indexes
+already cover.
+"""
+import django.utils.timezone
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def copy_notification_errors(apps, schema_editor):
+    try:
+        OldErrorLog = apps.get_model('notifications', 'ErrorLog')
+    except LookupError:
+        return
+    ErrorLog = apps.get_model('errors', 'ErrorLog')
+    batch = []
+    for old in OldErrorLog.objects.select_related('user').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        batch.append(ErrorLog(
+            error_type=old.error_type,
+            severity=old.severity,
+            title=old.title,
+            message=old.message,
+            traceback=old.traceback,
+            endpoint=old.endpoint,
+            method=old.method,
+            status_code=old.status_code,
+            user_email=old.user.email if old.user else None,
+            request_data=old.request_data,
+            response_data=old.response_data,
+            resolved=old.resolved,
+            created_at=old.created_at,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            ErrorLog.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ErrorLog.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errors', '0004_error_groups'),
+        ('notifications', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_notification_errors, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='errorlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='errorlog',
+            name='error_type',
+            field=models.CharField(choices=[('validation', 'Validation Error'), ('authentication', 'Authentication Error'), ('authorization', 'Authorization Error'), ('network', 'Network Error'), ('database', 'Database Error'), ('server', 'Server Error'), ('unknown', 'Unknown Error')], default='unknown', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='errorlog',
+            name='resolved',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='errorlog',
+            name='severity',
+            field=models.CharField(choices=[('critical', 'Critical'), ('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], default='medium', max_length=20),
+        ),
+    ]
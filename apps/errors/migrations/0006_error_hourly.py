@@ -0,0 +1,44 @@
+"""
+Hourly error counts for the stats endpoint, backfilled from the errors
+already in errors.ErrorLog.
+"""
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_hourly(apps, schema_editor):
+    ErrorLog = apps.get_model('errors', 'ErrorLog')
+    ErrorHourly = apps.get_model('errors', 'ErrorHourly')
+    rows = (
+        ErrorLog.objects.annotate(hour=TruncHour('created_at'))
+        .values('hour', 'error_type', 'severity')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    ErrorHourly.objects.bulk_create((ErrorHourly(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errors', '0005_merge_notification_errors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('error_type', models.CharField(choices=[('validation', 'Validation Error'), ('authentication', 'Authentication Error'), ('authorization', 'Authorization Error'), ('network', 'Network Error'), ('database', 'Database Error'), ('server', 'Server Error'), ('unknown', 'Unknown Error')], default='unknown', max_length=20)),
+                ('severity', models.CharField(choices=[('critical', 'Critical'), ('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], default='medium', max_length=20)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-hour'],
+                'constraints': [models.UniqueConstraint(fields=('hour', 'error_type', 'severity'), name='errhourly_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_hourly, migrations.RunPython.noop),
+    ]
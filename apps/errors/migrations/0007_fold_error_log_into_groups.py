@@ -0,0 +1,109 @@
+"""
+Fold the rows of errors.ErrorLog (errors logged before grouping, and those
+moved over from notifications.ErrorLog) into ErrorGroup, then drop the
+table: ErrorGroup is the only error store.
+"""
+import re
+import hashlib
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+
+BATCH_SIZE = 1000
+MAX_SAMPLES = 5
+
+# A frozen copy of apps.errors.pipeline.fingerprint() as it was when this
+# migration was written, so later changes to grouping do not change what a
+# fresh install produces here.
+_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.I)
+_HEX = re.compile(r'\b[0-9a-f]{16,}\b', re.I)
+_EMAIL = re.compile(r'[^\s@\'"]+@[^\s@\'"]+\.[a-z]{2,}', re.I)
+_NUMBER = re.compile(r'\d+')
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+
+
+def _normalize(text):
+    text = _UUID.sub('<uuid>', text or '')
+    text = _HEX.sub('<hex>', text)
+    text = _EMAIL.sub('<email>', text)
+    return _NUMBER.sub('0', text).strip()[:500]
+
+
+def _normalize_path(path):
+    return '/'.join(
+        ':id' if segment.isdigit() or _UUID.fullmatch(segment) or _HEX.fullmatch(segment) else segment
+        for segment in (path or '').split('/')
+    )
+
+
+def _traceback_signature(traceback):
+    frames = ['%s:%s' % m for m in _FRAME.findall(traceback)]
+    last = traceback.strip().splitlines()[-1] if traceback.strip() else ''
+    return '>'.join(frames + [last.split(':', 1)[0]])
+
+
+def _fingerprint(row):
+    detail = _traceback_signature(row.traceback) if row.traceback else _normalize(row.message)
+    key = '|'.join([_normalize_path(row.endpoint), str(row.status_code or ''), row.error_type or '', detail])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def fold_into_groups(apps, schema_editor):
+    ErrorLog = apps.get_model('errors', 'ErrorLog')
+    ErrorGroup = apps.get_model('errors', 'ErrorGroup')
+
+    groups = {}
+    # Oldest first, so the last row seen for a fingerprint is its latest occurrence
+    for row in ErrorLog.objects.order_by('created_at').iterator(chunk_size=BATCH_SIZE):
+        group = groups.setdefault(_fingerprint(row), {'count': 0, 'first': row.created_at, 'samples': [], 'open': False})
+        group['count'] += 1
+        group['last'] = row
+        group['open'] = group['open'] or not row.resolved
+        group['samples'].insert(0, {
+            'id': str(row.id),
+            'at': row.created_at.isoformat(),
+            'message': row.message,
+            'user_email': row.user_email,
+            'request_data': row.request_data,
+            'response_data': row.response_data,
+            'traceback': row.traceback,
+        })
+        del group['samples'][MAX_SAMPLES:]
+
+    fingerprints = list(groups)
+    for start in range(0, len(fingerprints), BATCH_SIZE):
+        chunk = fingerprints[start:start + BATCH_SIZE]
+        existing = dict(ErrorGroup.objects.filter(fingerprint__in=chunk).values_list('fingerprint', 'pk'))
+        new = []
+        for fp in chunk:
+            group, last = groups[fp], groups[fp]['last']
+            if fp in existing:
+                ErrorGroup.objects.filter(pk=existing[fp]).update(
+                    count=F('count') + group['count'],
+                    first_seen=Least(F('first_seen'), group['first']),
+                    last_seen=Greatest(F('last_seen'), last.created_at),
+                )
+                continue
+            new.append(ErrorGroup(
+                fingerprint=fp, error_type=last.error_type, severity=last.severity, title=last.title,
+                message=last.message, endpoint=last.endpoint, method=last.method,
+                status_code=last.status_code, count=group['count'], first_seen=group['first'],
+                last_seen=last.created_at, samples=group['samples'], resolved=not group['open'],
+            ))
+        ErrorGroup.objects.bulk_create(new)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('errors', '0006_error_hourly'),
+        # notifications.ErrorLog rows are copied into errors.ErrorLog first
+        ('notifications', '0003_delete_errorlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_into_groups, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ErrorLog',
+        ),
+    ]
@@ -1,80 +1,77 @@
-import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
 
-class ErrorLog(models.Model):
-    ERROR_TYPES = [
-        ('validation', 'Validation Error'),
-        ('authentication', 'Authentication Error'),
-        ('authorization', 'Authorization Error'),
-        ('network', 'Network Error'),
-        ('database', 'Database Error'),
-        ('server', 'Server Error'),
-        ('unknown', 'Unknown Error'),
-    ]
+ERROR_TYPES = [
+    ('validation', 'Validation Error'),
+    ('authentication', 'Authentication Error'),
+    ('authorization', 'Authorization Error'),
+    ('network', 'Network Error'),
+    ('database', 'Database Error'),
+    ('server', 'Server Error'),
+    ('unknown', 'Unknown Error'),
+]
 
-    SEVERITY_LEVELS = [
-        ('critical', 'Critical'),
-        ('high', 'High'),
-        ('medium', 'Medium'),
-        ('low', 'Low'),
-    ]
+SEVERITY_LEVELS = [
+    ('critical', 'Critical'),
+    ('high', 'High'),
+    ('medium', 'Medium'),
+    ('low', 'Low'),
+]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    error_type = models.CharField(
-        max_length=20,
-        choices=ERROR_TYPES,
-        default='unknown',
-        db_index=True
-    )
-    severity = models.CharField(
-        max_length=20,
-        choices=SEVERITY_LEVELS,
-        default='medium',
-        db_index=True
-    )
+
+class ErrorGroup(models.Model):
+    """All occurrences of one error, keyed by a fingerprint of
+    (endpoint, status code, error type, normalized message or traceback).
+
+    Written by apps.errors.pipeline: one row per distinct error with a
+    counter and the last few occurrences in `samples`.
+    """
+    fingerprint = models.CharField(max_length=40, unique=True)
+    error_type = models.CharField(max_length=20, choices=ERROR_TYPES, default='unknown')
+    severity = models.CharField(max_length=20, choices=SEVERITY_LEVELS, default='medium')
     title = models.CharField(max_length=255)
     message = models.TextField()
-    traceback = models.TextField(blank=True, null=True)
     endpoint = models.CharField(max_length=500, blank=True, null=True)
-    method = models.CharField(
-        max_length=10,
-        blank=True,
-        null=True,
-        choices=[
-            ('GET', 'GET'),
-            ('POST', 'POST'),
-            ('PUT', 'PUT'),
-            ('PATCH', 'PATCH'),
-            ('DELETE', 'DELETE'),
-            ('HEAD', 'HEAD'),
-            ('OPTIONS', 'OPTIONS'),
-        ]
-    )
-    status_code = models.IntegerField(blank=True, null=True, db_index=True)
-    user_email = models.EmailField(blank=True, null=True, db_index=True)
-    request_data = models.JSONField(blank=True, null=True)
-    response_data = models.JSONField(blank=True, null=True)
-    resolved = models.BooleanField(default=False, db_index=True)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    method = models.CharField(max_length=10, blank=True, null=True)
+    status_code = models.IntegerField(blank=True, null=True)
+    count = models.PositiveBigIntegerField(default=0)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+    # Most recent occurrences first (message, user, request/response data, traceback)
+    samples = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    resolved = models.BooleanField(default=False)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-last_seen']
         indexes = [
-            models.Index(fields=['-created_at']),
-            models.Index(fields=['severity', '-created_at']),
-            models.Index(fields=['error_type', '-created_at']),
-            models.Index(fields=['resolved', '-created_at']),
+            models.Index(fields=['-last_seen'], name='errgroup_last_seen_idx'),
+            models.Index(fields=['resolved', '-last_seen'], name='errgroup_resolved_idx'),
+            models.Index(fields=['severity', '-last_seen'], name='errgroup_severity_idx'),
         ]
 
     def __str__(self):
-        return f"[{self.severity.upper()}] {self.title} ({self.created_at})"
+        return f"[{self.severity.upper()}] {self.title} x{self.count}"
+
+
+class ErrorHourly(models.Model):
+    """Occurrences per hour, error type and severity.
 
-    @property
-    def error_type_display(self):
-        return dict(self.ERROR_TYPES).get(self.error_type, 'Unknown')
+    Kept up to date by apps.errors.pipeline as batches are written, so
+    dashboard statistics over a time range read at most a few rows per hour
+    instead of the error tables.
+    """
+    hour = models.DateTimeField()
+    error_type = models.CharField(max_length=20, choices=ERROR_TYPES, default='unknown')
+    severity = models.CharField(max_length=20, choices=SEVERITY_LEVELS, default='medium')
+    count = models.PositiveBigIntegerField(default=0)
 
-    @property
-    def severity_display(self):
-        return dict(self.SEVERITY_LEVELS).get(self.severity, 'Unknown')
+    class Meta:
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'error_type', 'severity'], name='errhourly_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.error_type}/{self.severity} x{self.count}"
@@ -0,0 +1,295 @@
+"""
+Asynchronous error capture and grouping.
+
+The request thread only takes a compact snapshot of a failed API response
+(status, path, method, user, and the raw request/response bodies capped at
+ERROR_LOG_MAX_BODY_BYTES; for a larger JSON response only its message is
+kept) and buffers it in memory (see
+backend_project.buffered_writer). Errors logged through ErrorTrackingService
+are buffered the same way. A background thread parses the bodies, classifies
+each error and writes the buffer every ERROR_LOG_FLUSH_SECONDS or once
+ERROR_LOG_BATCH_SIZE are waiting.
+
+Before anything is buffered, apps.errors.sampling decides whether the error
+is kept at all (sampling by status and endpoint, per-IP and per-error caps).
+
+Occurrences are not stored one row each: they are grouped by `fingerprint()`
+into `ErrorGroup` rows holding a counter, first/last seen and the last
+ERROR_GROUP_MAX_SAMPLES occurrences. A batch costs one SELECT and one UPDATE
+per distinct error (plus an INSERT and a SELECT if it has new ones), so a
+burst of the same error (say every client's JWT expiring at once) is a
+single counter update.
+
+Each batch also adds its occurrences to the ErrorHourly rollup (per hour,
+error type and severity), which the stats endpoint reads.
+"""
+import re
+import json
+import uuid
+import hashlib
+import logging
+from collections import Counter
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from backend_project.buffered_writer import BufferedWriter
+from . import sampling
+
+logger = logging.getLogger(__name__)
+
+
+def _max_body():
+    return getattr(settings, 'ERROR_LOG_MAX_BODY_BYTES', 8192)
+
+
+def _parse_json(raw):
+    if not raw:
+        return None
+    try:
+        return json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _message(response_data):
+    if not isinstance(response_data, dict):
+        return 'Unknown error'
+    # Try multiple common error field names
+    message = response_data.get('detail') or response_data.get('error') or response_data.get('message')
+    if isinstance(message, list):
+        return str(message[0]) if message else 'Unknown error'
+    return str(message) if message else 'Unknown error'
+
+
+_UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.I)
+_HEX = re.compile(r'\b[0-9a-f]{16,}\b', re.I)
+_EMAIL = re.compile(r'[^\s@\'"]+@[^\s@\'"]+\.[a-z]{2,}', re.I)
+_NUMBER = re.compile(r'\d+')
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+
+
+def _normalize(text):
+    """Message with ids, emails and numbers replaced, so repeats compare equal."""
+    text = _UUID.sub('<uuid>', text or '')
+    text = _HEX.sub('<hex>', text)
+    text = _EMAIL.sub('<email>', text)
+    return _NUMBER.sub('0', text).strip()[:500]
+
+
+def _normalize_path(path):
+    return '/'.join(
+        ':id' if segment.isdigit() or _UUID.fullmatch(segment) or _HEX.fullmatch(segment) else segment
+        for segment in (path or '').split('/')
+    )
+
+
+def _traceback_signature(traceback):
+    """Frames (file and function, no line numbers) plus the exception class."""
+    frames = ['%s:%s' % m for m in _FRAME.findall(traceback)]
+    last = traceback.strip().splitlines()[-1] if traceback.strip() else ''
+    return '>'.join(frames + [last.split(':', 1)[0]])
+
+
+def fingerprint(endpoint, status_code, error_type, message, traceback=None):
+    """Stable id of an error: endpoint pattern, status, type and message or traceback shape."""
+    detail = _traceback_signature(traceback) if traceback else _normalize(message)
+    key = '|'.join([_normalize_path(endpoint), str(status_code or ''), error_type or '', detail])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _fields(item):
+    """Field values for a buffered item (runs on the writer thread)."""
+    if 'raw_response' in item:
+        from .services import ErrorTrackingService
+        item = dict(item)
+        response_data = _parse_json(item.pop('raw_response'))
+        request_data = _parse_json(item.pop('raw_request'))
+        error_type, severity, title = ErrorTrackingService.classify_status(item['status_code'])
+        item.update({
+            'error_type': error_type,
+            'severity': severity,
+            'title': title,
+            'message': item.get('message') or _message(response_data),
+            'request_data': request_data,
+            'response_data': response_data,
+        })
+    if 'fingerprint' not in item:
+        item['fingerprint'] = fingerprint(
+            item.get('endpoint'), item.get('status_code'), item.get('error_type'),
+            item.get('message'), item.get('traceback'),
+        )
+    return item
+
+
+_GROUP_FIELDS = ('error_type', 'severity', 'title', 'message', 'endpoint', 'method', 'status_code')
+
+
+def _sample(fields):
+    return {
+        'id': str(fields['id']),
+        'at': fields['created_at'],
+        'message': fields.get('message'),
+        'user_email': fields.get('user_email'),
+        'request_data': fields.get('request_data'),
+        'response_data': fields.get('response_data'),
+        'traceback': (fields.get('traceback') or '')[:_max_body()] or None,
+    }
+
+
+def _write_hourly(counts):
+    """Add {(hour, error_type, severity): n} to the hourly rollup.
+
+    One UPDATE per key (a batch rarely spans more than a few). Keys with no
+    row yet get a zero-count row (if another process has not just inserted
+    it) and are updated again, so concurrent writers never lose counts.
+    """
+    from .models import ErrorHourly
+
+    def add(keys):
+        missing = []
+        for key in keys:
+            hour, error_type, severity = key
+            updated = ErrorHourly.objects.filter(hour=hour, error_type=error_type, severity=severity).update(
+                count=F('count') + counts[key],
+            )
+            if not updated:
+                missing.append(key)
+        return missing
+
+    missing = add(counts)
+    if missing:
+        ErrorHourly.objects.bulk_create([
+            ErrorHourly(hour=hour, error_type=error_type, severity=severity, count=0)
+            for hour, error_type, severity in missing
+        ], ignore_conflicts=True)
+        add(missing)
+
+
+def _write(items):
+    from .models import ErrorGroup
+    max_samples = getattr(settings, 'ERROR_GROUP_MAX_SAMPLES', 5)
+
+    # Collapse the batch per fingerprint; items are in arrival order
+    batch = {}
+    hourly = Counter()
+    for item in items:
+        fields = _fields(item)
+        weight = fields.pop('weight', 1)
+        group = batch.setdefault(fields['fingerprint'], {'count': 0, 'first': fields['created_at'], 'samples': []})
+        group['count'] += weight
+        hour = fields['created_at'].replace(minute=0, second=0, microsecond=0)
+        hourly[(hour, fields.get('error_type') or 'unknown', fields.get('severity') or 'medium')] += weight
+        group['fields'] = fields
+        group['samples'].insert(0, _sample(fields))
+        del group['samples'][max_samples:]
+
+    def known(fingerprints):
+        return {
+            g.fingerprint: g
+            for g in ErrorGroup.objects.filter(fingerprint__in=fingerprints).only('id', 'fingerprint', 'samples')
+        }
+
+    existing = known(list(batch))
+    missing = [fp for fp in batch if fp not in existing]
+    if missing:
+        # New groups are inserted with a zero count and then counted like known
+        # ones, so when another process inserts the same fingerprint first its
+        # row wins the insert and these occurrences are still added to it
+        ErrorGroup.objects.bulk_create([
+            ErrorGroup(
+                fingerprint=fp, count=0, first_seen=batch[fp]['first'],
+                last_seen=batch[fp]['fields']['created_at'], samples=[],
+                **{name: batch[fp]['fields'].get(name) for name in _GROUP_FIELDS},
+            )
+            for fp in missing
+        ], ignore_conflicts=True)
+        existing.update(known(missing))
+    for fp, row in existing.items():
+        group = batch[fp]
+        ErrorGroup.objects.filter(pk=row.pk).update(
+            count=F('count') + group['count'],
+            last_seen=Greatest(F('last_seen'), group['fields']['created_at']),
+            severity=group['fields']['severity'],
+            message=group['fields']['message'],
+            samples=(group['samples'] + list(row.samples or []))[:max_samples],
+            # A resolved error that happens again is open again
+            resolved=False,
+        )
+    _write_hourly(hourly)
+
+
+writer = BufferedWriter('error-log', _write, settings_prefix='ERROR_LOG')
+
+
+def _body(request):
+    """Raw request body, if small enough and still readable."""
+    if request.method not in ('POST', 'PUT', 'PATCH'):
+        return None
+    try:
+        if int(request.META.get('CONTENT_LENGTH') or 0) > _max_body():
+            return None
+        return request.body
+    except Exception:
+        # Body already consumed as a stream (e.g. multipart uploads)
+        return None
+
+
+def capture_response(request, response):
+    """Buffer a failed API response for the error log. Cheap; no database, and
+    no parsing unless the response body is too large to keep.
+
+    Returns the sampling outcome (see apps.errors.sampling).
+    """
+    # The fingerprint needs the parsed body; cap by endpoint pattern and status instead
+    outcome, weight = sampling.admit(
+        request, f'{_normalize_path(request.path)}|{response.status_code}',
+        status_code=response.status_code, endpoint=request.path,
+    )
+    if not weight:
+        return outcome
+    raw_response = message = None
+    if not getattr(response, 'streaming', False) and response.get('content-type', '').startswith('application/json'):
+        raw_response = response.content
+        if len(raw_response) > _max_body():
+            # Too large to keep as a sample, but the message still names the error
+            message, raw_response = _message(_parse_json(raw_response)), None
+    user = getattr(request, 'user', None)
+    writer.put({
+        'id': uuid.uuid4(),
+        'created_at': timezone.now(),
+        'status_code': response.status_code,
+        'endpoint': request.path[:500],
+        'method': request.method,
+        'user_email': user.email if user is not None and user.is_authenticated else None,
+        'raw_request': _body(request),
+        'raw_response': raw_response,
+        'message': message,
+        'weight': weight,
+    })
+    return outcome
+
+
+def capture(fields, request=None, frontend=False):
+    """Buffer an already classified error (ErrorGroup field values plus occurrence details).
+
+    Returns the fields with the `id`, `created_at` and `fingerprint` the
+    occurrence is recorded under, and the sampling `outcome`; it was only
+    buffered if `outcome` is sampling.CAPTURED.
+    """
+    fields = dict(fields)
+    fields.setdefault('id', uuid.uuid4())
+    fields.setdefault('created_at', timezone.now())
+    fields = _fields(fields)
+    outcome, weight = sampling.admit(
+        request, fields['fingerprint'], status_code=fields.get('status_code'),
+        endpoint=fields.get('endpoint'), frontend=frontend,
+    )
+    if weight:
+        writer.put({**fields, 'weight': weight})
+    return {**fields, 'outcome': outcome}
+
+
+def flush():
+    """Write all buffered errors now. Returns the number written."""
+    return writer.flush()
@@ -0,0 +1,169 @@
+"""
+Admission control for error capture: sampling and per-client caps.
+
+Before an error is buffered, `admit()` decides whether it is kept:
+
+1. Sampling. The rate for an error is the first match of
+   ERROR_SAMPLE_ENDPOINT_RATES (longest endpoint prefix), then
+   ERROR_SAMPLE_RATES by exact status ('401'), status class ('4xx') or
+   'frontend' for client-reported errors; 1.0 if nothing matches. Kept
+   errors carry a weight of 1/rate so group counters stay estimates of the
+   real number of occurrences.
+2. Token buckets per client IP (ERROR_RATE_PER_IP) and per error
+   (ERROR_RATE_PER_FINGERPRINT), with rates in the throttle format, e.g.
+   '30/min'. Frontend-reported errors also share one bucket
+   (ERROR_RATE_FRONTEND): their message is chosen by the client, so a new
+   message would otherwise always find a full per-fingerprint bucket.
+   Buckets are kept in process memory, so checking one costs a dict
+   lookup; the effective cap is per web process. The client IP is DRF's
+   (see REST_FRAMEWORK['NUM_PROXIES']).
+
+Outcomes are counted in process memory and added to the Redis hash
+`errors:capture` at most every COUNTER_PUBLISH_SECONDS; `counters()`
+returns the totals.
+"""
+import time
+import random
+import logging
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+from backend_project.redis_client import get_redis
+from backend_project.throttling import parse_rates
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = 'errors:capture'
+COUNTER_PUBLISH_SECONDS = 10
+# Buckets kept per process; the least recently used are evicted beyond this
+MAX_BUCKETS = 10000
+
+CAPTURED = 'captured'
+SAMPLED_OUT = 'sampled_out'
+IP_LIMITED = 'ip_limited'
+FINGERPRINT_LIMITED = 'fingerprint_limited'
+FRONTEND_LIMITED = 'frontend_limited'
+
+_lock = threading.Lock()
+_buckets = OrderedDict()
+_counts = Counter()
+_published_at = time.monotonic()
+
+
+def sample_rate(status_code=None, endpoint=None, frontend=False):
+    endpoint = endpoint or ''
+    rules = getattr(settings, 'ERROR_SAMPLE_ENDPOINT_RATES', {})
+    for prefix in sorted(rules, key=len, reverse=True):
+        if endpoint.startswith(prefix):
+            return float(rules[prefix])
+    rates = getattr(settings, 'ERROR_SAMPLE_RATES', {})
+    keys = ['frontend'] if frontend else []
+    if status_code:
+        keys += [str(status_code), f'{str(status_code)[0]}xx']
+    for key in keys:
+        if key in rates:
+            return float(rates[key])
+    return 1.0
+
+
+@lru_cache(maxsize=32)
+def _bucket_size(rate):
+    """(capacity, refill period in seconds) for a rate such as '30/min'."""
+    return parse_rates(rate)[0]
+
+
+def _take(key, rate):
+    """Take one token from the bucket for `key`. Returns False if it is empty."""
+    if not rate:
+        return True
+    capacity, seconds = _bucket_size(rate)
+    now = time.monotonic()
+    with _lock:
+        tokens, updated = _buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / seconds)
+        allowed = tokens >= 1
+        _buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(_buckets) > MAX_BUCKETS:
+            _buckets.popitem(last=False)
+    return allowed
+
+
+def client_ip(request):
+    return BaseThrottle().get_ident(request)
+
+
+def admit(request, key, status_code=None, endpoint=None, frontend=False):
+    """Decide whether to capture an error. Returns (outcome, weight).
+
+    `outcome` is CAPTURED or the reason it was dropped; `weight` is how many
+    occurrences a captured error stands for (0 if dropped). `key` identifies
+    the error for the per-fingerprint cap: its fingerprint if known,
+    otherwise something as specific (endpoint and status).
+    """
+    rate = sample_rate(status_code, endpoint, frontend)
+    if rate < 1.0 and random.random() >= rate:
+        outcome = SAMPLED_OUT
+    elif request is not None and not _take(f'ip:{client_ip(request)}', getattr(settings, 'ERROR_RATE_PER_IP', None)):
+        outcome = IP_LIMITED
+    elif frontend and not _take('frontend', getattr(settings, 'ERROR_RATE_FRONTEND', None)):
+        outcome = FRONTEND_LIMITED
+    elif not _take(f'fp:{key}', getattr(settings, 'ERROR_RATE_PER_FINGERPRINT', None)):
+        outcome = FINGERPRINT_LIMITED
+    else:
+        outcome = CAPTURED
+    _count(outcome)
+    if outcome != CAPTURED:
+        return outcome, 0
+    return outcome, max(1, round(1 / rate)) if rate > 0 else 1
+
+
+def _count(outcome):
+    global _published_at
+    with _lock:
+        _counts[outcome] += 1
+        due = time.monotonic() - _published_at >= COUNTER_PUBLISH_SECONDS
+        if due:
+            pending = dict(_counts)
+            _counts.clear()
+            _published_at = time.monotonic()
+    if due:
+        _publish(pending)
+
+
+def _publish(pending):
+    r = get_redis()
+    if r is None:
+        with _lock:
+            _counts.update(pending)
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for outcome, n in pending.items():
+            pipe.hincrby(COUNTERS_KEY, outcome, n)
+        pipe.execute()
+    except Exception:
+        logger.warning('Failed to publish error capture counters', exc_info=True)
+        with _lock:
+            _counts.update(pending)
+
+
+def counters():
+    """Captured and dropped errors: {'captured': n, 'sampled_out': n, ...}."""
+    with _lock:
+        totals = Counter(_counts)
+    r = get_redis()
+    if r is not None:
+        try:
+            totals.update({k.decode(): int(v) for k, v in r.hgetall(COUNTERS_KEY).items()})
+        except Exception:
+            logger.warning('Error capture counters unavailable in Redis', exc_info=True)
+    return {outcome: totals.get(outcome, 0) for outcome in (CAPTURED, SAMPLED_OUT, IP_LIMITED, FRONTEND_LIMITED, FINGERPRINT_LIMITED)}
+
+
+def reset_local():
+    """Forget buckets and unpublished counters of this process (used by tests)."""
+    with _lock:
+        _buckets.clear()
+        _counts.clear()
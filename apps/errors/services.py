@@ -1,6 +1,7 @@
 import traceback as tb
 from django.utils import timezone
-from .models import ErrorLog
+from . import pipeline, sampling
+from .models import ERROR_TYPES, SEVERITY_LEVELS, ErrorGroup, ErrorHourly
 
 
 class ErrorTrackingService:
@@ -9,34 +10,31 @@ class ErrorTrackingService:
     @staticmethod
     def log_error(request, exception, user_email=None, status_code=None):
         """
-        Log an error to the database
+        Log an error (buffered, grouped by fingerprint; see apps.errors.pipeline)
         
         Args:
             request: Django request object
             exception: The exception that occurred
             user_email: Email of user encountering error (optional)
             status_code: HTTP status code if applicable (optional)
+
+        Returns:
+            Dict of the recorded fields, including `id` and `fingerprint`
         """
         try:
-            error_type = ErrorTrackingService.classify_error(exception)
-            severity = ErrorTrackingService.set_severity(exception, status_code)
-            
-            error_log = ErrorLog(
-                error_type=error_type,
-                severity=severity,
-                title=exception.__class__.__name__,
-                message=str(exception),
-                traceback=tb.format_exc(),
-                endpoint=ErrorTrackingService.get_endpoint(request),
-                method=request.method if request else None,
-                status_code=status_code,
-                user_email=user_email or ErrorTrackingService.get_user_email(request),
-                request_data=ErrorTrackingService.get_request_data(request),
-                response_data=None,
-            )
-            
-            error_log.save()
-            return error_log
+            return pipeline.capture({
+                'error_type': ErrorTrackingService.classify_error(exception),
+                'severity': ErrorTrackingService.set_severity(exception, status_code),
+                'title': exception.__class__.__name__,
+                'message': str(exception),
+                'traceback': tb.format_exc(),
+                'endpoint': ErrorTrackingService.get_endpoint(request),
+                'method': request.method if request else None,
+                'status_code': status_code,
+                'user_email': user_email or ErrorTrackingService.get_user_email(request),
+                'request_data': ErrorTrackingService.get_request_data(request),
+                'response_data': None,
+            }, request=request)
         except Exception as e:
             print(f"Error logging failed: {str(e)}")
             return None
@@ -44,31 +42,32 @@ class ErrorTrackingService:
     @staticmethod
     def log_frontend_error(error_data, request=None):
         """
-        Log a frontend error
+        Log a frontend error (buffered, grouped by fingerprint)
         
         Args:
             error_data: Dictionary containing error information
             request: Django request object (optional)
+
+        Returns:
+            Dict of the recorded fields, including `id`, `fingerprint` and the
+            sampling `outcome` (the error may have been dropped)
         """
         try:
-            error_log = ErrorLog(
-                error_type=error_data.get('error_type', 'unknown'),
-                severity=error_data.get('severity', 'medium'),
-                title=error_data.get('title', 'Frontend Error'),
-                message=error_data.get('message', ''),
-                traceback=error_data.get('traceback', ''),
-                endpoint=error_data.get('endpoint', ''),
-                method=error_data.get('method', ''),
-                status_code=error_data.get('status_code', None),
-                user_email=error_data.get('user_email') or (
+            return pipeline.capture({
+                'error_type': error_data.get('error_type', 'unknown'),
+                'severity': error_data.get('severity', 'medium'),
+                'title': error_data.get('title', 'Frontend Error'),
+                'message': error_data.get('message', ''),
+                'traceback': error_data.get('traceback', ''),
+                'endpoint': error_data.get('endpoint', ''),
+                'method': error_data.get('method', ''),
+                'status_code': error_data.get('status_code', None),
+                'user_email': error_data.get('user_email') or (
                     ErrorTrackingService.get_user_email(request) if request else None
                 ),
-                request_data=error_data.get('request_data', None),
-                response_data=error_data.get('response_data', None),
-            )
-            
-            error_log.save()
-            return error_log
+                'request_data': error_data.get('request_data', None),
+                'response_data': error_data.get('response_data', None),
+            }, request=request, frontend=True)
         except Exception as e:
             print(f"Frontend error logging failed: {str(e)}")
             return None
@@ -149,6 +148,27 @@ class ErrorTrackingService:
         
         return 'medium'
 
+    @staticmethod
+    def classify_status(status_code):
+        """
+        Error type, severity and title for an HTTP error status
+        
+        Args:
+            status_code: HTTP status code (4xx or 5xx)
+            
+        Returns:
+            Tuple of (error_type, severity, title)
+        """
+        if status_code >= 500:
+            return 'server', 'critical', 'Server Error'
+        elif status_code == 401:
+            return 'authentication', 'high', 'Authentication Error'
+        elif status_code == 403:
+            return 'authorization', 'medium', 'Authorization Error'
+        elif status_code == 404:
+            return 'unknown', 'low', 'Not Found'
+        return 'validation', 'medium', 'Validation Error'
+
     @staticmethod
     def get_endpoint(request):
         """Extract endpoint from request"""
@@ -195,39 +215,83 @@ class ErrorTrackingService:
         return None
 
     @staticmethod
-    def mark_resolved(error_id):
-        """Mark an error as resolved"""
+    def mark_resolved(group_id):
+        """Mark an error group as resolved"""
         try:
-            error = ErrorLog.objects.get(id=error_id)
-            error.resolved = True
-            error.save(update_fields=['resolved', 'updated_at'])
-            return error
-        except ErrorLog.DoesNotExist:
+            group = ErrorGroup.objects.get(id=group_id)
+            group.resolved = True
+            group.save(update_fields=['resolved'])
+            return group
+        except ErrorGroup.DoesNotExist:
             return None
 
     @staticmethod
     def cleanup_old_errors(days=30):
-        """Delete errors older than specified days"""
+        """Delete error groups not seen (and hourly counts) older than specified days"""
         from django.utils import timezone
         from datetime import timedelta
         
         cutoff_date = timezone.now() - timedelta(days=days)
-        deleted_count, _ = ErrorLog.objects.filter(created_at__lt=cutoff_date).delete()
+        deleted_count, _ = ErrorGroup.objects.filter(last_seen__lt=cutoff_date).delete()
+        ErrorHourly.objects.filter(hour__lt=cutoff_date).delete()
         return deleted_count
 
     @staticmethod
-    def get_error_stats():
-        """Get error statistics"""
-        from django.db.models import Count
-        
-        return {
-            'total': ErrorLog.objects.count(),
-            'unresolved': ErrorLog.objects.filter(resolved=False).count(),
-            'critical': ErrorLog.objects.filter(severity='critical').count(),
-            'high': ErrorLog.objects.filter(severity='high').count(),
-            'medium': ErrorLog.objects.filter(severity='medium').count(),
-            'low': ErrorLog.objects.filter(severity='low').count(),
-            'by_type': dict(
-                ErrorLog.objects.values('error_type').annotate(count=Count('id'))
-            ),
-        }
+    def get_error_stats(hours=24):
+        """Error statistics for the last `hours` hours.
+
+        Occurrence counts come from the hourly rollup in one conditional
+        aggregation; `groups` and `unresolved` count the distinct errors seen
+        in the range (open ones for `unresolved`).
+        """
+        from datetime import timedelta
+        from django.db.models import Count, Q, Sum
+
+        since = (timezone.now() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+
+        def total(**filters):
+            return Sum('count', filter=Q(**filters) if filters else None, default=0)
+
+        severities = [level for level, _ in SEVERITY_LEVELS]
+        types = [error_type for error_type, _ in ERROR_TYPES]
+        row = ErrorHourly.objects.filter(hour__gte=since).aggregate(
+            total=total(),
+            **{severity: total(severity=severity) for severity in severities},
+            **{f'type_{error_type}': total(error_type=error_type) for error_type in types},
+        )
+        stats = {key: row[key] for key in ['total', *severities]}
+        stats['by_type'] = {t: row[f'type_{t}'] for t in types if row[f'type_{t}']}
+        stats.update(ErrorGroup.objects.filter(last_seen__gte=since).aggregate(
+            groups=Count('id'),
+            unresolved=Count('id', filter=Q(resolved=False)),
+        ))
+        stats['hours'] = hours
+        stats['since'] = since.isoformat()
+        # Captured vs dropped by sampling and rate caps
+        stats['capture'] = sampling.counters()
+        return stats
+
+    @staticmethod
+    def get_cached_error_stats(hours=24):
+        """get_error_stats() through a Redis cache of ERROR_STATS_CACHE_SECONDS"""
+        import json
+        from django.conf import settings
+        from backend_project.redis_client import get_redis
+
+        ttl = getattr(settings, 'ERROR_STATS_CACHE_SECONDS', 30)
+        r = get_redis() if ttl else None
+        key = f'errors:stats:{hours}'
+        if r is not None:
+            try:
+                cached = r.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except Exception:
+                r = None
+        stats = ErrorTrackingService.get_error_stats(hours=hours)
+        if r is not None:
+            try:
+                r.setex(key, ttl, json.dumps(stats))
+            except Exception:
+                pass
+        return stats
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.errors import pipeline, sampling
+from apps.errors.models import ErrorGroup
+from apps.notifications.utils import log_error, log_exception
+
+
+@override_settings(
+    ERROR_LOG_FLUSH_SECONDS=3600, ERROR_SAMPLE_RATES={}, ERROR_RATE_PER_IP=None, ERROR_RATE_PER_FINGERPRINT=None, ERROR_RATE_FRONTEND=None,
+)
+class ErrorConsolidationTests(TestCase):
+    def setUp(self):
+        sampling.reset_local()
+        pipeline.flush()
+
+    def tearDown(self):
+        pipeline.flush()
+
+    def test_notification_helpers_record_into_error_groups(self):
+        user = get_user_model().objects.create_user(email='a@example.com', password='pw')
+        recorded = log_error(error_type='validation', title='Bad email', message='Invalid', status_code=400,
+                             user=user, endpoint='/api/users/register/', method='POST')
+        try:
+            1 / 0
+        except ZeroDivisionError as e:
+            log_exception(e, title='Division', endpoint='/api/trips/', method='GET', error_type='server')
+        pipeline.flush()
+
+        group = ErrorGroup.objects.get(fingerprint=recorded['fingerprint'])
+        self.assertEqual((group.error_type, group.samples[0]['user_email']), ('validation', 'a@example.com'))
+        self.assertIn('ZeroDivisionError', ErrorGroup.objects.get(title='Division').samples[0]['traceback'])
+
+    def test_admin_create_takes_the_buffered_path(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(email='s@example.com', password='pw', is_staff=True))
+        resp = client.post('/api/errors/errors/', {'title': 'Manual', 'message': 'm'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(pipeline.writer.pending(), 1)
+
+    def test_cleanup_command_deletes_groups_not_seen_recently(self):
+        old = timezone.now() - timedelta(days=10)
+        ErrorGroup.objects.create(fingerprint='a' * 40, title='old', message='m', first_seen=old, last_seen=old)
+        ErrorGroup.objects.create(fingerprint='b' * 40, title='new', message='m', first_seen=old)
+
+        out = StringIO()
+        call_command('cleanup_error_logs', days=7, stdout=out)
+        self.assertIn('deleted 1', out.getvalue())
+        self.assertEqual(list(ErrorGroup.objects.values_list('title', flat=True)), ['new'])
+
+    def test_old_notification_routes_are_gone(self):
+        self.assertEqual(self.client.get('/api/notifications/errors/recent/').status_code, 404)
+        self.assertEqual(self.client.post('/api/notifications/errors/log-frontend/', {}).status_code, 404)
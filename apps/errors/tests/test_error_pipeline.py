@@ -0,0 +1,141 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.errors import pipeline, sampling
+from apps.errors.models import ErrorGroup
+from apps.errors.services import ErrorTrackingService
+
+
+@override_settings(
+    ERROR_LOG_FLUSH_SECONDS=3600, ERROR_LOG_BATCH_SIZE=100, ERROR_GROUP_MAX_SAMPLES=2,
+    ERROR_SAMPLE_RATES={}, ERROR_RATE_PER_IP=None, ERROR_RATE_PER_FINGERPRINT=None, ERROR_RATE_FRONTEND=None,
+)
+class ErrorPipelineTests(TestCase):
+    def setUp(self):
+        sampling.reset_local()
+        pipeline.flush()
+        ErrorGroup.objects.all().delete()
+
+    def test_errors_are_buffered_then_grouped(self):
+        for _ in range(3):
+            self.client.get('/api/users/profile/')
+        self.client.post('/api/users/login/', {'email': 'x'}, content_type='application/json')
+        self.client.get('/not-api/')
+        # The error log's own endpoints are not captured
+        self.client.post('/api/errors/errors/log/', {'title': 'x'}, content_type='application/json')
+        self.assertEqual(ErrorGroup.objects.count(), 0)
+        self.assertEqual(pipeline.writer.pending(), 4)
+
+        # SELECT known groups, INSERT the new ones and SELECT them back, one
+        # UPDATE per group; for the hourly rollup one UPDATE per (hour, type,
+        # severity), then one INSERT for the new keys and their UPDATEs again
+        with self.assertNumQueries(10):
+            self.assertEqual(pipeline.flush(), 4)
+
+        auth = ErrorGroup.objects.get(endpoint='/api/users/profile/')
+        self.assertEqual(
+            (auth.count, auth.status_code, auth.error_type, auth.severity),
+            (3, 401, 'authentication', 'high'),
+        )
+        self.assertEqual(len(auth.samples), 2)
+
+        invalid = ErrorGroup.objects.get(endpoint='/api/users/login/')
+        self.assertEqual((invalid.count, invalid.error_type, invalid.method), (1, 'validation', 'POST'))
+        self.assertEqual(invalid.samples[0]['request_data'], {'email': 'x'})
+        self.assertIn('password', invalid.samples[0]['response_data'])
+
+    def test_repeats_update_the_counter(self):
+        self.client.get('/api/users/profile/')
+        pipeline.flush()
+        group = ErrorGroup.objects.get()
+        group.resolved = True
+        group.save()
+
+        for _ in range(2):
+            self.client.get('/api/users/profile/')
+        with self.assertNumQueries(3):
+            pipeline.flush()
+        group.refresh_from_db()
+        self.assertEqual(group.count, 3)
+        self.assertGreater(group.last_seen, group.first_seen)
+        self.assertFalse(group.resolved)
+
+    @override_settings(ERROR_LOG_MAX_BODY_BYTES=64)
+    def test_large_bodies_are_not_kept(self):
+        self.client.post('/api/users/login/', {'email': 'x' * 100}, content_type='application/json')
+        self.client.post('/api/users/login/', {'email': 'x'}, content_type='application/json')
+        pipeline.flush()
+        samples = ErrorGroup.objects.get(endpoint='/api/users/login/').samples
+        self.assertEqual([sample['request_data'] for sample in samples], [{'email': 'x'}, None])
+
+    @override_settings(ERROR_LOG_MAX_BODY_BYTES=64)
+    def test_large_responses_keep_their_message(self):
+        request = RequestFactory().get('/api/trips/')
+        request.user = AnonymousUser()
+        for detail in ['Quota exceeded', 'Trip closed']:
+            pipeline.capture_response(request, JsonResponse({'detail': detail, 'padding': 'x' * 100}, status=400))
+        pipeline.flush()
+        groups = ErrorGroup.objects.order_by('message')
+        self.assertEqual([g.message for g in groups], ['Quota exceeded', 'Trip closed'])
+        self.assertIsNone(groups[0].samples[0]['response_data'])
+
+    def test_concurrent_first_insert_keeps_both_counts(self):
+        for _ in range(2):
+            self.client.get('/api/users/profile/')
+        bulk_create = ErrorGroup.objects.bulk_create
+
+        def other_process_inserts_first(objs, **kwargs):
+            ErrorGroup.objects.create(fingerprint=objs[0].fingerprint, title='t', message='m', count=3)
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(ErrorGroup.objects, 'bulk_create', side_effect=other_process_inserts_first):
+            pipeline.flush()
+        group = ErrorGroup.objects.get()
+        self.assertEqual((group.count, len(group.samples)), (5, 2))
+
+    def test_fingerprint_ignores_ids(self):
+        a = pipeline.fingerprint('/api/trips/12/', 404, 'unknown', 'Trip 12 not found for a@example.com')
+        b = pipeline.fingerprint('/api/trips/13/', 404, 'unknown', 'Trip 13 not found for b@example.com')
+        c = pipeline.fingerprint('/api/trips/13/', 403, 'unknown', 'Trip 13 not found for b@example.com')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_fingerprint_uses_traceback_shape(self):
+        tb = 'Traceback (most recent call last):\n  File "/app/x.py", line %d, in get\nKeyError: %s'
+        a = pipeline.fingerprint('/api/x/', 500, 'server', 'one', tb % (10, "'a'"))
+        b = pipeline.fingerprint('/api/x/', 500, 'server', 'two', tb % (12, "'b'"))
+        self.assertEqual(a, b)
+
+    def test_frontend_log_returns_fingerprint(self):
+        resp = self.client.post('/api/errors/errors/log/', {'title': 'Crash', 'message': 'boom'},
+                                content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        pipeline.flush()
+        self.assertEqual(ErrorGroup.objects.get(fingerprint=resp.json()['fingerprint']).title, 'Crash')
+
+    def test_stats_and_admin_list_read_groups(self):
+        for severity, count in [('high', 2), ('low', 1)]:
+            for _ in range(count):
+                ErrorTrackingService.log_frontend_error({'title': severity, 'message': severity, 'severity': severity})
+        pipeline.flush()
+
+        with self.assertNumQueries(2):
+            stats = ErrorTrackingService.get_error_stats()
+        self.assertEqual((stats['total'], stats['groups'], stats['high'], stats['low']), (3, 2, 2, 1))
+        self.assertEqual(stats['by_type'], {'unknown': 3})
+
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(email='a@example.com', password='pw', is_staff=True))
+        resp = client.get('/api/errors/errors/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(g['count'] for g in resp.json()), [1, 2])
+
+        high = ErrorGroup.objects.get(severity='high')
+        resp = client.get('/api/errors/errors/recent/?severity=high')
+        self.assertEqual([g['id'] for g in resp.json()['results']], [high.id])
+        resp = client.patch(f'/api/errors/errors/{high.id}/', {'resolved': True, 'count': 0}, format='json')
+        self.assertEqual((resp.json()['resolved'], resp.json()['count']), (True, 2))
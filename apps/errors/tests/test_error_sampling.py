@@ -0,0 +1,81 @@
+from unittest.mock import patch
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from apps.errors import pipeline, sampling
+from apps.errors.models import ErrorGroup
+
+
+@override_settings(
+    ERROR_LOG_FLUSH_SECONDS=3600, ERROR_RATE_PER_IP=None, ERROR_RATE_PER_FINGERPRINT=None, ERROR_RATE_FRONTEND=None,
+    ERROR_SAMPLE_RATES={'4xx': 1.0, '401': 0.25, 'frontend': 1.0},
+    ERROR_SAMPLE_ENDPOINT_RATES={'/api/users/token/': 0.5, '/api/users/token/refresh/': 0.0},
+)
+class ErrorSamplingTests(TestCase):
+    def setUp(self):
+        sampling.reset_local()
+        pipeline.flush()
+
+    def test_rate_lookup(self):
+        self.assertEqual(sampling.sample_rate(401, '/api/trips/'), 0.25)
+        self.assertEqual(sampling.sample_rate(400, '/api/trips/'), 1.0)
+        self.assertEqual(sampling.sample_rate(500, '/api/trips/'), 1.0)
+        self.assertEqual(sampling.sample_rate(401, '/api/users/token/refresh/'), 0.0)
+        self.assertEqual(sampling.sample_rate(400, '/api/users/token/verify/'), 0.5)
+
+    def test_sampled_errors_are_weighted(self):
+        with patch('apps.errors.sampling.random.random', side_effect=[0.1, 0.9, 0.2, 0.95]):
+            for _ in range(4):
+                self.client.get('/api/users/profile/')
+        self.assertEqual(pipeline.writer.pending(), 2)
+        pipeline.flush()
+        # Two kept at 1/4 sampling stand for eight occurrences
+        self.assertEqual(ErrorGroup.objects.get().count, 8)
+        counts = sampling.counters()
+        self.assertEqual((counts['captured'], counts['sampled_out']), (2, 2))
+
+    @override_settings(ERROR_RATE_PER_IP='3/min')
+    def test_per_ip_cap_on_public_log_endpoint(self):
+        codes = [
+            self.client.post('/api/errors/errors/log/', {'title': 't', 'message': f'm{i}'},
+                             content_type='application/json').status_code
+            for i in range(5)
+        ]
+        self.assertEqual(codes, [201, 201, 201, 429, 429])
+        self.assertEqual(pipeline.writer.pending(), 3)
+        self.assertEqual(sampling.counters()['ip_limited'], 2)
+
+    @override_settings(ERROR_RATE_PER_IP='3/min', REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_per_ip_cap_ignores_client_set_forwarded_for(self):
+        codes = [
+            self.client.post('/api/errors/errors/log/', {'title': 't', 'message': f'm{i}'},
+                             content_type='application/json',
+                             HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7').status_code
+            for i in range(5)
+        ]
+        self.assertEqual(codes, [201, 201, 201, 429, 429])
+
+    @override_settings(ERROR_RATE_FRONTEND='2/min')
+    def test_frontend_errors_share_one_cap(self):
+        codes = [
+            self.client.post('/api/errors/errors/log/', {'title': 't', 'message': f'm{i}'},
+                             content_type='application/json', REMOTE_ADDR=f'10.0.0.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(codes, [201, 201, 429, 429])
+        self.assertEqual(sampling.counters()['frontend_limited'], 2)
+
+    @override_settings(ERROR_RATE_PER_FINGERPRINT='2/min')
+    def test_per_fingerprint_cap(self):
+        for _ in range(4):
+            self.client.post('/api/users/login/', {'email': 'x'}, content_type='application/json')
+        self.assertEqual(pipeline.writer.pending(), 2)
+        self.assertEqual(sampling.counters()['fingerprint_limited'], 2)
+
+    def test_buckets_refill(self):
+        with patch('apps.errors.sampling.time.monotonic', side_effect=[0.0, 0.0, 30.0, 60.0]):
+            self.assertTrue(sampling._take('k', '1/min'))
+            self.assertFalse(sampling._take('k', '1/min'))
+            # Half a token after half a minute, a whole one after a minute
+            self.assertFalse(sampling._take('k', '1/min'))
+            self.assertTrue(sampling._take('k', '1/min'))
@@ -0,0 +1,96 @@
+import json
+import uuid
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.errors import pipeline, sampling
+from apps.errors.models import ErrorGroup, ErrorHourly
+from apps.errors.services import ErrorTrackingService
+
+
+@override_settings(
+    ERROR_LOG_FLUSH_SECONDS=3600, ERROR_SAMPLE_RATES={}, ERROR_RATE_PER_IP=None, ERROR_RATE_PER_FINGERPRINT=None, ERROR_RATE_FRONTEND=None,
+)
+class ErrorStatsTests(TestCase):
+    def setUp(self):
+        sampling.reset_local()
+        pipeline.flush()
+        ErrorGroup.objects.all().delete()
+        ErrorHourly.objects.all().delete()
+
+    def log(self, error_type, severity, at=None, weight=1):
+        pipeline.writer.put({
+            'id': uuid.uuid4(), 'created_at': at or timezone.now(), 'weight': weight,
+            'error_type': error_type, 'severity': severity, 'title': 't', 'message': f'{error_type} {severity}',
+        })
+
+    def test_pipeline_keeps_hourly_rollup(self):
+        now = timezone.now()
+        self.log('server', 'critical', weight=10)
+        self.log('server', 'critical')
+        self.log('network', 'low', at=now - timedelta(hours=2))
+        pipeline.flush()
+        self.log('server', 'critical')
+        pipeline.flush()
+
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        self.assertEqual(ErrorHourly.objects.get(hour=hour, error_type='server', severity='critical').count, 12)
+        self.assertEqual(ErrorHourly.objects.get(hour=hour - timedelta(hours=2)).count, 1)
+
+    def test_concurrent_first_insert_keeps_hourly_counts(self):
+        self.log('server', 'critical', weight=2)
+        bulk_create = ErrorHourly.objects.bulk_create
+
+        def other_process_inserts_first(objs, **kwargs):
+            ErrorHourly.objects.create(hour=objs[0].hour, error_type='server', severity='critical', count=5)
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(ErrorHourly.objects, 'bulk_create', side_effect=other_process_inserts_first):
+            pipeline.flush()
+        self.assertEqual(ErrorHourly.objects.get().count, 7)
+
+    def test_stats_cover_the_requested_hours(self):
+        now = timezone.now()
+        self.log('server', 'critical')
+        self.log('validation', 'medium', weight=4)
+        self.log('network', 'low', at=now - timedelta(days=3))
+        pipeline.flush()
+        ErrorGroup.objects.filter(error_type='server').update(resolved=True)
+        # Groups last seen days ago drop out of the short range
+        ErrorGroup.objects.filter(error_type='network').update(last_seen=now - timedelta(days=3))
+
+        with self.assertNumQueries(2):
+            stats = ErrorTrackingService.get_error_stats(hours=24)
+        self.assertEqual(
+            (stats['total'], stats['critical'], stats['medium'], stats['low'], stats['groups'], stats['unresolved']),
+            (5, 1, 4, 0, 2, 1),
+        )
+        self.assertEqual(stats['by_type'], {'server': 1, 'validation': 4})
+
+        stats = ErrorTrackingService.get_error_stats(hours=24 * 7)
+        self.assertEqual((stats['total'], stats['low'], stats['groups']), (6, 1, 3))
+
+    def test_stats_endpoint_is_cached(self):
+        self.log('server', 'high')
+        pipeline.flush()
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(email='s@example.com', password='pw', is_staff=True))
+
+        redis = MagicMock()
+        redis.get.return_value = None
+        with patch('backend_project.redis_client.get_redis', return_value=redis):
+            resp = client.get('/api/errors/errors/stats/?hours=6')
+            self.assertEqual((resp.status_code, resp.json()['total'], resp.json()['hours']), (200, 1, 6))
+            key, ttl, value = redis.setex.call_args.args
+            self.assertEqual((key, ttl), ('errors:stats:6', 30))
+
+            redis.get.return_value = value
+            with self.assertNumQueries(0):
+                self.assertEqual(client.get('/api/errors/errors/stats/?hours=6').json(), json.loads(value))
+
+        self.assertEqual(client.get('/api/errors/errors/stats/?hours=0').status_code, 400)
+        self.assertEqual(client.get('/api/errors/errors/stats/?hours=abc').status_code, 400)
@@ -4,24 +4,27 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import ErrorLog
-from .serializers import ErrorLogSerializer, ErrorListSerializer, ErrorCreateSerializer
+from .models import ErrorGroup
+from .serializers import ErrorCreateSerializer, ErrorGroupSerializer, ErrorGroupListSerializer
+from . import sampling
 from .services import ErrorTrackingService
 
 
 class ErrorLogViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing error logs"""
+    """ViewSet for the error log: errors grouped by fingerprint, with occurrence counts"""
     
-    queryset = ErrorLog.objects.all()
-    serializer_class = ErrorLogSerializer
+    queryset = ErrorGroup.objects.all()
+    serializer_class = ErrorGroupSerializer
+    http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['severity', 'error_type', 'resolved']
-    search_fields = ['title', 'message', 'endpoint', 'user_email']
-    ordering_fields = ['created_at', 'severity', 'error_type']
-    ordering = ['-created_at']
+    filterset_fields = ['severity', 'error_type', 'resolved', 'status_code']
+    search_fields = ['title', 'message', 'endpoint']
+    ordering_fields = ['last_seen', 'first_seen', 'count', 'severity', 'error_type']
+    ordering = ['-last_seen']
     pagination_class = None  # Allow large result sets for admin view
 
     def get_permissions(self):
@@ -37,34 +40,56 @@ class ErrorLogViewSet(viewsets.ModelViewSet):
         if self.action == 'create' or self.action == 'log':
             return ErrorCreateSerializer
         elif self.action == 'list':
-            return ErrorListSerializer
-        return ErrorLogSerializer
+            return ErrorGroupListSerializer
+        return ErrorGroupSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'recent'):
+            # Samples are only shown on the detail view
+            queryset = queryset.defer('samples')
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        """Record an error through the same buffered path as `log`"""
+        return self.log(request)
 
     @action(detail=False, methods=['post'], permission_classes=[])
     def log(self, request):
         """Log a frontend error - public endpoint"""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            error_log = ErrorTrackingService.log_frontend_error(
+            recorded = ErrorTrackingService.log_frontend_error(
                 serializer.validated_data,
                 request=request
             )
+            if recorded is None:
+                return Response({'detail': 'Error could not be logged'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            if recorded['outcome'] in (sampling.IP_LIMITED, sampling.FRONTEND_LIMITED, sampling.FINGERPRINT_LIMITED):
+                return Response({'detail': 'Too many errors logged'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            if recorded['outcome'] == sampling.SAMPLED_OUT:
+                return Response({'fingerprint': recorded['fingerprint'], 'captured': False},
+                                status=status.HTTP_202_ACCEPTED)
             return Response(
-                {'id': str(error_log.id), 'created_at': error_log.created_at},
+                {
+                    'id': str(recorded['id']),
+                    'created_at': recorded['created_at'],
+                    'fingerprint': recorded['fingerprint'],
+                },
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def recent(self, request):
-        """Get recent errors with optional filtering"""
+        """Get errors seen recently, with optional filtering"""
         limit = int(request.query_params.get('limit', 100))
         hours = int(request.query_params.get('hours', 24))
         
         cutoff_time = timezone.now() - timedelta(hours=hours)
-        queryset = self.get_queryset().filter(created_at__gte=cutoff_time)[:limit]
+        queryset = self.filter_queryset(self.get_queryset()).filter(last_seen__gte=cutoff_time)[:limit]
         
-        serializer = ErrorListSerializer(queryset, many=True)
+        serializer = ErrorGroupListSerializer(queryset, many=True)
         return Response({
             'results': serializer.data,
             'count': len(serializer.data)
@@ -72,11 +97,11 @@ class ErrorLogViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def resolve(self, request, pk=None):
-        """Mark an error as resolved"""
-        error_log = self.get_object()
-        error_log.resolved = True
-        error_log.save(update_fields=['resolved', 'updated_at'])
-        serializer = self.get_serializer(error_log)
+        """Mark an error as resolved (reopened if it happens again)"""
+        group = self.get_object()
+        group.resolved = True
+        group.save(update_fields=['resolved'])
+        serializer = self.get_serializer(group)
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
@@ -91,6 +116,14 @@ class ErrorLogViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def stats(self, request):
-        """Get error statistics"""
-        stats = ErrorTrackingService.get_error_stats()
-        return Response(stats)
+        """Get error statistics for the last `hours` hours (default 24)"""
+        max_hours = getattr(settings, 'ERROR_STATS_MAX_HOURS', 30 * 24)
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except ValueError:
+            hours = 0
+        if not 1 <= hours <= max_hours:
+            return Response({'detail': f'hours must be between 1 and {max_hours}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(ErrorTrackingService.get_cached_error_stats(hours=hours))
+
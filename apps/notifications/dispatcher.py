@@ -0,0 +1,157 @@
+"""
+Batched push notification dispatch.
+
+Trip flows describe *who* should get a push (user ids) and *what* it says;
+this module resolves device tokens for all recipients in one query (through
+a Redis-cached user -> tokens map), merges messages with identical content
+into FCM multicast batches of at most FCM_MULTICAST_LIMIT tokens, and hands
+every batch to a single Celery task (spooled to disk if the broker is
+down, see backend_project.task_spool).
+"""
+import json
+import logging
+from django.conf import settings
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# FCM rejects multicast messages with more than 500 tokens
+FCM_MULTICAST_LIMIT = 500
+TOKEN_CACHE_PREFIX = 'push:tokens:'
+
+
+def _cache_key(user_id):
+    return f'{TOKEN_CACHE_PREFIX}{user_id}'
+
+
+def get_tokens_for_users(user_ids):
+    """Return {user_id: [token, ...]} for the given users.
+
+    Cached users are served from Redis; the rest are loaded with a single
+    Device query and written back (including users with no devices, so
+    they are not re-queried on every event).
+    """
+    ids = list(dict.fromkeys(int(uid) for uid in user_ids if uid is not None))
+    if not ids:
+        return {}
+
+    tokens = {}
+    misses = ids
+    r = get_redis()
+    if r is not None:
+        try:
+            cached = r.mget([_cache_key(uid) for uid in ids])
+            misses = []
+            for uid, value in zip(ids, cached):
+                if value is None:
+                    misses.append(uid)
+                else:
+                    tokens[uid] = json.loads(value)
+        except Exception:
+            logger.warning('Push token cache unavailable; loading tokens from DB', exc_info=True)
+            misses = [uid for uid in ids if uid not in tokens]
+
+    if misses:
+        from apps.users.models import Device
+        loaded = {uid: [] for uid in misses}
+        rows = Device.objects.filter(user_id__in=misses).exclude(token='').values_list('user_id', 'token')
+        for uid, token in rows:
+            if token not in loaded[uid]:
+                loaded[uid].append(token)
+        tokens.update(loaded)
+        if r is not None:
+            ttl = getattr(settings, 'PUSH_TOKEN_CACHE_TTL_SECONDS', 300)
+            try:
+                pipe = r.pipeline(transaction=False)
+                for uid, user_tokens in loaded.items():
+                    pipe.setex(_cache_key(uid), ttl, json.dumps(user_tokens))
+                pipe.execute()
+            except Exception:
+                pass
+    return tokens
+
+
+def invalidate_user_tokens(*user_ids):
+    """Drop cached tokens for users whose devices changed."""
+    r = get_redis()
+    if r is None or not user_ids:
+        return
+    try:
+        r.delete(*[_cache_key(uid) for uid in user_ids])
+    except Exception:
+        logger.warning('Failed to invalidate push token cache for %s', user_ids, exc_info=True)
+
+
+def prune_device_tokens(tokens):
+    """Delete every Device holding one of `tokens` and drop its owners' cached tokens."""
+    tokens = list(set(tokens))
+    if not tokens:
+        return 0
+    from apps.users.models import Device
+    devices = Device.objects.filter(token__in=tokens)
+    user_ids = set(devices.values_list('user_id', flat=True))
+    deleted, _ = devices.delete()
+    invalidate_user_tokens(*user_ids)
+    logger.info('Pruned %d dead FCM tokens for %d users', deleted, len(user_ids))
+    return deleted
+
+
+def _stringify(data):
+    # FCM data payloads only accept string values
+    return {str(k): str(v) for k, v in (data or {}).items() if v is not None}
+
+
+def build_batches(messages, tokens_by_user=None):
+    """Turn `[{'user_ids', 'title', 'body', 'data'}, ...]` into FCM multicast batches.
+
+    Messages with the same title, body and data are merged and their tokens
+    de-duplicated, then split into chunks of FCM_MULTICAST_LIMIT. Pass
+    `tokens_by_user` when the caller has already resolved tokens.
+    """
+    messages = list(messages)
+    if tokens_by_user is None:
+        all_ids = [uid for m in messages for uid in m.get('user_ids', [])]
+        tokens_by_user = get_tokens_for_users(all_ids)
+
+    grouped = {}
+    for m in messages:
+        data = _stringify(m.get('data'))
+        key = (m['title'], m['body'], json.dumps(data, sort_keys=True))
+        bucket = grouped.setdefault(key, {'title': m['title'], 'body': m['body'], 'data': data, 'tokens': {}})
+        for uid in m.get('user_ids', []):
+            for token in tokens_by_user.get(int(uid), []):
+                bucket['tokens'][token] = None
+
+    batches = []
+    for bucket in grouped.values():
+        tokens = list(bucket['tokens'])
+        for start in range(0, len(tokens), FCM_MULTICAST_LIMIT):
+            batches.append({
+                'title': bucket['title'],
+                'body': bucket['body'],
+                'data': bucket['data'],
+                'tokens': tokens[start:start + FCM_MULTICAST_LIMIT],
+            })
+    return batches
+
+
+def dispatch_push(messages, tokens_by_user=None):
+    """Resolve, batch and queue push messages. Never raises."""
+    try:
+        batches = build_batches(messages, tokens_by_user)
+    except Exception:
+        logger.exception('Failed to build push batches')
+        return {'queued': False, 'batches': 0}
+    if not batches:
+        return {'queued': False, 'batches': 0}
+
+    from backend_project.task_spool import enqueue
+    from .tasks import send_push_batch_task
+    # Never send inline from a request: a down broker spools the batch to disk
+    queued = enqueue(send_push_batch_task, (batches,))
+    return {'queued': queued, 'batches': len(batches)}
+
+
+def notify_users(user_ids, title, body, data=None):
+    """Send one push message to every device of the given users."""
+    return dispatch_push([{'user_ids': list(user_ids), 'title': title, 'body': body, 'data': data}])
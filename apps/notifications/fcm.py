@@ -0,0 +1,122 @@
+"""
+Process-wide Firebase Cloud Messaging client.
+
+`firebase_admin` is initialized once per process (at Celery worker boot via
+`worker_process_init`, or lazily on first use) instead of on every send.
+Only Celery workers and management commands should send through this
+client; the web tier queues pushes (see `apps.notifications.dispatcher`).
+"""
+import os
+import json
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PushClient:
+    """Thin wrapper around firebase_admin.messaging with one-time initialization.
+
+    When firebase_admin is not installed or no credentials are configured the
+    client runs in mock mode: sends are logged and reported as delivered, which
+    keeps development environments working without FCM.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._messaging = None
+        self.mock = True
+
+    def init(self):
+        """Initialize firebase_admin if needed. Safe to call repeatedly."""
+        if self._ready:
+            return self
+        with self._lock:
+            if self._ready:
+                return self
+            try:
+                import firebase_admin
+                from firebase_admin import credentials, messaging
+            except ModuleNotFoundError:
+                logger.info('firebase_admin not installed; push notifications will be mocked')
+                self._ready = True
+                return self
+
+            try:
+                firebase_admin.get_app()
+                self.mock = False
+            except ValueError:
+                # Load credentials from env (JSON string) or a path
+                cred_env = os.getenv('FCM_CREDENTIALS_JSON')
+                cred_path = os.getenv('FCM_CREDENTIALS_PATH')
+                if cred_env:
+                    firebase_admin.initialize_app(credentials.Certificate(json.loads(cred_env)))
+                    self.mock = False
+                elif cred_path:
+                    firebase_admin.initialize_app(credentials.Certificate(cred_path))
+                    self.mock = False
+                else:
+                    logger.warning('FCM credentials not configured; push notifications will be mocked')
+            self._messaging = messaging
+            self._ready = True
+        return self
+
+    def _build(self, tokens, title, body, data):
+        return self._messaging.MulticastMessage(
+            notification=self._messaging.Notification(title=title, body=body),
+            tokens=list(tokens),
+            data=data or {},
+        )
+
+    def _result(self, tokens, response):
+        from .push import handle_multicast_response
+        pruned = handle_multicast_response(tokens, response)
+        logger.info(f'FCM sent: success={response.success_count} failure={response.failure_count} pruned={pruned}')
+        return {'success': True, 'success_count': response.success_count,
+                'failure_count': response.failure_count, 'pruned': pruned}
+
+    def send_multicast(self, tokens, title, body, data=None):
+        """Send one multicast message (at most 500 tokens). Never raises."""
+        self.init()
+        if self.mock:
+            return {'success': True, 'mock': True, 'delivered': len(tokens)}
+        try:
+            response = self._messaging.send_each_for_multicast(self._build(tokens, title, body, data))
+        except Exception as e:
+            logger.exception('Failed to send push notification')
+            return {'success': False, 'error': str(e)}
+        return self._result(tokens, response)
+
+    async def send_multicast_async(self, tokens, title, body, data=None):
+        """Async variant of `send_multicast`, so several batches can be in flight at once."""
+        self.init()
+        if self.mock:
+            return {'success': True, 'mock': True, 'delivered': len(tokens)}
+        send_async = getattr(self._messaging, 'send_each_for_multicast_async', None)
+        try:
+            message = self._build(tokens, title, body, data)
+            if send_async is not None:
+                response = await send_async(message)
+            else:
+                # firebase_admin < 6.6 has no async API
+                response = await asyncio.to_thread(self._messaging.send_each_for_multicast, message)
+        except Exception as e:
+            logger.exception('Failed to send push notification')
+            return {'success': False, 'error': str(e)}
+        return await asyncio.to_thread(self._result, tokens, response)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_push_client():
+    """Return the process-wide PushClient."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PushClient()
+    return _client
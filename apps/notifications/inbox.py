@@ -0,0 +1,123 @@
+"""
+Notification inbox writes and the cached unread counter.
+
+`record()` bulk-inserts one Notification per recipient and bumps each
+recipient's cached unread count (`notify:unread:<id>`) only if it is already
+cached; an uncached count is computed from the partial unread index on the
+next read and cached for UNREAD_COUNT_CACHE_TTL_SECONDS.
+
+Every write also bumps a per-user version (`notify:unread:v:<id>`). A reader
+notes the version before counting and stores its count only if the version
+is unchanged, so a row inserted or read while it was counting can never be
+cached under a stale count.
+"""
+import json
+import logging
+from django.conf import settings
+from django.utils import timezone
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+UNREAD_PREFIX = 'notify:unread:'
+VERSION_PREFIX = 'notify:unread:v:'
+
+# KEYS are (count, version) pairs. Bump every version, and increment only
+# counters that are cached, so a missing key is never initialised to a
+# partial count.
+_INCR_IF_CACHED = """
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i + 1])
+    redis.call('EXPIRE', KEYS[i + 1], ARGV[1])
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('INCR', KEYS[i])
+    end
+end
+return 0
+"""
+
+# Cache a recomputed count only if no write bumped the version since the
+# reader looked it up (ARGV[1], '' when there was none).
+_SET_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3], 'NX')
+return 1
+"""
+
+
+def _key(user_id):
+    return f'{UNREAD_PREFIX}{user_id}'
+
+
+def _version_key(user_id):
+    return f'{VERSION_PREFIX}{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'UNREAD_COUNT_CACHE_TTL_SECONDS', 3600)
+
+
+def record(user_ids, event, title, body, data=None):
+    """Store one inbox entry per user with a single INSERT."""
+    from .models import Notification
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return []
+    # Payloads may carry Decimals/datetimes from models
+    data = json.loads(json.dumps(data or {}, default=str))
+    rows = Notification.objects.bulk_create([
+        Notification(user_id=uid, event=event, title=title, body=body, data=data)
+        for uid in ids
+    ])
+    r = get_redis()
+    if r is not None:
+        try:
+            keys = [k for uid in ids for k in (_key(uid), _version_key(uid))]
+            r.eval(_INCR_IF_CACHED, len(keys), *keys, _ttl())
+        except Exception:
+            logger.warning('Failed to update cached unread counts', exc_info=True)
+    return rows
+
+
+def unread_count(user_id):
+    """Return the user's unread count, from Redis when cached."""
+    r = get_redis()
+    if r is not None:
+        try:
+            cached, version = r.mget(_key(user_id), _version_key(user_id))
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            r = None
+    from .models import Notification
+    count = Notification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+    if r is not None:
+        try:
+            r.eval(_SET_IF_UNCHANGED, 2, _key(user_id), _version_key(user_id),
+                   version.decode() if version is not None else '', count, _ttl())
+        except Exception:
+            pass
+    return count
+
+
+def mark_read(user_id, ids=None):
+    """Mark the given inbox entries (or all of them) read. Returns rows updated."""
+    from .models import Notification
+    qs = Notification.objects.filter(user_id=user_id, read_at__isnull=True)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    updated = qs.update(read_at=timezone.now())
+    if updated:
+        r = get_redis()
+        if r is not None:
+            try:
+                pipe = r.pipeline()
+                pipe.delete(_key(user_id))
+                pipe.incr(_version_key(user_id))
+                pipe.expire(_version_key(user_id), _ttl())
+                pipe.execute()
+            except Exception:
+                logger.warning('Failed to reset cached unread count for %s', user_id, exc_info=True)
+    return updated
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from backend_project import task_spool
+
+
+class Command(BaseCommand):
+    help = 'Re-publish Celery tasks that were spooled to disk while the broker was down'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of tasks to publish')
+
+    def handle(self, *args, **options):
+        published, remaining = task_spool.drain(limit=options['limit'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Published {published} spooled tasks ({remaining} remaining)'
+            )
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from backend_project.celery import app, WORKER_POOLS, worker_argv
+
+
+class Command(BaseCommand):
+    help = 'Start a Celery worker for one worker pool (queues, concurrency and prefetch from backend_project.celery)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pool', choices=sorted(WORKER_POOLS))
+
+    def handle(self, *args, **options):
+        app.worker_main(worker_argv(options['pool']))
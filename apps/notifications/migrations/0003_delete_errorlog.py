@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification'),
+        # Its rows are copied into errors.ErrorLog first
+        ('errors', '0005_merge_notification_errors'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ErrorLog',
+        ),
+    ]
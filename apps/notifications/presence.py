@@ -0,0 +1,94 @@
+"""
+WebSocket presence per user.
+
+Each authenticated socket registers its channel name under
+`presence:user:<id>` (a Redis sorted set scored by expiry time) and
+refreshes it on every heartbeat, so a user is online while at least one of
+their sockets has heart-beaten within PRESENCE_TTL_SECONDS. Sockets that die
+without disconnecting simply age out.
+
+Without Redis an in-process map is used, which matches the in-memory
+channel layer on a single node.
+"""
+import time
+import logging
+import threading
+from django.conf import settings
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_PREFIX = 'presence:user:'
+
+_local_lock = threading.Lock()
+# user_id -> {channel_name: expires_at}
+_local = {}
+
+
+def user_group(user_id):
+    """Channel layer group every socket of a user joins."""
+    return f'user_{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL_SECONDS', 90)
+
+
+def _key(user_id):
+    return f'{PRESENCE_PREFIX}{user_id}'
+
+
+def mark_online(user_id, channel_name):
+    """Register or refresh one socket of `user_id`."""
+    expires = time.time() + _ttl()
+    r = get_redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.zadd(_key(user_id), {channel_name: expires})
+            pipe.expire(_key(user_id), _ttl())
+            pipe.execute()
+            return
+        except Exception:
+            logger.warning('Presence unavailable in Redis; using local map', exc_info=True)
+    with _local_lock:
+        _local.setdefault(str(user_id), {})[channel_name] = expires
+
+
+def mark_offline(user_id, channel_name):
+    """Forget one socket of `user_id` (the user may still be online elsewhere)."""
+    r = get_redis()
+    if r is not None:
+        try:
+            r.zrem(_key(user_id), channel_name)
+            return
+        except Exception:
+            pass
+    with _local_lock:
+        channels = _local.get(str(user_id))
+        if channels is not None:
+            channels.pop(channel_name, None)
+            if not channels:
+                _local.pop(str(user_id), None)
+
+
+def online_users(user_ids):
+    """Return the subset of `user_ids` with at least one live socket."""
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return set()
+    now = time.time()
+    r = get_redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            for uid in ids:
+                pipe.zcount(_key(uid), now, '+inf')
+            return {uid for uid, count in zip(ids, pipe.execute()) if count}
+        except Exception:
+            logger.warning('Presence unavailable in Redis; using local map', exc_info=True)
+    with _local_lock:
+        return {
+            uid for uid in ids
+            if any(exp > now for exp in _local.get(str(uid), {}).values())
+        }
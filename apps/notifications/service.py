@@ -0,0 +1,190 @@
+"""
+Notification service: one entry point for user-facing notifications.
+
+    notify(user_ids, 'trip.accepted', {'trip_id': trip.pk, 'driver_name': 'Ada'})
+
+For every recipient the cheapest channel that reaches them is used:
+
+1. WebSocket, if the user has a live socket (see `presence`): the message is
+   sent to the `user_<id>` group;
+2. FCM push, if the user has registered devices;
+3. SMS, for events that allow it, if the user has a phone number.
+
+Each (event, trip, user) is delivered at most once within
+NOTIFY_DEDUP_TTL_SECONDS (Redis SET NX, in-process fallback), so retries
+and double-submitted actions do not notify twice. All recipients of one
+call are resolved with batched lookups, written to the inbox with one
+INSERT and sent as one WebSocket fan-out, one push task and one SMS task.
+"""
+import time
+import logging
+import threading
+from django.conf import settings
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DEDUP_PREFIX = 'notify:dedup:'
+
+# event -> (title, body, sms allowed). Title and body are formatted with the payload.
+EVENT_TEMPLATES = {
+    'trip.new_request': ('New ride request nearby', 'Pickup at {origin_address}. Tap to accept.', False),
+    'trip.accepted': ('Driver accepted your ride', '{driver_name} is on the way. ETA will be available shortly.', True),
+    'trip.started': ('Your ride has started', '{driver_name} has started the trip.', True),
+    'trip.arrived': ('Driver has arrived', '{driver_name} has arrived at pickup.', True),
+    'trip.ended': ('Ride completed', 'Thank you for riding. Your receipt is available in the app.', False),
+    'trip.canceled': ('Ride canceled', 'Your ride has been canceled.', True),
+}
+
+# event -> the `data['event']` value the mobile apps already switch on. Push
+# and inbox data keep these names; events missing here carry no `event` key
+# (new-trip pushes are told apart by `type`).
+CLIENT_EVENT_NAMES = {
+    'trip.accepted': 'accepted',
+    'trip.started': 'started',
+    'trip.arrived': 'arrived',
+    'trip.ended': 'ended',
+    'trip.canceled': 'canceled',
+}
+
+_local_lock = threading.Lock()
+# dedup key -> expires_at, used when Redis is unavailable
+_local_dedup = {}
+
+
+class _Defaults(dict):
+    def __missing__(self, key):
+        return ''
+
+
+def render(event, payload):
+    """Return (title, body, sms_allowed) for an event."""
+    title, body, sms = EVENT_TEMPLATES.get(event, (payload.get('title', ''), payload.get('body', ''), False))
+    values = _Defaults(payload)
+    return title.format_map(values), body.format_map(values), sms
+
+
+def _dedup_key(event, trip_id, user_id):
+    return f'{DEDUP_PREFIX}{event}:{trip_id or "-"}:{user_id}'
+
+
+def claim(event, trip_id, user_ids):
+    """Return the user ids that have not been sent this (event, trip) yet, and claim them."""
+    ttl = getattr(settings, 'NOTIFY_DEDUP_TTL_SECONDS', 600)
+    keys = [_dedup_key(event, trip_id, uid) for uid in user_ids]
+    r = get_redis()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, 1, nx=True, ex=ttl)
+            return [uid for uid, fresh in zip(user_ids, pipe.execute()) if fresh]
+        except Exception:
+            logger.warning('Notification dedup unavailable in Redis; using local map', exc_info=True)
+
+    now = time.monotonic()
+    fresh = []
+    with _local_lock:
+        if len(_local_dedup) > 10000:
+            for k in [k for k, exp in _local_dedup.items() if exp <= now]:
+                del _local_dedup[k]
+        for uid, key in zip(user_ids, keys):
+            if _local_dedup.get(key, 0) <= now:
+                _local_dedup[key] = now + ttl
+                fresh.append(uid)
+    return fresh
+
+
+def _send_websocket(user_ids, message):
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from .presence import user_group
+
+    layer = get_channel_layer()
+    if layer is None:
+        return set()
+
+    async def fan_out():
+        import asyncio
+        results = await asyncio.gather(
+            *[layer.group_send(user_group(uid), {'type': 'notify', 'data': message}) for uid in user_ids],
+            return_exceptions=True,
+        )
+        return {uid for uid, res in zip(user_ids, results) if not isinstance(res, Exception)}
+
+    try:
+        return async_to_sync(fan_out)()
+    except Exception:
+        logger.exception('WebSocket notification fan-out failed')
+        return set()
+
+
+def _phones_for(user_ids):
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    return dict(
+        User.objects.filter(pk__in=user_ids).exclude(phone__isnull=True).exclude(phone='')
+        .values_list('pk', 'phone')
+    )
+
+
+def notify(user_ids, event, payload=None):
+    """Notify users of `event` over the best available channel. Never raises.
+
+    Returns counts per channel plus the number of duplicates skipped.
+    """
+    payload = dict(payload or {})
+    summary = {'websocket': 0, 'push': 0, 'sms': 0, 'duplicate': 0, 'unreachable': 0}
+    ids = list(dict.fromkeys(int(uid) for uid in user_ids if uid is not None))
+    if not ids:
+        return summary
+
+    try:
+        trip_id = payload.get('trip_id')
+        fresh = claim(event, trip_id, ids)
+        summary['duplicate'] = len(ids) - len(fresh)
+        if not fresh:
+            return summary
+
+        title, body, sms_allowed = render(event, payload)
+        data = {k: v for k, v in payload.items() if k not in ('title', 'body')}
+        if event in CLIENT_EVENT_NAMES:
+            data['event'] = CLIENT_EVENT_NAMES[event]
+
+        try:
+            from .inbox import record
+            record(fresh, event, title, body, data)
+        except Exception:
+            logger.exception('Failed to store %s in the notification inbox', event)
+
+        from .presence import online_users
+        online = online_users(fresh)
+        delivered = _send_websocket([uid for uid in fresh if uid in online], {
+            'type': 'notification', 'event': event, 'title': title, 'body': body, 'data': data,
+        }) if online else set()
+        summary['websocket'] = len(delivered)
+
+        remaining = [uid for uid in fresh if uid not in delivered]
+        if remaining:
+            from .dispatcher import get_tokens_for_users, dispatch_push
+            tokens = get_tokens_for_users(remaining)
+            pushable = [uid for uid in remaining if tokens.get(uid)]
+            if pushable:
+                dispatch_push([{'user_ids': pushable, 'title': title, 'body': body, 'data': data}],
+                              tokens_by_user=tokens)
+                summary['push'] = len(pushable)
+            remaining = [uid for uid in remaining if not tokens.get(uid)]
+
+        if remaining and sms_allowed:
+            phones = _phones_for(remaining)
+            if phones:
+                from backend_project.task_spool import enqueue
+                from apps.users.tasks import send_sms_batch_task
+                enqueue(send_sms_batch_task, ([[phone, f'{title}. {body}'] for phone in phones.values()],))
+                summary['sms'] = len(phones)
+            remaining = [uid for uid in remaining if uid not in phones]
+
+        summary['unreachable'] = len(remaining)
+    except Exception:
+        logger.exception('Failed to notify users of %s', event)
+    return summary
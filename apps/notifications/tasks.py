@@ -17,41 +17,47 @@ def send_push_task(self, device_tokens, title, body, data=None):
         body: notification body
         data: optional dict payload
     """
-    try:
-        import firebase_admin
-        from firebase_admin import messaging
-        # Initialize app lazily in worker if not already
-        try:
-            firebase_admin.get_app()
-        except Exception:
-            import os
-            import json
-            from firebase_admin import credentials
-            cred_env = os.getenv('FCM_CREDENTIALS_JSON')
-            cred_path = os.getenv('FCM_CREDENTIALS_PATH')
-            if cred_env:
-                cred_dict = json.loads(cred_env)
-                cred = credentials.Certificate(cred_dict)
-                firebase_admin.initialize_app(cred)
-            elif cred_path:
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred)
-            else:
-                logger.warning('FCM credentials not configured for Celery worker')
-
-        message = messaging.MulticastMessage(
-            notification=messaging.Notification(title=title, body=body),
-            tokens=device_tokens,
-            data=data or {}
-        )
-        response = messaging.send_multicast(message)
-        logger.info(f'FCM sent (task): success={response.success_count} failure={response.failure_count}')
-        return {'success': True, 'success_count': response.success_count, 'failure_count': response.failure_count}
-
-    except ModuleNotFoundError:
-        logger.info('firebase_admin not installed in worker; push skipped (mock)')
-        return {'success': True, 'mock': True, 'delivered': len(device_tokens)}
-    except Exception as e:
-        logger.exception('Failed to send push notification in task')
-        # Retry with exponential backoff
-        raise self.retry(exc=e, countdown=60)
+    from .fcm import get_push_client
+
+    result = get_push_client().send_multicast(device_tokens, title, body, data)
+    if not result.get('success'):
+        # Retry with a fixed backoff
+        raise self.retry(exc=Exception(result.get('error')), countdown=60)
+    return result
+
+
+@shared_task(bind=True, max_retries=3, time_limit=120)
+def send_push_batch_task(self, batches):
+    """Send several FCM multicast batches from one task.
+
+    Args:
+        batches: list of {'tokens', 'title', 'body', 'data'} dicts, each with
+            at most 500 tokens (see apps.notifications.dispatcher)
+
+    Batches are sent concurrently through the async FCM API; only batches
+    that failed are retried.
+    """
+    import asyncio
+    from .fcm import get_push_client
+
+    client = get_push_client()
+
+    async def send_all():
+        return await asyncio.gather(*[
+            client.send_multicast_async(b['tokens'], b['title'], b['body'], b.get('data'))
+            for b in batches
+        ])
+
+    results = asyncio.run(send_all())
+    failed = []
+    sent = 0
+    for batch, result in zip(batches, results):
+        if result.get('success'):
+            sent += result.get('success_count', result.get('delivered', 0))
+        else:
+            failed.append(batch)
+
+    logger.info(f'FCM batch task: batches={len(batches)} sent={sent} failed_batches={len(failed)}')
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(args=[failed], countdown=60)
+    return {'success': not failed, 'batches': len(batches), 'sent': sent, 'failed_batches': len(failed)}
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.notifications import dispatcher
+from apps.users.models import Device
+
+
+@override_settings(REDIS_URL=None)
+class PushDispatcherTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(email=f'u{i}@example.com', password='pw') for i in range(3)]
+        for i, user in enumerate(self.users):
+            Device.objects.create(user=user, token=f'token-{i}', platform='android')
+        Device.objects.create(user=self.users[0], token='token-0b', platform='ios')
+
+    def test_tokens_resolved_in_one_query(self):
+        with self.assertNumQueries(1):
+            tokens = dispatcher.get_tokens_for_users([u.pk for u in self.users])
+        self.assertEqual(sorted(tokens[self.users[0].pk]), ['token-0', 'token-0b'])
+        self.assertEqual(tokens[self.users[2].pk], ['token-2'])
+
+    def test_identical_messages_merge_and_split_at_limit(self):
+        messages = [
+            {'user_ids': [self.users[0].pk, self.users[1].pk], 'title': 'Hi', 'body': 'There', 'data': {'trip_id': 1}},
+            {'user_ids': [self.users[2].pk, self.users[0].pk], 'title': 'Hi', 'body': 'There', 'data': {'trip_id': 1}},
+            {'user_ids': [self.users[2].pk], 'title': 'Other', 'body': 'Message'},
+        ]
+        with patch.object(dispatcher, 'FCM_MULTICAST_LIMIT', 3):
+            batches = dispatcher.build_batches(messages)
+
+        merged = [b for b in batches if b['title'] == 'Hi']
+        self.assertEqual([len(b['tokens']) for b in merged], [3, 1])
+        self.assertEqual(sum((b['tokens'] for b in merged), []).count('token-0'), 1)
+        self.assertEqual(merged[0]['data'], {'trip_id': '1'})
+        self.assertEqual([b['tokens'] for b in batches if b['title'] == 'Other'], [['token-2']])
+
+    def test_dispatch_queues_a_single_task(self):
+        with patch('apps.notifications.tasks.send_push_batch_task.apply_async') as apply_async:
+            result = dispatcher.notify_users([u.pk for u in self.users], 'Ride', 'Update')
+        self.assertTrue(result['queued'])
+        apply_async.assert_called_once()
+        (batches,) = apply_async.call_args.kwargs['args']
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]['tokens']), 4)
+
+    def test_dead_tokens_pruned_from_multicast_response(self):
+        from types import SimpleNamespace
+        from firebase_admin import exceptions, messaging
+        from apps.notifications.push import handle_multicast_response
+
+        tokens = ['token-0', 'token-0b', 'token-1', 'token-2']
+        response = SimpleNamespace(responses=[
+            SimpleNamespace(success=True, exception=None),
+            SimpleNamespace(success=False, exception=messaging.UnregisteredError('gone')),
+            SimpleNamespace(success=False, exception=exceptions.InvalidArgumentError('bad payload')),
+            SimpleNamespace(success=False, exception=exceptions.InvalidArgumentError('The registration token is not a valid FCM registration token')),
+        ])
+        pruned = handle_multicast_response(tokens, response)
+
+        self.assertEqual(pruned, 2)
+        self.assertEqual(sorted(Device.objects.values_list('token', flat=True)), ['token-0', 'token-1'])
+
+    def test_register_same_token_does_not_duplicate(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.users[1])
+        for _ in range(2):
+            resp = client.post('/api/users/devices/', {'token': 'token-0', 'platform': 'web'})
+            self.assertEqual(resp.status_code, 201)
+
+        self.assertEqual(Device.objects.filter(token='token-0').count(), 1)
+        self.assertEqual(Device.objects.get(token='token-0').user, self.users[1])
+        self.assertEqual(Device.objects.filter(user=self.users[1]).count(), 2)
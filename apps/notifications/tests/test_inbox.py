@@ -0,0 +1,68 @@
+from unittest.mock import patch
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.notifications import inbox, service
+from apps.notifications.models import Notification
+
+
+@override_settings(REDIS_URL=None)
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='inbox@example.com', password='pw')
+        self.other = User.objects.create_user(email='other@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        service._local_dedup.clear()
+
+    def test_notify_writes_inbox_in_one_insert(self):
+        with patch('apps.notifications.service._send_websocket', return_value=set()), \
+                self.assertNumQueries(1 + 1 + 1):
+            # inbox insert, device token lookup, phone lookup
+            service.notify([self.user.pk, self.other.pk], 'trip.canceled', {'trip_id': 3})
+        self.assertEqual(Notification.objects.filter(event='trip.canceled').count(), 2)
+
+    def test_cursor_pages_and_unread_count(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, event='trip.ended', title=f'n{i}', body='') for i in range(5)
+        ])
+        Notification.objects.create(user=self.other, event='trip.ended', title='not mine')
+
+        first = self.client.get('/api/notifications/inbox/', {'page_size': 3}).json()
+        self.assertEqual([n['title'] for n in first['results']], ['n4', 'n3', 'n2'])
+        self.assertEqual(first['unread_count'], 5)
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([n['title'] for n in second['results']], ['n1', 'n0'])
+        self.assertIsNone(second['next'])
+
+        ids = [n['id'] for n in first['results']]
+        resp = self.client.post('/api/notifications/inbox/read/', {'ids': ids}, format='json').json()
+        self.assertEqual(resp, {'updated': 3, 'unread_count': 2})
+        resp = self.client.post('/api/notifications/inbox/read/', {}, format='json').json()
+        self.assertEqual(resp['unread_count'], 0)
+        for bad in ['1', ['abc'], [1, None], [True]]:
+            resp = self.client.post('/api/notifications/inbox/read/', {'ids': bad}, format='json')
+            self.assertEqual(resp.status_code, 400)
+
+    def test_write_while_counting_is_not_cached_stale(self):
+        redis = fakeredis.FakeRedis()
+        count = QuerySet.count
+
+        def record_while_counting(qs):
+            n = count(qs)
+            inbox.record([self.user.pk], 'trip.ended', 't', 'b')
+            return n
+
+        with patch('apps.notifications.inbox.get_redis', return_value=redis):
+            with patch.object(QuerySet, 'count', record_while_counting):
+                self.assertEqual(inbox.unread_count(self.user.pk), 0)
+            # The count taken before the insert was not cached
+            self.assertEqual(inbox.unread_count(self.user.pk), 1)
+            inbox.record([self.user.pk], 'trip.ended', 't', 'b')
+            self.assertEqual(int(redis.get(inbox._key(self.user.pk))), 2)
+            self.assertEqual(inbox.unread_count(self.user.pk), 2)
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.notifications import presence, service
+from apps.trips.consumers import TripConsumer
+from apps.users.models import Device
+
+
+@override_settings(
+    REDIS_URL=None,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class NotifyServiceTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.online = User.objects.create_user(email='online@example.com', password='pw')
+        self.with_device = User.objects.create_user(email='device@example.com', password='pw')
+        self.with_phone = User.objects.create_user(email='phone@example.com', phone='+15550001', password='pw')
+        self.nothing = User.objects.create_user(email='none@example.com', password='pw')
+        Device.objects.create(user=self.with_device, token='tok-1', platform='android')
+        service._local_dedup.clear()
+        presence._local.clear()
+
+    def test_channel_fallback_and_dedup(self):
+        presence.mark_online(self.online.pk, 'specific.test!abc')
+        ids = [self.online.pk, self.with_device.pk, self.with_phone.pk, self.nothing.pk]
+
+        with patch('apps.notifications.tasks.send_push_batch_task.apply_async') as push, \
+                patch('apps.users.tasks.send_sms_batch_task.apply_async') as sms:
+            summary = service.notify(ids, 'trip.accepted', {'trip_id': 5, 'driver_name': 'Ada'})
+            again = service.notify(ids, 'trip.accepted', {'trip_id': 5, 'driver_name': 'Ada'})
+
+        self.assertEqual(summary, {'websocket': 1, 'push': 1, 'sms': 1, 'duplicate': 0, 'unreachable': 1})
+        self.assertEqual(again['duplicate'], 4)
+        (batches,) = push.call_args.kwargs['args']
+        self.assertEqual(batches[0]['tokens'], ['tok-1'])
+        self.assertEqual(batches[0]['body'], 'Ada is on the way. ETA will be available shortly.')
+        # Push data keeps the event name the mobile apps switch on
+        self.assertEqual(batches[0]['data']['event'], 'accepted')
+        (messages,) = sms.call_args.kwargs['args']
+        self.assertEqual(messages[0][0], '+15550001')
+        push.assert_called_once()
+        sms.assert_called_once()
+
+    def test_online_user_receives_notification_over_websocket(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(TripConsumer.as_asgi(), '/ws/trips/9/')
+            communicator.scope['user'] = self.online
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            summary = await sync_to_async(service.notify)([self.online.pk], 'trip.arrived', {'trip_id': 9})
+            self.assertEqual(summary['websocket'], 1)
+            message = await communicator.receive_json_from(timeout=1)
+            self.assertEqual(message['type'], 'notification')
+            self.assertEqual(message['event'], 'trip.arrived')
+
+            await communicator.disconnect()
+            self.assertEqual(presence.online_users([self.online.pk]), set())
+
+        async_to_sync(scenario)()
@@ -0,0 +1,42 @@
+import tempfile
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+
+from backend_project import task_spool
+from apps.notifications.tasks import send_push_task
+
+
+class TaskSpoolTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(TASK_SPOOL_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_broker_down_spools_instead_of_sending(self):
+        with patch.object(send_push_task, 'apply_async', side_effect=ConnectionError('down')), \
+                patch('apps.notifications.fcm.PushClient.send_multicast') as send:
+            from apps.notifications.push import send_push_async
+            result = send_push_async(['t1'], 'Title', 'Body')
+        self.assertEqual(result, {'queued': False, 'spooled': True})
+        send.assert_not_called()
+        self.assertEqual(task_spool.pending(), 1)
+
+    def test_drain_republishes_and_keeps_failures(self):
+        for i in range(3):
+            task_spool.spool(send_push_task.name, [[f't{i}'], 'Title', 'Body', {}])
+
+        calls = []
+
+        def send_task(name, args=None, kwargs=None, **options):
+            if len(calls) == 2:
+                raise ConnectionError('down again')
+            calls.append((name, args))
+
+        with patch('celery.current_app.send_task', side_effect=send_task):
+            published, remaining = task_spool.drain()
+
+        self.assertEqual((published, remaining), (2, 1))
+        self.assertEqual(calls[0], (send_push_task.name, [['t0'], 'Title', 'Body', {}]))
+        self.assertEqual(task_spool.pending(), 1)
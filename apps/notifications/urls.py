@@ -1,13 +1,9 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import ErrorLogViewSet, get_recent_errors, log_frontend_error, cleanup_old_errors
-
-router = DefaultRouter()
-router.register(r'errors', ErrorLogViewSet, basename='error-log')
+from django.urls import path
+from .views import InboxListView, inbox_unread_count, inbox_mark_read
 
+# Error logging lives in apps.errors (/api/errors/)
 urlpatterns = [
-    path('', include(router.urls)),
-    path('errors/recent/', get_recent_errors, name='recent-errors'),
-    path('errors/log-frontend/', log_frontend_error, name='log-frontend-error'),
-    path('errors/cleanup/', cleanup_old_errors, name='cleanup-errors'),
+    path('inbox/', InboxListView.as_view(), name='notification-inbox'),
+    path('inbox/unread-count/', inbox_unread_count, name='notification-unread-count'),
+    path('inbox/read/', inbox_mark_read, name='notification-mark-read'),
 ]
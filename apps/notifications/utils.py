@@ -1,9 +1,10 @@
 """
 Utility functions for error logging
-Use these functions throughout the codebase to log errors to the database
+Use these functions throughout the codebase to log errors to the database.
+They record into the error log of apps.errors (buffered, grouped by fingerprint).
 """
 
-from apps.notifications.models import ErrorLog
+from apps.errors import pipeline
 import traceback
 import logging
 
@@ -40,23 +41,23 @@ def log_error(
         severity: Error severity (critical, high, medium, low)
     
     Returns:
-        ErrorLog instance
+        Dict of the recorded fields, including `id` and `fingerprint`
     """
     
     try:
-        error_log = ErrorLog.objects.create(
-            error_type=error_type,
-            title=title,
-            message=message,
-            status_code=status_code,
-            user=user,
-            endpoint=endpoint,
-            method=method,
-            traceback=traceback_str,
-            request_data=request_data,
-            response_data=response_data,
-            severity=severity,
-        )
+        error_log = pipeline.capture({
+            'error_type': error_type,
+            'title': title,
+            'message': message,
+            'status_code': status_code,
+            'user_email': getattr(user, 'email', None),
+            'endpoint': endpoint,
+            'method': method,
+            'traceback': traceback_str,
+            'request_data': request_data,
+            'response_data': response_data,
+            'severity': severity,
+        })
         logger.info(f"Error logged: {title} ({error_type})")
         return error_log
     except Exception as e:
@@ -90,7 +91,7 @@ def log_exception(
         response_data: Response payload
     
     Returns:
-        ErrorLog instance
+        Dict of the recorded fields, including `id` and `fingerprint`
     """
     
     tb_str = traceback.format_exc()
@@ -1,19 +1,49 @@
+import time
+import asyncio
+import urllib.parse
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from . import ws_metrics
+from .events import events_since
+from apps.notifications import presence
+
+# Close code sent to clients that stopped answering heartbeats
+IDLE_CLOSE_CODE = 4000
 
 
 class TripConsumer(AsyncJsonWebsocketConsumer):
     """WebSocket consumer for trip updates.
 
     Connect to: ws://.../ws/trips/<trip_id>/ or /ws/share/<token>/
+
+    The server sends `{"type": "heartbeat"}` every WS_HEARTBEAT_INTERVAL_SECONDS.
+    Any client message (e.g. `{"type": "pong"}`) counts as activity; sockets
+    silent for longer than WS_IDLE_TIMEOUT_SECONDS are closed and removed
+    from their group.
+
+    Trip events carry a `seq`. A reconnecting client passes `?last_seq=<n>`
+    (or sends `{"type": "resume", "last_seq": n}`) and receives only the
+    events it missed. If some of them are no longer retained the server
+    sends `{"type": "resync"}` and the client should re-fetch the trip.
+
+    Authenticated sockets also join `user_<id>` and mark the user online, so
+    the notification service delivers `{"type": "notification", ...}`
+    messages here instead of sending a push.
     """
 
+    group_name = None
+    trip_id = None
+    user_id = None
+    last_seq_sent = 0
+
     async def connect(self):
         # Determine group name from path
         path = self.scope.get('path', '')
         if path.startswith('/ws/trips/'):
-            trip_id = path.rstrip('/').split('/')[-1]
-            self.group_name = f'trip_{trip_id}'
+            self.trip_id = path.rstrip('/').split('/')[-1]
+            self.group_name = f'trip_{self.trip_id}'
         elif path.startswith('/ws/share/'):
             token = path.rstrip('/').split('/')[-1]
             self.group_name = f'share_{token}'
@@ -22,25 +52,99 @@ class TripConsumer(AsyncJsonWebsocketConsumer):
             return
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
+        user = self.scope.get('user')
+        if user is not None and user.is_authenticated:
+            self.user_id = user.pk
+            await self.channel_layer.group_add(presence.user_group(self.user_id), self.channel_name)
+            await sync_to_async(presence.mark_online, thread_sensitive=False)(self.user_id, self.channel_name)
         await self.accept()
+        self.last_seen = time.monotonic()
+        self.reaped = False
+        ws_metrics.socket_opened(self.group_name)
+        self.heartbeat_task = asyncio.ensure_future(self._heartbeat())
+
+        params = urllib.parse.parse_qs(self.scope.get('query_string', b'').decode())
+        if self.trip_id and 'last_seq' in params:
+            await self._replay(params['last_seq'][0])
 
     async def disconnect(self, close_code):
+        task = getattr(self, 'heartbeat_task', None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+        if not self.group_name:
+            return
         try:
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            if self.user_id is not None:
+                await self.channel_layer.group_discard(presence.user_group(self.user_id), self.channel_name)
+                await sync_to_async(presence.mark_offline, thread_sensitive=False)(self.user_id, self.channel_name)
+        except Exception:
+            pass
+        if task:
+            ws_metrics.socket_closed(self.group_name, reaped=self.reaped)
+
+    async def _heartbeat(self):
+        interval = getattr(settings, 'WS_HEARTBEAT_INTERVAL_SECONDS', 25)
+        idle_timeout = getattr(settings, 'WS_IDLE_TIMEOUT_SECONDS', 75)
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if time.monotonic() - self.last_seen > idle_timeout:
+                    self.reaped = True
+                    await self.close(code=IDLE_CLOSE_CODE)
+                    return
+                await self.send_json({'type': 'heartbeat', 'ts': int(time.time())})
+                # Re-adding refreshes the membership timestamp, so only channels
+                # that stopped heart-beating age out after WS_GROUP_EXPIRY_SECONDS.
+                await self.channel_layer.group_add(self.group_name, self.channel_name)
+                if self.user_id is not None:
+                    await self.channel_layer.group_add(presence.user_group(self.user_id), self.channel_name)
+                    await sync_to_async(presence.mark_online, thread_sensitive=False)(self.user_id, self.channel_name)
+        except asyncio.CancelledError:
+            pass
         except Exception:
+            # Socket already gone; disconnect() will clean up
             pass
 
+    async def _replay(self, last_seq):
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            return
+        events, complete = await sync_to_async(events_since, thread_sensitive=False)(self.trip_id, last_seq)
+        if not complete:
+            await self.send_json({'type': 'resync', 'trip_id': self.trip_id})
+        for event in events:
+            await self._send_event(event)
+        self.last_seq_sent = max(self.last_seq_sent, last_seq)
+
+    async def _send_event(self, data):
+        seq = data.get('seq')
+        if seq is not None:
+            # Skip events already delivered by a replay
+            if seq <= self.last_seq_sent:
+                return
+            self.last_seq_sent = seq
+        await self.send_json(data)
+
     async def receive_json(self, content, **kwargs):
+        self.last_seen = time.monotonic()
         # Clients may send pings or simple messages; echo back
         typ = content.get('type')
         if typ == 'ping':
             await self.send_json({'type': 'pong'})
-        # No other client messages handled here for now
+        elif typ == 'resume' and self.trip_id:
+            await self._replay(content.get('last_seq'))
+        # 'pong' replies to server heartbeats only need to refresh last_seen
 
-    async def trip.update(self, event):
+    async def trip_update(self, event):
         # Custom events from server use keys like 'event' and 'data'
-        await self.send_json(event.get('data', {}))
+        await self._send_event(event.get('data', {}))
 
     # Generic handler for messages
     async def send_update(self, event):
+        await self._send_event(event.get('data', {}))
+
+    async def notify(self, event):
+        # Per-user notifications from apps.notifications.service
         await self.send_json(event.get('data', {}))
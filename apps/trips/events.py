@@ -0,0 +1,157 @@
+"""
+Trip event stream with per-trip sequence numbers.
+
+Every state event broadcast to `trip_<id>` carries a monotonic `seq` and is
+appended to a bounded Redis stream (`trip:<id>:events`). A client that
+reconnects with `last_seq` gets only the events it missed instead of
+re-fetching the whole trip over HTTP.
+
+High-frequency events (driver location) are published with `durable=False`:
+they are broadcast without a `seq` and are never replayed, since only the
+latest position matters.
+
+When Redis is unavailable the stream falls back to an in-process buffer,
+which is enough for single-node deployments and tests. Its sequence carries
+on from the last seq this process saw in Redis for the trip, so clients that
+already have those events do not drop the fallback ones as duplicates.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from django.conf import settings
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Atomically assign the next sequence number and append the event.
+# Stream entry ids are `<seq>-0`, so XRANGE can start right after a client's last_seq.
+_APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], seq .. '-0', 'e', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return seq
+"""
+
+_local_lock = threading.Lock()
+# trip_id -> [last_seq, deque of (seq, payload)]
+_local_streams = {}
+# trip_id -> last seq seen in Redis; the least recently used are evicted beyond MAX_KNOWN_SEQS
+_known_seqs = OrderedDict()
+MAX_KNOWN_SEQS = 10000
+
+
+def _maxlen():
+    return getattr(settings, 'TRIP_EVENT_STREAM_MAXLEN', 200)
+
+
+def _ttl():
+    return getattr(settings, 'TRIP_EVENT_STREAM_TTL_SECONDS', 24 * 3600)
+
+
+def _seq_key(trip_id):
+    return f'trip:{trip_id}:seq'
+
+
+def _stream_key(trip_id):
+    return f'trip:{trip_id}:events'
+
+
+def _note_seq(trip_id, seq):
+    """Remember the latest seq Redis holds for a trip, to seed the local fallback."""
+    with _local_lock:
+        _known_seqs[trip_id] = max(seq, _known_seqs.pop(trip_id, 0))
+        if len(_known_seqs) > MAX_KNOWN_SEQS:
+            _known_seqs.popitem(last=False)
+
+
+def _append_local(trip_id, payload):
+    with _local_lock:
+        entry = _local_streams.get(trip_id)
+        if entry is None:
+            entry = _local_streams[trip_id] = [0, deque(maxlen=_maxlen())]
+        entry[0] = max(entry[0], _known_seqs.get(trip_id, 0)) + 1
+        entry[1].append((entry[0], payload))
+        return entry[0]
+
+
+def record_trip_event(trip_id, data):
+    """Assign the next sequence number to `data` and store it for replay.
+
+    Returns a copy of `data` with `seq` set.
+    """
+    payload = json.dumps(data, default=str)
+    seq = None
+    r = get_redis()
+    if r is not None:
+        try:
+            seq = int(r.eval(_APPEND_SCRIPT, 2, _seq_key(trip_id), _stream_key(trip_id), _maxlen(), payload, _ttl()))
+            _note_seq(str(trip_id), seq)
+        except Exception:
+            logger.warning('Trip event stream unavailable in Redis; using local buffer', exc_info=True)
+    if seq is None:
+        seq = _append_local(str(trip_id), payload)
+    event = dict(data)
+    event['seq'] = seq
+    return event
+
+
+def events_since(trip_id, last_seq):
+    """Return `(events, complete)` for events after `last_seq`.
+
+    `complete` is False when some missed events were already trimmed from the
+    stream; the client should then re-fetch the trip instead of relying on
+    the replay.
+    """
+    last_seq = int(last_seq or 0)
+    entries = None
+    r = get_redis()
+    if r is not None:
+        try:
+            raw = r.xrange(_stream_key(trip_id), min=f'{last_seq + 1}-0', max='+')
+            current = r.get(_seq_key(trip_id))
+            entries = []
+            for entry_id, fields in raw:
+                entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                value = fields.get(b'e', fields.get('e'))
+                entries.append((int(entry_id.split('-')[0]), value))
+            current = int(current) if current else 0
+            _note_seq(str(trip_id), current)
+        except Exception:
+            logger.warning('Trip event replay from Redis failed; using local buffer', exc_info=True)
+            entries = None
+    if entries is None:
+        with _local_lock:
+            entry = _local_streams.get(str(trip_id))
+            current = entry[0] if entry else 0
+            entries = [(s, p) for s, p in (entry[1] if entry else ()) if s > last_seq]
+
+    events = []
+    for seq, payload in entries:
+        event = json.loads(payload)
+        event['seq'] = seq
+        events.append(event)
+    # A last_seq ahead of the stream means it was reset (e.g. expired); treat as a gap
+    complete = last_seq <= current and len(events) >= current - last_seq
+    return events, complete
+
+
+def publish_trip_event(trip_id, data, durable=True):
+    """Broadcast an event to the `trip_<id>` group.
+
+    Durable events get a sequence number and are kept for replay. Returns the
+    event as sent.
+    """
+    event = record_trip_event(trip_id, data) if durable else dict(data)
+    try:
+        from channels.layers import get_channel_layer
+        from asgiref.sync import async_to_sync
+        layer = get_channel_layer()
+        async_to_sync(layer.group_send)(
+            f'trip_{trip_id}',
+            {'type': 'send_update', 'data': event}
+        )
+    except Exception:
+        logger.warning('Failed to broadcast trip event %s for trip %s', data.get('event'), trip_id, exc_info=True)
+    return event
@@ -0,0 +1,52 @@
+import time
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.test import SimpleTestCase
+
+from backend_project.channel_layers import BoundedInMemoryChannelLayer
+
+
+class BoundedInMemoryChannelLayerTests(SimpleTestCase):
+    def test_group_send_reaches_every_member(self):
+        layer = BoundedInMemoryChannelLayer()
+
+        async def scenario():
+            a = await layer.new_channel()
+            b = await layer.new_channel()
+            await layer.group_add('trip_1', a)
+            await layer.group_add('trip_1', b)
+            await layer.group_send('trip_1', {'type': 'send_update', 'data': {'event': 'accepted'}})
+            return await layer.receive(a), await layer.receive(b)
+
+        first, second = async_to_sync(scenario)()
+        self.assertEqual(first['data']['event'], 'accepted')
+        self.assertEqual(second['data']['event'], 'accepted')
+
+    def test_queue_is_bounded(self):
+        layer = BoundedInMemoryChannelLayer(capacity=2)
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.send(channel, {'type': 'x'})
+            await layer.send(channel, {'type': 'x'})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {'type': 'x'})
+            # group_send drops silently for full members
+            await layer.group_add('g', channel)
+            await layer.group_send('g', {'type': 'x'})
+
+        async_to_sync(scenario)()
+
+    def test_stale_group_members_expire(self):
+        layer = BoundedInMemoryChannelLayer(group_expiry=60)
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add('trip_2', channel)
+            layer.groups['trip_2'][channel] = time.time() - 120
+            await layer.group_send('trip_2', {'type': 'send_update'})
+            return channel
+
+        channel = async_to_sync(scenario)()
+        self.assertNotIn('trip_2', layer.groups)
+        self.assertFalse(layer.channels.get(channel) and layer.channels[channel].messages)
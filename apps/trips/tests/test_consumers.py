@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock, patch
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, override_settings
+
+from apps.trips import ws_metrics
+from apps.trips.consumers import TripConsumer, IDLE_CLOSE_CODE
+from apps.trips.events import record_trip_event, events_since
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    WS_HEARTBEAT_INTERVAL_SECONDS=0.05,
+    WS_IDLE_TIMEOUT_SECONDS=0.2,
+)
+class TripConsumerHeartbeatTests(TestCase):
+    def test_heartbeat_then_idle_socket_is_reaped(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(TripConsumer.as_asgi(), '/ws/trips/7/')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            self.assertEqual(ws_metrics.snapshot()['groups'].get('trip_7'), 1)
+
+            message = await communicator.receive_json_from(timeout=1)
+            self.assertEqual(message['type'], 'heartbeat')
+
+            # Stay silent past the idle timeout: the server closes the socket
+            while True:
+                output = await communicator.receive_output(timeout=1)
+                if output['type'] == 'websocket.close':
+                    break
+            self.assertEqual(output['code'], IDLE_CLOSE_CODE)
+            await communicator.disconnect()
+            self.assertNotIn('trip_7', ws_metrics.snapshot()['groups'])
+
+        async_to_sync(scenario)()
+
+    def test_client_pong_keeps_socket_alive(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(TripConsumer.as_asgi(), '/ws/trips/8/')
+            await communicator.connect()
+            for _ in range(6):
+                message = await communicator.receive_json_from(timeout=1)
+                self.assertEqual(message['type'], 'heartbeat')
+                await communicator.send_json_to({'type': 'pong'})
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    REDIS_URL=None,
+    TRIP_EVENT_STREAM_MAXLEN=3,
+)
+class TripEventReplayTests(TestCase):
+    def test_reconnect_replays_only_missed_events(self):
+        for n in range(3):
+            record_trip_event(501, {'event': 'update', 'n': n})
+
+        async def scenario():
+            communicator = WebsocketCommunicator(TripConsumer.as_asgi(), '/ws/trips/501/?last_seq=1')
+            await communicator.connect()
+            first = await communicator.receive_json_from(timeout=1)
+            second = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return first, second
+
+        first, second = async_to_sync(scenario)()
+        self.assertEqual([first['seq'], second['seq']], [2, 3])
+        self.assertEqual(second['n'], 2)
+
+    def test_trimmed_events_report_incomplete(self):
+        for n in range(5):
+            record_trip_event(502, {'event': 'update', 'n': n})
+        events, complete = events_since(502, 0)
+        self.assertFalse(complete)
+        self.assertEqual([e['seq'] for e in events], [3, 4, 5])
+        events, complete = events_since(502, 3)
+        self.assertTrue(complete)
+
+    def test_local_fallback_continues_the_redis_sequence(self):
+        redis = MagicMock()
+        redis.eval.return_value = 7
+        with patch('apps.trips.events.get_redis', return_value=redis):
+            self.assertEqual(record_trip_event(503, {'event': 'update'})['seq'], 7)
+            redis.eval.side_effect = ConnectionError('redis down')
+            # Clients at seq 7 would drop a fallback event numbered 1 as a duplicate
+            self.assertEqual(record_trip_event(503, {'event': 'update'})['seq'], 8)
+            self.assertEqual(record_trip_event(503, {'event': 'update'})['seq'], 9)
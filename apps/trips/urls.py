@@ -2,7 +2,8 @@ from django.urls import path
 from .views import (
     TripCreateView, TripDetailView, TripListView, 
     trip_action, driver_location_update, driver_logout,
-    DriverLocationListView, estimate_fare, create_payment, paystack_webhook
+    DriverLocationListView, estimate_fare, create_payment, paystack_webhook,
+    websocket_metrics,
 )
 from .views import reassign_trip
 from .share_views import share_trip
@@ -21,4 +22,5 @@ urlpatterns = [
     path('locations/', DriverLocationListView.as_view(), name='driver_locations_list'),  # Admin list
     path('logout/', driver_logout, name='driver_logout'),
     path('share/<str:token>/', share_trip, name='share_trip'),
+    path('ws/metrics/', websocket_metrics, name='websocket_metrics'),  # Admin
 ]
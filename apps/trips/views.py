@@ -8,6 +8,8 @@ from .serializers import (
     PaymentSerializer,
 )
 from .models import Payment
+from .events import publish_trip_event
+from apps.notifications.service import notify
 from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth import get_user_model
 
@@ -34,34 +36,20 @@ class TripCreateView(generics.CreateAPIView):
         # After creating the trip, find the nearest drivers and notify them
         try:
             from .utils import get_nearby_drivers
-            from apps.notifications.push import send_push_async as send_push
 
             origin_lat = getattr(trip, 'origin_lat', None)
             origin_lng = getattr(trip, 'origin_lng', None)
             if origin_lat is not None and origin_lng is not None:
                 drivers = get_nearby_drivers(origin_lat, origin_lng, radius_km=5.0, limit=20)
-                # Collect device tokens for drivers
-                for d in drivers:
-                    try:
-                        tokens = [dev.token for dev in getattr(d, 'devices').all() if dev.token]
-                        if not tokens:
-                            continue
-                        title = 'New ride request nearby'
-                        body = f'Pickup at {trip.origin_address or "your area"}. Tap to accept.'
-                        data = {
-                            'type': 'new_trip',
-                            'trip_id': str(trip.pk),
-                            'origin_lat': str(origin_lat),
-                            'origin_lng': str(origin_lng),
-                        }
-                        try:
-                            send_push(tokens, title, body, data=data)
-                        except Exception:
-                            from apps.notifications.push import _send_immediate
-                            _send_immediate(tokens, title, body, data)
-                    except Exception:
-                        # Don't fail trip creation if notifications fail
-                        pass
+                # One batched notification for all nearby drivers
+                if drivers:
+                    notify([d.pk for d in drivers], 'trip.new_request', {
+                        'type': 'new_trip',
+                        'trip_id': trip.pk,
+                        'origin_address': trip.origin_address or 'your area',
+                        'origin_lat': origin_lat,
+                        'origin_lng': origin_lng,
+                    })
         except Exception:
             # Do not block trip creation if notifications fail
             import logging
@@ -135,34 +123,10 @@ def trip_action(request, pk):
             return Response({'detail': 'Only riders can accept trips'}, status=status.HTTP_403_FORBIDDEN)
         trip.accept(request.user)
         # Broadcast accept event to trip group and notify customer (if channels configured)
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                f'trip_{trip.pk}',
-                {
-                    'type': 'send_update',
-                    'data': {'event': 'accepted', 'trip_id': trip.pk, 'rider_id': request.user.id}
-                }
-            )
-            # send push to customer devices
-            try:
-                from apps.notifications.push import send_push_async as send_push
-                customer = trip.customer
-                tokens = [dev.token for dev in getattr(customer, 'devices').all() if dev.token]
-                if tokens:
-                    title = 'Driver accepted your ride'
-                    body = f'{request.user.first_name or "Driver"} is on the way. ETA will be available shortly.'
-                    try:
-                        send_push(tokens, title, body, data={'event': 'accepted', 'trip_id': str(trip.pk)})
-                    except Exception:
-                        from apps.notifications.push import _send_immediate
-                        _send_immediate(tokens, title, body, data={'event': 'accepted', 'trip_id': str(trip.pk)})
-            except Exception:
-                pass
-        except Exception:
-            pass
+        publish_trip_event(trip.pk, {'event': 'accepted', 'trip_id': trip.pk, 'rider_id': request.user.id})
+        notify([trip.customer_id], 'trip.accepted', {
+            'trip_id': trip.pk, 'driver_name': request.user.first_name or 'Driver',
+        })
         return Response(TripSerializer(trip).data)
 
     if action == 'start':
@@ -172,36 +136,12 @@ def trip_action(request, pk):
         if trip.rider_id and trip.rider_id != request.user.id:
             return Response({'detail': 'Only assigned rider can start this trip'}, status=status.HTTP_403_FORBIDDEN)
         trip.start()
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                f'trip_{trip.pk}',
-                {
-                    'type': 'send_update',
-                    'data': {'event': 'started', 'trip_id': trip.pk, 'started_at': str(trip.started_at)}
-                }
-            )
-            # notify customer via push
-            try:
-                from apps.notifications.push import send_push_async as send_push
-                customer = trip.customer
-                tokens = [dev.token for dev in getattr(customer, 'devices').all() if dev.token]
-                if tokens:
-                    title = 'Your ride has started'
-                    body = f'{request.user.first_name or "Driver"} has started the trip.'
-                    # include share token for public viewing
-                    data = {'event': 'started', 'trip_id': str(trip.pk), 'share_token': trip.share_token}
-                    try:
-                        send_push(tokens, title, body, data=data)
-                    except Exception:
-                        from apps.notifications.push import _send_immediate
-                        _send_immediate(tokens, title, body, data=data)
-            except Exception:
-                pass
-        except Exception:
-            pass
+        publish_trip_event(trip.pk, {'event': 'started', 'trip_id': trip.pk, 'started_at': str(trip.started_at)})
+        # notify customer; include share token for public viewing
+        notify([trip.customer_id], 'trip.started', {
+            'trip_id': trip.pk, 'driver_name': request.user.first_name or 'Driver',
+            'share_token': trip.share_token,
+        })
         return Response(TripSerializer(trip).data)
 
     if action == 'end':
@@ -210,37 +150,16 @@ def trip_action(request, pk):
         if trip.rider_id and trip.rider_id != request.user.id:
             return Response({'detail': 'Only assigned rider can end this trip'}, status=status.HTTP_403_FORBIDDEN)
         trip.end()
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                f'trip_{trip.pk}',
-                {
-                    'type': 'send_update',
-                    'data': {'event': 'ended', 'trip_id': trip.pk, 'ended_at': str(trip.ended_at)}
-                }
-            )
-            try:
-                from apps.notifications.push import send_push_async as send_push
-                customer = trip.customer
-                tokens = [dev.token for dev in getattr(customer, 'devices').all() if dev.token]
-                if tokens:
-                    title = 'Ride completed'
-                    body = f'Thank you for riding. Your receipt is available in the app.'
-                    try:
-                        send_push(tokens, title, body, data={'event': 'ended', 'trip_id': str(trip.pk)})
-                    except Exception:
-                        from apps.notifications.push import _send_immediate
-                        _send_immediate(tokens, title, body, data={'event': 'ended', 'trip_id': str(trip.pk)})
-            except Exception:
-                pass
-        except Exception:
-            pass
+        publish_trip_event(trip.pk, {'event': 'ended', 'trip_id': trip.pk, 'ended_at': str(trip.ended_at)})
+        notify([trip.customer_id], 'trip.ended', {'trip_id': trip.pk})
         return Response(TripSerializer(trip).data)
 
     if action == 'cancel':
         trip.cancel(by_user=request.user)
+        publish_trip_event(trip.pk, {'event': 'canceled', 'trip_id': trip.pk, 'canceled_by': request.user.id})
+        # Tell the other party
+        others = [uid for uid in (trip.customer_id, trip.rider_id) if uid and uid != request.user.id]
+        notify(others, 'trip.canceled', {'trip_id': trip.pk, 'canceled_by': request.user.id})
         return Response(TripSerializer(trip).data)
 
     if action == 'arrived':
@@ -249,34 +168,10 @@ def trip_action(request, pk):
         if trip.rider_id and trip.rider_id != request.user.id:
             return Response({'detail': 'Only assigned rider can mark arrival'}, status=status.HTTP_403_FORBIDDEN)
         trip.arrived()
-        try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                f'trip_{trip.pk}',
-                {
-                    'type': 'send_update',
-                    'data': {'event': 'arrived', 'trip_id': trip.pk, 'arrived_at': str(trip.arrived_at)}
-                }
-            )
-            # notify customer via push
-            try:
-                from apps.notifications.push import send_push_async as send_push
-                customer = trip.customer
-                tokens = [dev.token for dev in getattr(customer, 'devices').all() if dev.token]
-                if tokens:
-                    title = 'Driver has arrived'
-                    body = f'{request.user.first_name or "Driver"} has arrived at pickup.'
-                    try:
-                        send_push(tokens, title, body, data={'event': 'arrived', 'trip_id': str(trip.pk)})
-                    except Exception:
-                        from apps.notifications.push import _send_immediate
-                        _send_immediate(tokens, title, body, data={'event': 'arrived', 'trip_id': str(trip.pk)})
-            except Exception:
-                pass
-        except Exception:
-            pass
+        publish_trip_event(trip.pk, {'event': 'arrived', 'trip_id': trip.pk, 'arrived_at': str(trip.arrived_at)})
+        notify([trip.customer_id], 'trip.arrived', {
+            'trip_id': trip.pk, 'driver_name': request.user.first_name or 'Driver',
+        })
         return Response(TripSerializer(trip).data)
 
     return Response({'detail': 'action not handled'}, status=status.HTTP_400_BAD_REQUEST)
@@ -318,20 +213,16 @@ def driver_location_update(request):
     except Exception:
         pass
 
-    # Broadcast to any trip group the driver is currently assigned to and live
+    # Broadcast to any trip group the driver is currently assigned to and live.
+    # Location updates are not replayed on reconnect; only the latest matters.
     try:
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        layer = get_channel_layer()
         # Find an active trip for this driver
         active = Trip.objects.filter(rider=user, status=Trip.STATUS_IN_PROGRESS).order_by('-started_at').first()
         if active:
-            async_to_sync(layer.group_send)(
-                f'trip_{active.pk}',
-                {
-                    'type': 'send_update',
-                    'data': {'event': 'location', 'trip_id': active.pk, 'lat': data['lat'], 'lng': data['lng'], 'speed': data.get('speed')}
-                }
+            publish_trip_event(
+                active.pk,
+                {'event': 'location', 'trip_id': active.pk, 'lat': data['lat'], 'lng': data['lng'], 'speed': data.get('speed')},
+                durable=False,
             )
     except Exception:
         pass
@@ -364,6 +255,14 @@ def driver_logout(request):
     return Response({'detail': 'ok'})
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def websocket_metrics(request):
+    """Live WebSocket sockets per group held by this worker process (admin only)."""
+    from .ws_metrics import snapshot
+    return Response(snapshot())
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def estimate_fare(request):
@@ -0,0 +1,42 @@
+"""
+In-process counters for live WebSocket connections.
+
+Each ASGI worker keeps its own counts; `snapshot()` reports what the current
+process is holding, which is what an operator needs to spot groups that keep
+growing because dead sockets are not being reaped.
+"""
+import os
+import threading
+from collections import Counter
+
+_lock = threading.Lock()
+_sockets_by_group = Counter()
+_reaped_total = 0
+
+
+def socket_opened(group_name):
+    with _lock:
+        _sockets_by_group[group_name] += 1
+
+
+def socket_closed(group_name, reaped=False):
+    global _reaped_total
+    with _lock:
+        _sockets_by_group[group_name] -= 1
+        if _sockets_by_group[group_name] <= 0:
+            del _sockets_by_group[group_name]
+        if reaped:
+            _reaped_total += 1
+
+
+def snapshot():
+    """Return live socket counts per group for this process."""
+    with _lock:
+        groups = dict(_sockets_by_group)
+        reaped = _reaped_total
+    return {
+        'pid': os.getpid(),
+        'total_sockets': sum(groups.values()),
+        'reaped_idle_sockets': reaped,
+        'groups': groups,
+    }
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from .models import CustomerProfile, RiderProfile, OTP, Device
+from .models import CustomerProfile, RiderProfile, OTP, Device, EmailSendLog
 
 User = get_user_model()
 class RiderProfileInline(admin.StackedInline):
@@ -33,3 +33,10 @@ class OTPAdmin(admin.ModelAdmin):
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
     list_display = ('user', 'platform', 'created_at')
+
+@admin.register(EmailSendLog)
+class EmailSendLogAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'to_email', 'subject', 'success', 'otp_id', 'otp_ref')
+    list_filter = ('success',)
+    # Exact match so the (to_email, created_at) index is used
+    search_fields = ('=to_email', '=otp_ref')
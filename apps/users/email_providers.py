@@ -0,0 +1,312 @@
+"""
+Email providers with failover, circuit breakers and hedged sends.
+
+Providers are built once per process from settings (EMAIL_PROVIDERS, in
+order of preference) and reused:
+
+- `emailjs`: EmailJS REST API over a pooled HTTP session, with a timeout;
+- `smtp`: the configured Django EMAIL_BACKEND (pooled SMTP in production);
+- `console`: logs the message only, for local development.
+
+`send()` tries providers in order and fails over on error. Each provider has
+a circuit breaker: after EMAIL_BREAKER_FAILURES consecutive failures it is
+skipped for EMAIL_BREAKER_RESET_SECONDS, then one trial send decides whether
+it is closed again. Send latency per provider is tracked (see `stats()`).
+
+With `hedge=True` (used for OTP codes), if the first provider has not
+answered within EMAIL_HEDGE_AFTER_SECONDS the next one is started as well
+and the first success wins, so one slow provider cannot hold up delivery.
+A hedged send can deliver the same message twice; that is acceptable for
+OTP codes and is why hedging is opt-in.
+"""
+import time
+import logging
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+SendResult = namedtuple('SendResult', 'success provider result latency')
+
+
+class ProviderError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> one half-open trial."""
+
+    def __init__(self, failures, reset_seconds):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            self._trial = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Latencies of the last `size` sends."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            values = sorted(self._samples)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+class Provider:
+    name = None
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            getattr(settings, 'EMAIL_BREAKER_FAILURES', 5),
+            getattr(settings, 'EMAIL_BREAKER_RESET_SECONDS', 30),
+        )
+        self.latency = LatencyTracker()
+
+    @property
+    def configured(self):
+        return True
+
+    def send(self, to_email, subject, message, template_id=None, template_vars=None, from_email=None):
+        """Send one message. Returns a short result string; raises on failure."""
+        raise NotImplementedError
+
+
+class EmailJSProvider(Provider):
+    name = 'emailjs'
+    URL = 'https://api.emailjs.com/api/v1.0/email/send'
+
+    def __init__(self):
+        super().__init__()
+        import requests
+        self.service_id = getattr(settings, 'EMAILJS_SERVICE_ID', '')
+        self.template_id = getattr(settings, 'EMAILJS_TEMPLATE_ID', '')
+        self.user_id = getattr(settings, 'EMAILJS_PUBLIC_KEY', '')
+        self.private_key = getattr(settings, 'EMAILJS_PRIVATE_KEY', '')
+        self.timeout = getattr(settings, 'EMAILJS_TIMEOUT_SECONDS', 5)
+        # Keep-alive connections to the API across sends
+        self.session = requests.Session()
+
+    @property
+    def configured(self):
+        return bool(self.service_id and self.template_id and self.user_id)
+
+    def send(self, to_email, subject, message, template_id=None, template_vars=None, from_email=None):
+        params = {'to_email': to_email, 'subject': subject, 'message': message}
+        # Templates show the code as {{otp_code}}; extract it from "...is: 123456"
+        if 'is: ' in message:
+            params['otp_code'] = message.split('is: ')[1].split('\n')[0]
+        params.update(template_vars or {})
+        response = self.session.post(self.URL, json={
+            'service_id': self.service_id,
+            'template_id': template_id or self.template_id,
+            'user_id': self.user_id,
+            'accessToken': self.private_key,
+            'template_params': params,
+        }, timeout=self.timeout)
+        if response.status_code != 200:
+            raise ProviderError(f'EmailJS failed: {response.text}')
+        return 'OK'
+
+
+class SMTPProvider(Provider):
+    name = 'smtp'
+
+    def send(self, to_email, subject, message, template_id=None, template_vars=None, from_email=None):
+        from django.core.mail import EmailMessage
+        sent = EmailMessage(subject=subject, body=message, from_email=from_email, to=[to_email]).send(fail_silently=False)
+        if not sent:
+            raise ProviderError('SMTP backend sent 0 messages')
+        return f'sent ({int(sent)} recipients)'
+
+
+class ConsoleProvider(Provider):
+    name = 'console'
+
+    def send(self, to_email, subject, message, template_id=None, template_vars=None, from_email=None):
+        logger.info('Email to %s: %s\n%s', to_email, subject, message)
+        return 'logged'
+
+
+PROVIDER_CLASSES = {cls.name: cls for cls in (EmailJSProvider, SMTPProvider, ConsoleProvider)}
+
+_lock = threading.Lock()
+_providers = None
+_executor = None
+
+
+def get_providers():
+    """Configured providers in order of preference, built once per process."""
+    global _providers
+    if _providers is None:
+        with _lock:
+            if _providers is None:
+                built = []
+                for name in getattr(settings, 'EMAIL_PROVIDERS', ['emailjs', 'smtp']):
+                    cls = PROVIDER_CLASSES.get(name)
+                    if cls is None:
+                        logger.error('Unknown email provider %r in EMAIL_PROVIDERS', name)
+                        continue
+                    provider = cls()
+                    if provider.configured:
+                        built.append(provider)
+                _providers = built or [ConsoleProvider()]
+    return _providers
+
+
+def get_provider(name):
+    return next((p for p in get_providers() if p.name == name), None)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _providers
+    if setting.startswith('EMAIL') or setting.startswith('DEFAULT_FROM_EMAIL'):
+        _providers = None
+
+
+def _executor_pool():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='email-hedge')
+    return _executor
+
+
+def _attempt(provider, args):
+    started = time.monotonic()
+    try:
+        result = provider.send(*args)
+    except Exception as e:
+        elapsed = time.monotonic() - started
+        provider.breaker.record(False)
+        provider.latency.add(elapsed)
+        logger.warning('Email provider %s failed for %s: %s', provider.name, args[0], e)
+        return SendResult(False, provider.name, str(e), elapsed)
+    elapsed = time.monotonic() - started
+    provider.breaker.record(True)
+    provider.latency.add(elapsed)
+    return SendResult(True, provider.name, result, elapsed)
+
+
+def send(to_email, subject, message, template_id=None, template_vars=None, from_email=None, hedge=False):
+    """Send through the first healthy provider, failing over in order. Returns a SendResult."""
+    args = (to_email, subject, message, template_id, template_vars, from_email)
+    providers = get_providers()
+    if hedge and len(providers) > 1:
+        return _send_hedged(list(providers), args)
+
+    failures = []
+    # Lazily, so a half-open breaker's trial is only taken when the provider is used
+    for provider in (p for p in providers if p.breaker.allow()):
+        result = _attempt(provider, args)
+        if result.success:
+            return result
+        failures.append(f'{provider.name}: {result.result}')
+    return SendResult(False, None, '; '.join(failures) or _ALL_OPEN, 0.0)
+
+
+_ALL_OPEN = 'All email providers are unavailable (circuit open)'
+
+
+def _next_available(candidates):
+    """Pop candidates until one's breaker admits a send; None if none does.
+
+    Only called when the provider is about to be used: admitting a half-open
+    breaker takes its single trial, which is released by recording the result.
+    """
+    while candidates:
+        provider = candidates.pop(0)
+        if provider.breaker.allow():
+            return provider
+    return None
+
+
+def _send_hedged(candidates, args):
+    hedge_after = getattr(settings, 'EMAIL_HEDGE_AFTER_SECONDS', 2.0)
+    deadline = time.monotonic() + getattr(settings, 'EMAIL_SEND_TIMEOUT_SECONDS', 15)
+    pool = _executor_pool()
+    first = _next_available(candidates)
+    if first is None:
+        return SendResult(False, None, _ALL_OPEN, 0.0)
+    running = {pool.submit(_attempt, first, args)}
+    failures = []
+    while running:
+        # Wait for an answer, but no longer than the hedge budget while a backup is left
+        timeout = max(0.0, deadline - time.monotonic())
+        if candidates:
+            timeout = min(timeout, hedge_after)
+        done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if result.success:
+                return result
+            failures.append(f'{result.provider}: {result.result}')
+        if candidates and (not done or not running):
+            # The running send is slow (or failed): start the next provider
+            backup = _next_available(candidates)
+            if backup is not None:
+                running.add(pool.submit(_attempt, backup, args))
+        elif not done and time.monotonic() >= deadline:
+            break
+    if running:
+        failures.append('timed out')
+    return SendResult(False, None, '; '.join(failures), 0.0)
+
+
+def stats():
+    """Breaker state and latency percentiles per provider."""
+    return {
+        p.name: {
+            'state': p.breaker.state,
+            'failures': p.breaker.failures,
+            'p50': p.latency.percentile(50),
+            'p99': p.latency.percentile(99),
+        }
+        for p in get_providers()
+    }
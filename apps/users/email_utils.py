@@ -1,237 +1,149 @@
 import logging
 from django.core.mail import get_connection, EmailMessage
-import requests
-import os
-import json
+
+from . import email_providers, send_log
 
 logger = logging.getLogger(__name__)
 
-LOG_PATH = 'logs/email_send.log'
 
-def _ensure_log_dir():
-    import os
-    d = os.path.dirname(LOG_PATH)
-    if d and not os.path.exists(d):
-        os.makedirs(d, exist_ok=True)
+OTP_EMAIL_SUBJECT = "Your AAfri Ride Verification Code"
 
-def send_email_with_logging(to_email: str, subject: str, message: str, from_email: str = 'support@aafriride.com', otp=None, emailjs_template_id: str = None, template_vars: dict = None):
-    """Send an email using Django email backend and log the attempt to a file.
 
-    If `otp` is provided (either an `OTP` instance or an OTP id), this function
-    will attempt to persist `sent_at`, `send_result` and `send_error` to the DB
-    for that OTP record.
+def otp_email_message(code):
+    return f"Your verification code is: {code}\n\nThis code is valid for 5 minutes.\n\nIf you didn't request this code, please ignore this email."
 
-    Returns a dict: {"success": bool, "result": int_or_error}
-    """
-    _ensure_log_dir()
-    timestamp = None
+
+def _otp_pk(otp):
+    """OTP id for the send log, from an OTP instance or an id."""
+    if otp is None:
+        return None
+    return getattr(otp, 'pk', otp)
+
+
+def _persist_otp_result(otp, success, error=''):
+    """Store the outcome on an OTP row (instance or id), if one was given."""
+    if otp is None:
+        return
     try:
         from django.utils import timezone
-        timestamp = timezone.now().isoformat()
+        from .models import OTP
+        row = otp if hasattr(otp, 'save') else OTP.objects.filter(pk=otp).first()
+        if row is None:
+            return
+        row.sent_at = timezone.now()
+        row.send_result = 1 if success else 0
+        row.send_error = '' if success else str(error)
+        row.save(update_fields=['sent_at', 'send_result', 'send_error'])
     except Exception:
-        import datetime
-        timestamp = datetime.datetime.utcnow().isoformat()
+        logger.exception('Failed to persist OTP send result to DB')
+
+
+def send_email_with_logging(to_email: str, subject: str, message: str, from_email: str = 'support@aafriride.com', otp=None, emailjs_template_id: str = None, template_vars: dict = None, otp_ref: str = None, hedge: bool = False):
+    """Send an email through the configured providers and record the attempt in the send log.
+
+    Providers (EmailJS, SMTP, console) are tried in EMAIL_PROVIDERS order with
+    failover; `hedge=True` also starts the next provider when the first one is
+    slow (see apps.users.email_providers).
+
+    If `otp` is provided (either an `OTP` instance or an OTP id), this function
+    will attempt to persist `sent_at`, `send_result` and `send_error` to the DB
+    for that OTP record. `otp_ref` (apps.users.otp_store) is recorded in the
+    send log for look-ups.
+
+    Returns a dict: {"success": bool, "result": str, "provider": str}
+    """
+    result = email_providers.send(
+        to_email, subject, message,
+        template_id=emailjs_template_id, template_vars=template_vars,
+        from_email=from_email, hedge=hedge,
+    )
+    send_log.record(to_email, subject, result.success, result.result, otp_id=_otp_pk(otp), otp_ref=otp_ref)
+    _persist_otp_result(otp, result.success, result.result)
+    if result.success:
+        logger.info(f"Email sent to {to_email} via {result.provider} in {result.latency * 1000:.0f}ms")
+        return {"success": True, "result": result.result, "raw_result": 1, "provider": result.provider}
+    logger.error(f"Failed to send email to {to_email}: {result.result}")
+    return {"success": False, "result": result.result, "provider": result.provider}
 
-    log_line = f"{timestamp} | TO={to_email} | SUBJECT={subject} | "
-    
-    # Try sending (no retries to prevent Gunicorn timeout)
-    last_error = None
-    try:
-        # Check if we should use EmailJS (via environment variable)
-        import os
-        import requests
-        
-        emailjs_service_id = os.getenv('EMAILJS_SERVICE_ID')
-        # Allow caller to override the template id per-message, otherwise fall back to env var
-        emailjs_template_id = emailjs_template_id or os.getenv('EMAILJS_TEMPLATE_ID')
-        # Historically some environments use EMAILJS_USER_ID while others use
-        # EMAILJS_PUBLIC_KEY for the public key; accept either for compatibility.
-        emailjs_user_id = os.getenv('EMAILJS_USER_ID') or os.getenv('EMAILJS_PUBLIC_KEY')
-        emailjs_private_key = os.getenv('EMAILJS_PRIVATE_KEY') # Private Key
-        
-        if emailjs_service_id and emailjs_template_id and emailjs_user_id:
-            # Use EmailJS API
-            logger.info(f"Sending email via EmailJS to {to_email}")
-            
-            # Build template params and allow caller-provided template_vars to override/add
-            tpl_params = {
-                "to_email": to_email,
-                "subject": subject,
-                "message": message,
-            }
-            # Extract an OTP from the message if present
-            try:
-                if "is: " in message:
-                    tpl_params["otp_code"] = message.split("is: ")[1].split("\n")[0]
-            except Exception:
-                pass
-
-            if template_vars and isinstance(template_vars, dict):
-                tpl_params.update(template_vars)
-
-            payload = {
-                "service_id": emailjs_service_id,
-                "template_id": emailjs_template_id,
-                "user_id": emailjs_user_id,
-                "accessToken": emailjs_private_key,
-                "template_params": tpl_params,
-            }
-            
-            response = requests.post(
-                "https://api.emailjs.com/api/v1.0/email/send",
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                result = 1
-                result_text = "OK"
-                logger.info(f"EmailJS sent successfully to {to_email}")
-            else:
-                raise Exception(f"EmailJS failed: {response.text}")
-                
-        else:
-            # Fallback to standard Django SMTP
-            connection = get_connection()
-            email = EmailMessage(subject=subject, body=message, from_email=from_email, to=[to_email], connection=connection)
-            result = email.send(fail_silently=False)
-            result_text = f"sent ({int(result)} recipients)"
-            
-        # Normalize returned result into a readable string and keep raw result as well
-        try:
-            raw_result = int(result) if isinstance(result, (int, float, str)) and str(result).isdigit() else result
-        except Exception:
-            raw_result = result
-        # ensure result_text exists (EmailJS branch sets it earlier)
-        if 'result_text' not in locals():
-            if isinstance(raw_result, int):
-                result_text = f"sent ({raw_result} recipients)"
-            else:
-                result_text = str(raw_result)
-
-        log_line += f"RESULT={result_text}\n"
-        with open(LOG_PATH, 'a', encoding='utf-8') as f:
-            f.write(log_line)
-        logger.info(f"Email sent to {to_email} (result={result_text})")
-
-        # Persist send result to DB if otp provided
-        if otp is not None:
-            try:
-                from django.utils import timezone as _tz
-                # Accept either OTP instance or numeric id
-                if hasattr(otp, 'save') and hasattr(otp, 'pk'):
-                    otp.sent_at = _tz.now()
-                    try:
-                        otp.send_result = int(raw_result) if isinstance(raw_result, int) else (int(raw_result) if isinstance(raw_result, str) and raw_result.isdigit() else 1)
-                    except Exception:
-                        otp.send_result = 1
-                    otp.send_error = ''
-                    otp.save(update_fields=['sent_at', 'send_result', 'send_error'])
-                else:
-                    from .models import OTP as _OTP
-                    o = _OTP.objects.filter(pk=otp).first()
-                    if o:
-                        o.sent_at = _tz.now()
-                        try:
-                            o.send_result = int(raw_result) if isinstance(raw_result, int) else (int(raw_result) if isinstance(raw_result, str) and raw_result.isdigit() else 1)
-                        except Exception:
-                            o.send_result = 1
-                        o.send_error = ''
-                        o.save(update_fields=['sent_at', 'send_result', 'send_error'])
-            except Exception:
-                logger.exception('Failed to persist OTP send result to DB')
-
-        # Return both a human-readable summary and the raw result for debugging
-        return {"success": True, "result": result_text, "raw_result": raw_result}
-        
-    except Exception as e:
-        last_error = e
-        logger.warning(f"Email attempt failed for {to_email}: {e}")
-    
-    # Attempt failed
-    if last_error:
-        log_line += f"ERROR={last_error} (all attempts failed)\n"
-        with open(LOG_PATH, 'a', encoding='utf-8') as f:
-            f.write(log_line)
-        logger.error(f"Failed to send email to {to_email} after 2 attempts: {last_error}", exc_info=True)
-        # Persist failure to DB if otp provided
-        if otp is not None:
-            try:
-                from django.utils import timezone as _tz
-                if hasattr(otp, 'save') and hasattr(otp, 'pk'):
-                    otp.sent_at = _tz.now()
-                    otp.send_result = 0
-                    otp.send_error = str(last_error)
-                    otp.save(update_fields=['sent_at', 'send_result', 'send_error'])
-                else:
-                    from .models import OTP as _OTP
-                    o = _OTP.objects.filter(pk=otp).first()
-                    if o:
-                        o.sent_at = _tz.now()
-                        o.send_result = 0
-                        o.send_error = str(last_error)
-                        o.save(update_fields=['sent_at', 'send_result', 'send_error'])
-            except Exception:
-                logger.exception('Failed to persist OTP send failure to DB')
-
-        return {"success": False, "result": str(last_error)}
 
 def send_email_via_emailjs(to_email, subject, message, otp=None, code=None):
     """
-    Send email using EmailJS REST API
+    Send email using EmailJS REST API (OTP template: passcode + validity)
     """
-    service_id = os.getenv('EMAILJS_SERVICE_ID')
-    template_id = os.getenv('EMAILJS_TEMPLATE_ID')
-    user_id = os.getenv('EMAILJS_PUBLIC_KEY') or os.getenv('EMAILJS_USER_ID')
-    private_key = os.getenv('EMAILJS_PRIVATE_KEY')
-
-    if not all([service_id, template_id, user_id, private_key]):
+    provider = email_providers.get_provider('emailjs')
+    if provider is None:
         logger.error("EmailJS configuration missing. Check environment variables.")
         return {"success": False, "result": "Missing EmailJS configuration"}
 
-    url = "https://api.emailjs.com/api/v1.0/email/send"
-    
-    from django.utils import timezone
-    import datetime
-    
-    # Prepare the data payload
-    payload = {
-        "service_id": service_id,
-        "template_id": template_id,
-        "user_id": user_id,
-        "accessToken": private_key,
-        "template_params": {
-            "to_email": to_email,
-            "subject": subject,
-            "message": message,
-            "passcode": code if code else (message.split("is: ")[1].split("\n")[0] if "is: " in message else ""),
-            "time": "5 Minutes"
-        }
-    }
-
+    passcode = code if code else (message.split("is: ")[1].split("\n")[0] if "is: " in message else "")
     try:
-        response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'})
-        
-        if response.status_code == 200 or response.text == 'OK':
-            logger.info(f"EmailJS sent to {to_email}")
-            
-            # Log to DB if OTP provided
-            if otp:
-                try:
-                    from django.utils import timezone
-                    if hasattr(otp, 'save'):
-                        otp.sent_at = timezone.now()
-                        otp.send_result = 1
-                        otp.save(update_fields=['sent_at', 'send_result'])
-                except Exception:
-                    pass
-            
-            return {"success": True, "result": "OK"}
-        else:
-            logger.error(f"EmailJS failed: {response.text}")
-            return {"success": False, "result": response.text}
-            
+        result = provider.send(to_email, subject, message, template_vars={"passcode": passcode, "time": "5 Minutes"})
     except Exception as e:
         logger.error(f"EmailJS error: {e}")
+        provider.breaker.record(False)
         return {"success": False, "result": str(e)}
+    provider.breaker.record(True)
+    logger.info(f"EmailJS sent to {to_email}")
+    _persist_otp_result(otp, True)
+    return {"success": True, "result": result}
+
+
+def _staff_emails():
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    emails = (
+        User.objects.filter(is_staff=True, is_active=True)
+        .exclude(email__isnull=True).exclude(email__exact='')
+        .values_list('email', flat=True)
+    )
+    return list(dict.fromkeys(e.lower() for e in emails))
+
+
+def send_admin_notification(subject: str, message: str, from_email: str = 'support@aafriride.com'):
+    """Send one message to the support address with every staff user in BCC.
+
+    One SMTP session and one message regardless of how many admins there are.
+    Returns a dict: {"success": bool, "result": str, "recipients": int}
+    """
+    from django.conf import settings
+    support = getattr(settings, 'SUPPORT_EMAIL', 'support@aafriride.com')
+    bcc = [e for e in _staff_emails() if e != support.lower()]
+    try:
+        with get_connection() as connection:
+            sent = EmailMessage(
+                subject=subject, body=message, from_email=from_email,
+                to=[support], bcc=bcc, connection=connection,
+            ).send(fail_silently=False)
+    except Exception as e:
+        send_log.record(support, subject, False, e)
+        logger.error(f"Failed to send admin notification '{subject}': {e}")
+        return {"success": False, "result": str(e), "recipients": 1 + len(bcc)}
+
+    send_log.record(support, subject, True, f"sent ({int(sent)} messages, {len(bcc)} bcc)")
+    logger.info(f"Admin notification '{subject}' sent to {support} and {len(bcc)} staff")
+    return {"success": True, "result": "OK", "recipients": 1 + len(bcc)}
+
+
+def queue_email(to_email, subject, message, emailjs_template_id=None, template_vars=None):
+    """Queue a transactional email on the email workers. Returns a short status line."""
+    from backend_project.task_spool import enqueue
+    from .tasks import send_templated_email_task
+    try:
+        enqueue(send_templated_email_task, (to_email, subject, message),
+                {'emailjs_template_id': emailjs_template_id, 'template_vars': template_vars})
+        return f"Email queued for {to_email}"
+    except Exception as e:
+        logger.exception(f"Could not queue email to {to_email}")
+        return f"Failed to queue email to {to_email}: {e}"
+
+
+def queue_admin_notification(subject, message):
+    """Queue one notification to support and all staff (see send_admin_notification)."""
+    from backend_project.task_spool import enqueue
+    from .tasks import send_admin_notification_task
+    try:
+        enqueue(send_admin_notification_task, (subject, message))
+        return "Admin notification queued"
+    except Exception as e:
+        logger.exception(f"Could not queue admin notification '{subject}'")
+        return f"Failed to queue admin notification: {e}"
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.users import otp_store
+
+
+class Command(BaseCommand):
+    help = 'Delete OTP rows older than OTP_RETENTION_SECONDS in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-seconds', type=int, default=None,
+                            help='Keep rows newer than this (default: OTP_RETENTION_SECONDS)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows deleted per statement (default: OTP_PURGE_BATCH_SIZE)')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        deleted = otp_store.purge_expired(
+            retention_seconds=options['retention_seconds'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully deleted {deleted} expired OTPs'
+            )
+        )
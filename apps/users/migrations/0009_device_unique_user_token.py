@@ -0,0 +1,36 @@
+"""
+Remove duplicate Device rows per (user, token), keeping the newest, then
+enforce uniqueness so re-registering a token cannot grow push fan-out.
+"""
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def dedupe_devices(apps, schema_editor):
+    Device = apps.get_model('users', 'Device')
+    duplicates = (
+        Device.objects.values('user_id', 'token')
+        .annotate(n=Count('id'), keep=Max('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        Device.objects.filter(user_id=row['user_id'], token=row['token']).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_add_disapproval_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_devices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='device',
+            constraint=models.UniqueConstraint(fields=('user', 'token'), name='unique_device_user_token'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['token'], name='users_devic_token_be8cf5_idx'),
+        ),
+    ]
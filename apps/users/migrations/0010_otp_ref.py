@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_device_unique_user_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otp',
+            name='ref',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+from backend_project.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # The OTP table is large and written on every login; build its indexes
+    # without blocking inserts
+    atomic = False
+
+    dependencies = [
+        ('users', '0010_otp_ref'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='otp',
+            index=models.Index(fields=['email', 'method', 'verified', '-created_at'], name='otp_email_lookup_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='otp',
+            index=models.Index(fields=['phone', 'method', 'verified', '-created_at'], name='otp_phone_lookup_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='otp',
+            index=models.Index(fields=['created_at'], name='otp_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_otp_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSendLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('to_email', models.CharField(max_length=254)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('success', models.BooleanField()),
+                ('result', models.TextField(blank=True)),
+                ('otp_id', models.BigIntegerField(blank=True, null=True)),
+                ('otp_ref', models.CharField(blank=True, max_length=32, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['to_email', '-created_at'], name='emaillog_to_created_idx'), models.Index(fields=['otp_id'], name='emaillog_otp_id_idx'), models.Index(fields=['otp_ref'], name='emaillog_otp_ref_idx'), models.Index(fields=['-created_at'], name='emaillog_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:01
+
+from django.db import migrations, models
+
+from backend_project.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # The OTP table is large and written on every login; build its indexes
+    # without blocking inserts
+    atomic = False
+
+    dependencies = [
+        ('users', '0012_email_send_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otp',
+            name='next_retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='otp',
+            name='send_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        AddIndexConcurrently(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('verified', False), models.Q(('send_result__isnull', True), ('send_result', 0), _connector='OR')), fields=['created_at'], name='otp_undelivered_idx'),
+        ),
+    ]
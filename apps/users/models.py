@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
+from django.conf import settings
 
 
 class UserManager(BaseUserManager):
@@ -116,27 +117,79 @@ class OTP(models.Model):
     email = models.EmailField(null=True, blank=True)
     code = models.CharField(max_length=8)
     method = models.CharField(max_length=10, choices=METHOD_CHOICES, default=METHOD_PHONE)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: rows written in batches from the Redis OTP store keep their issue time
+    created_at = models.DateTimeField(default=timezone.now)
     verified = models.BooleanField(default=False)
+    # Public reference shared with the Redis OTP store (apps.users.otp_store)
+    ref = models.CharField(max_length=32, unique=True, null=True, blank=True)
     # Tracks whether this OTP has been sent (email/SMS) and any error details
     sent_at = models.DateTimeField(null=True, blank=True)
     send_result = models.IntegerField(null=True, blank=True)
     send_error = models.TextField(null=True, blank=True)
+    # Resends by the retry job (apps.users.otp_resend) and when the next one is due
+    send_attempts = models.PositiveSmallIntegerField(default=0)
+    next_retry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # verify_otp lookups: contact + method + unverified, newest first
+            models.Index(fields=['email', 'method', 'verified', '-created_at'], name='otp_email_lookup_idx'),
+            models.Index(fields=['phone', 'method', 'verified', '-created_at'], name='otp_phone_lookup_idx'),
+            # Admin list ordering and the retention purge
+            models.Index(fields=['created_at'], name='otp_created_at_idx'),
+            # Undelivered codes for the retry job; stays small as codes are sent
+            models.Index(
+                fields=['created_at'], name='otp_undelivered_idx',
+                condition=models.Q(verified=False) & (models.Q(send_result__isnull=True) | models.Q(send_result=0)),
+            ),
+        ]
 
     @property
     def is_expired(self):
-        return (timezone.now() - self.created_at).total_seconds() > 300
+        return (timezone.now() - self.created_at).total_seconds() > getattr(settings, 'OTP_TTL_SECONDS', 300)
 
     def __str__(self):
         contact = self.email if self.method == self.METHOD_EMAIL else self.phone
         return f'OTP({contact or self.user}, method={self.method})'
 
 
+class EmailSendLog(models.Model):
+    """One email delivery attempt, written in batches by apps.users.send_log."""
+    created_at = models.DateTimeField(default=timezone.now)
+    to_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255, blank=True)
+    success = models.BooleanField()
+    # Provider result on success ("OK", "sent (1 recipients)"), error text on failure
+    result = models.TextField(blank=True)
+    otp_id = models.BigIntegerField(null=True, blank=True)
+    otp_ref = models.CharField(max_length=32, null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['to_email', '-created_at'], name='emaillog_to_created_idx'),
+            models.Index(fields=['otp_id'], name='emaillog_otp_id_idx'),
+            models.Index(fields=['otp_ref'], name='emaillog_otp_ref_idx'),
+            models.Index(fields=['-created_at'], name='emaillog_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'EmailSendLog({self.to_email}, success={self.success})'
+
+
 class Device(models.Model):
     user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='devices')
     token = models.CharField(max_length=512)
     platform = models.CharField(max_length=32, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'token'], name='unique_device_user_token'),
+        ]
+        indexes = [
+            models.Index(fields=['token']),
+        ]
+
     def __str__(self):
         return f'Device({self.user}, {self.platform})'
@@ -0,0 +1,142 @@
+"""
+Re-send OTP codes that were never delivered.
+
+`resend_undelivered()` (run by Celery beat every OTP_RESEND_INTERVAL_SECONDS)
+selects OTP rows that are unverified, still inside OTP_TTL_SECONDS and have
+`send_result` null (never sent) or 0 (failed). A code is first re-sent
+OTP_RESEND_AFTER_SECONDS after it was issued, then with exponential backoff
+(OTP_RESEND_BACKOFF_SECONDS * 2 ** attempts) up to OTP_RESEND_MAX_ATTEMPTS
+times. Codes replaced by a newer one in the Redis OTP store are skipped.
+
+Sends run concurrently on a bounded thread pool (OTP_RESEND_WORKERS), one
+chunk of OTP_RESEND_WORKERS codes at a time. Each chunk's outcomes are written
+back with one bulk UPDATE and mirrored to the Redis delivery status that
+clients poll. The selected codes are leased first (next_retry_at pushed out
+by OTP_RESEND_BACKOFF_SECONDS), so a run killed mid-way does not have the
+next run re-send them at once. No new chunk is started after
+OTP_RESEND_TIME_BUDGET_SECONDS; the rest wait for a later run.
+
+Transactional emails are not stored with their body, so they are retried by
+their own Celery task instead.
+"""
+import time
+import logging
+from datetime import timedelta
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def pending(emails=None, now=None, limit=None):
+    """Undelivered OTP rows that are due for a resend, oldest first."""
+    from .models import OTP
+
+    now = now or timezone.now()
+    qs = (
+        OTP.objects.filter(
+            verified=False,
+            created_at__gte=now - timedelta(seconds=_setting('OTP_TTL_SECONDS', 300)),
+            send_attempts__lt=_setting('OTP_RESEND_MAX_ATTEMPTS', 3),
+        )
+        .filter(Q(send_result__isnull=True) | Q(send_result=0))
+        .filter(
+            Q(next_retry_at__isnull=True,
+              created_at__lte=now - timedelta(seconds=_setting('OTP_RESEND_AFTER_SECONDS', 60)))
+            | Q(next_retry_at__lte=now)
+        )
+    )
+    if emails:
+        qs = qs.filter(reduce(lambda q, e: q | Q(email__iexact=e.strip()), emails, Q()))
+    return list(qs.order_by('created_at')[:limit or _setting('OTP_RESEND_BATCH_SIZE', 500)])
+
+
+def _send(otp):
+    """Send one code. Returns (success, error); never raises."""
+    from .models import OTP
+    try:
+        if otp.method == OTP.METHOD_EMAIL:
+            from .email_utils import send_email_with_logging, OTP_EMAIL_SUBJECT, otp_email_message
+            result = send_email_with_logging(
+                to_email=otp.email, subject=OTP_EMAIL_SUBJECT, message=otp_email_message(otp.code),
+                otp_ref=otp.ref, template_vars={'passcode': otp.code, 'time': '5 Minutes'},
+            )
+            return bool(result.get('success')), '' if result.get('success') else result.get('result', '')
+        from .sms import send_otp_sms
+        return (True, '') if send_otp_sms(otp.phone, otp.code) else (False, 'SMS provider returned failure')
+    except Exception as e:
+        logger.warning('Resend of OTP %s failed', otp.pk, exc_info=True)
+        return False, str(e)
+
+
+def _record(rows, outcomes):
+    """Write the send fields of `rows` and the delivery status of `outcomes` ({otp: (success, error)})."""
+    from . import otp_store
+    from .models import OTP
+    OTP.objects.bulk_update(rows, ['send_attempts', 'sent_at', 'send_result', 'send_error', 'next_retry_at'])
+    otp_store.set_send_statuses({otp.ref: outcome for otp, outcome in outcomes.items() if otp.ref})
+
+
+def resend_undelivered(emails=None, now=None, limit=None, budget=None):
+    """Re-send due undelivered codes concurrently and record the outcomes.
+
+    Returns {'attempted': n, 'sent': n, 'failed': n, 'skipped': n,
+    'deferred': n}; skipped codes were replaced by a newer code and are not
+    retried again, deferred ones did not fit in the time budget (`budget`
+    seconds, OTP_RESEND_TIME_BUDGET_SECONDS by default; 0 for none).
+    """
+    from . import otp_store
+    from .models import OTP
+
+    started = time.monotonic()
+    budget = _setting('OTP_RESEND_TIME_BUDGET_SECONDS', 60) if budget is None else budget
+    now = now or timezone.now()
+    rows = pending(emails=emails, now=now, limit=limit)
+    live = otp_store.live_refs(rows)
+    due = [otp for otp in rows if otp.ref in live]
+    stale = [otp for otp in rows if otp.ref not in live]
+
+    backoff = _setting('OTP_RESEND_BACKOFF_SECONDS', 30)
+    if due:
+        OTP.objects.filter(pk__in=[otp.pk for otp in due]).update(
+            next_retry_at=timezone.now() + timedelta(seconds=backoff),
+        )
+    for otp in stale:
+        # Superseded codes can never be verified; stop considering them
+        otp.send_attempts = _setting('OTP_RESEND_MAX_ATTEMPTS', 3)
+
+    outcomes = {}
+    unwritten = stale
+    workers = max(1, min(_setting('OTP_RESEND_WORKERS', 8), len(due) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='otp-resend') as pool:
+        for start in range(0, len(due), workers):
+            if start and budget and time.monotonic() - started >= budget:
+                break
+            chunk = due[start:start + workers]
+            results = list(pool.map(_send, chunk))
+            sent_at = timezone.now()
+            for otp, (success, error) in zip(chunk, results):
+                otp.send_attempts += 1
+                otp.sent_at = sent_at
+                otp.send_result = 1 if success else 0
+                otp.send_error = '' if success else str(error)
+                otp.next_retry_at = None if success else sent_at + timedelta(seconds=backoff * 2 ** otp.send_attempts)
+            chunk_outcomes = dict(zip(chunk, results))
+            _record(unwritten + chunk, chunk_outcomes)
+            outcomes.update(chunk_outcomes)
+            unwritten = []
+    if unwritten:
+        _record(unwritten, {})
+
+    sent = sum(1 for success, _ in outcomes.values() if success)
+    return {
+        'attempted': len(outcomes), 'sent': sent, 'failed': len(outcomes) - sent,
+        'skipped': len(stale), 'deferred': len(due) - len(outcomes),
+    }
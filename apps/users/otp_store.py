@@ -0,0 +1,354 @@
+"""
+OTP store backed by Redis keys with a native TTL.
+
+Each contact has at most one live code under `otp:<method>:<contact>`,
+expiring after OTP_TTL_SECONDS. Issuing a new code replaces the previous
+one, and verification is a single atomic compare-and-delete, so a code can
+be used once and the database is not touched on the request path.
+
+Delivery status per code is kept under `otp:status:<ref>` (pending, sent,
+failed, verified) so clients can poll `status(ref)` while the SMS/email is
+sent by a Celery task.
+
+The `OTP` table is kept as an audit trail only: issue/verify events are
+pushed to the `otp:audit` Redis list and written in batches by
+`flush_audit()` (run periodically by Celery beat). Rows older than
+OTP_RETENTION_SECONDS are removed in bounded batches by `purge_expired()`.
+Codes that were never delivered are re-sent by apps.users.otp_resend.
+
+If Redis is unavailable, codes are stored in and verified against the
+`OTP` table directly, as before. Codes issued during an outage are not
+known to Redis afterwards; the user simply requests a new one.
+"""
+import json
+import time
+import uuid
+import secrets
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'otp:'
+AUDIT_KEY = 'otp:audit'
+STATUS_PREFIX = 'otp:status:'
+# Delivery status outlives the code so a client can still see why it never arrived
+STATUS_TTL_SECONDS = 3600
+# Default for OTP_RETENTION_SECONDS: audit rows are kept for a week
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 3600
+
+STATUS_PENDING = 'pending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+STATUS_VERIFIED = 'verified'
+
+# GET + compare + DEL in one step. Values are "<code>|<ref>|<user_id>|<issued_ts>".
+_VERIFY_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return false
+end
+if string.sub(value, 1, string.len(ARGV[1]) + 1) ~= ARGV[1] .. '|' then
+    return false
+end
+redis.call('DEL', KEYS[1])
+return value
+"""
+
+# Pop up to ARGV[1] audit events atomically
+_POP_AUDIT_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+redis.call('LTRIM', KEYS[1], #items, -1)
+return items
+"""
+
+# Set the send outcome unless the code was already verified
+_SET_SEND_STATUS_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value or string.find(value, '"verified"', 1, true) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+# `otp` is the DB row when the database fallback was used
+IssuedOTP = namedtuple('IssuedOTP', 'code ref otp')
+VerifiedOTP = namedtuple('VerifiedOTP', 'ref user_id')
+
+
+def _ttl():
+    return getattr(settings, 'OTP_TTL_SECONDS', 300)
+
+
+def _key(method, contact):
+    return f'{KEY_PREFIX}{method}:{contact}'
+
+
+def _status_key(ref):
+    return f'{STATUS_PREFIX}{ref}'
+
+
+def _status_value(status, error=''):
+    return json.dumps({'status': status, 'error': str(error or '')})
+
+
+def generate_code():
+    return str(100000 + secrets.randbelow(900000))
+
+
+def _audit(r, event):
+    try:
+        r.rpush(AUDIT_KEY, json.dumps(event))
+    except Exception:
+        logger.warning('Failed to queue OTP audit event %s', event.get('action'), exc_info=True)
+
+
+def issue(method, contact, user=None):
+    """Create a code for `contact` ('email' or 'phone' method). Returns an IssuedOTP."""
+    from .models import OTP
+
+    code = generate_code()
+    ref = uuid.uuid4().hex
+    user_id = user.pk if user is not None else None
+    r = get_redis()
+    if r is not None:
+        now = timezone.now()
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.set(_key(method, contact), f'{code}|{ref}|{user_id or ""}|{now.timestamp()}', ex=_ttl())
+            pipe.set(_status_key(ref), _status_value(STATUS_PENDING), ex=STATUS_TTL_SECONDS)
+            pipe.execute()
+        except Exception:
+            logger.warning('OTP store unavailable in Redis; writing OTP to the database', exc_info=True)
+        else:
+            _audit(r, {
+                'action': 'issued', 'ref': ref, 'method': method, 'contact': contact,
+                'code': code, 'user_id': user_id, 'at': now.isoformat(),
+            })
+            return IssuedOTP(code, ref, None)
+
+    fields = {'email': contact} if method == OTP.METHOD_EMAIL else {'phone': contact}
+    otp = OTP.objects.create(user=user, code=code, method=method, ref=ref, **fields)
+    return IssuedOTP(code, ref, otp)
+
+
+def verify(method, contact, code):
+    """Consume the code if it matches. Returns a VerifiedOTP, or None if invalid/expired."""
+    from .models import OTP
+
+    r = get_redis()
+    if r is not None:
+        try:
+            value = r.eval(_VERIFY_SCRIPT, 1, _key(method, contact), str(code))
+        except Exception:
+            logger.warning('OTP store unavailable in Redis; verifying against the database', exc_info=True)
+        else:
+            if not value:
+                return None
+            _, ref, user_id, _ = value.decode().split('|', 3)
+            _audit(r, {'action': 'verified', 'ref': ref, 'at': timezone.now().isoformat()})
+            _set_status(r, ref, STATUS_VERIFIED)
+            return VerifiedOTP(ref, int(user_id) if user_id else None)
+
+    lookup = {'email': contact} if method == OTP.METHOD_EMAIL else {'phone': contact}
+    otp = (
+        OTP.objects.filter(code=code, verified=False, method=method, **lookup)
+        .order_by('-created_at').first()
+    )
+    if otp is None or otp.is_expired:
+        return None
+    # Conditional update so two concurrent requests cannot both consume the code
+    if not OTP.objects.filter(pk=otp.pk, verified=False).update(verified=True):
+        return None
+    return VerifiedOTP(otp.ref, otp.user_id)
+
+
+def record_send_result(ref, success, error=''):
+    """Queue the delivery outcome of an OTP for the audit trail."""
+    r = get_redis()
+    event = {
+        'action': 'sent', 'ref': ref, 'success': bool(success),
+        'error': str(error or ''), 'at': timezone.now().isoformat(),
+    }
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.rpush(AUDIT_KEY, json.dumps(event))
+            # Only update a status that exists, and never overwrite 'verified'
+            pipe.eval(_SET_SEND_STATUS_SCRIPT, 1, _status_key(ref),
+                      _status_value(STATUS_SENT if success else STATUS_FAILED, error), STATUS_TTL_SECONDS)
+            pipe.execute()
+            return
+        except Exception:
+            pass
+    _apply_audit([event])
+
+
+def set_send_statuses(outcomes):
+    """Update the Redis delivery status for many codes: {ref: (success, error)}.
+
+    Used by the resend job, which writes the OTP rows itself.
+    """
+    r = get_redis()
+    if r is None or not outcomes:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for ref, (success, error) in outcomes.items():
+            pipe.eval(_SET_SEND_STATUS_SCRIPT, 1, _status_key(ref),
+                      _status_value(STATUS_SENT if success else STATUS_FAILED, error), STATUS_TTL_SECONDS)
+        pipe.execute()
+    except Exception:
+        logger.warning('Failed to update OTP send statuses for %d codes', len(outcomes), exc_info=True)
+
+
+def live_refs(otps):
+    """Refs of the given OTP rows whose code can still be verified.
+
+    With Redis, only the latest code per contact is live (issuing replaces
+    it); without Redis every unexpired, unverified row is.
+    """
+    from .models import OTP
+
+    refs = {otp.ref for otp in otps}
+    r = get_redis()
+    if r is None or not otps:
+        return refs
+    try:
+        pipe = r.pipeline(transaction=False)
+        for otp in otps:
+            pipe.get(_key(otp.method, otp.email if otp.method == OTP.METHOD_EMAIL else otp.phone))
+        values = pipe.execute()
+    except Exception:
+        logger.warning('OTP store unavailable in Redis; treating unexpired codes as live', exc_info=True)
+        return refs
+    return {
+        otp.ref for otp, value in zip(otps, values)
+        if value is not None and value.decode().split('|', 2)[1] == otp.ref
+    }
+
+
+def _set_status(r, ref, status):
+    try:
+        r.set(_status_key(ref), _status_value(status), ex=STATUS_TTL_SECONDS)
+    except Exception:
+        logger.warning('Failed to update OTP status for %s', ref, exc_info=True)
+
+
+def status(ref):
+    """Delivery status of an issued code: {'status': ..., 'error': ...}, or None if unknown."""
+    from .models import OTP
+
+    r = get_redis()
+    if r is not None:
+        try:
+            value = r.get(_status_key(ref))
+        except Exception:
+            logger.warning('OTP status unavailable in Redis; reading the database', exc_info=True)
+        else:
+            if value is not None:
+                return json.loads(value)
+
+    otp = OTP.objects.filter(ref=ref).only('verified', 'send_result', 'send_error').first()
+    if otp is None:
+        return None
+    if otp.verified:
+        return {'status': STATUS_VERIFIED, 'error': ''}
+    if otp.send_result is None:
+        return {'status': STATUS_PENDING, 'error': ''}
+    if otp.send_result:
+        return {'status': STATUS_SENT, 'error': ''}
+    return {'status': STATUS_FAILED, 'error': otp.send_error or ''}
+
+
+def flush_audit(batch_size=None):
+    """Write queued audit events to the OTP table. Returns the number of events applied."""
+    r = get_redis()
+    if r is None:
+        return 0
+    batch_size = batch_size or getattr(settings, 'OTP_AUDIT_BATCH_SIZE', 1000)
+    total = 0
+    while True:
+        raw = r.eval(_POP_AUDIT_SCRIPT, 1, AUDIT_KEY, batch_size)
+        if not raw:
+            return total
+        events = [json.loads(item) for item in raw]
+        try:
+            _apply_audit(events)
+        except Exception:
+            # Put the batch back so it is retried on the next flush
+            r.rpush(AUDIT_KEY, *raw)
+            raise
+        total += len(events)
+        if len(raw) < batch_size:
+            return total
+
+
+def _parse(at):
+    value = datetime.fromisoformat(at)
+    return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+
+
+def _apply_audit(events):
+    """Apply a batch of audit events with one INSERT and a few bulk UPDATEs."""
+    from .models import OTP
+
+    issued = [e for e in events if e['action'] == 'issued']
+    if issued:
+        OTP.objects.bulk_create([
+            OTP(
+                ref=e['ref'], method=e['method'], code=e['code'], user_id=e.get('user_id'),
+                email=e['contact'] if e['method'] == OTP.METHOD_EMAIL else None,
+                phone=e['contact'] if e['method'] != OTP.METHOD_EMAIL else None,
+                created_at=_parse(e['at']),
+            )
+            for e in issued
+        ], ignore_conflicts=True)
+
+    verified = [e['ref'] for e in events if e['action'] == 'verified']
+    if verified:
+        OTP.objects.filter(ref__in=verified).update(verified=True)
+
+    sent = {e['ref']: e for e in events if e['action'] == 'sent'}
+    if sent:
+        rows = list(OTP.objects.filter(ref__in=list(sent)))
+        for row in rows:
+            e = sent[row.ref]
+            row.sent_at = _parse(e['at'])
+            row.send_result = 1 if e['success'] else 0
+            row.send_error = e['error']
+        OTP.objects.bulk_update(rows, ['sent_at', 'send_result', 'send_error'])
+
+
+def purge_expired(retention_seconds=None, batch_size=None, pause=0.0):
+    """Delete OTP rows older than the retention period, `batch_size` rows per statement.
+
+    Each batch is a short DELETE by primary key, so no long lock is held on
+    the table. Returns the number of rows deleted.
+    """
+    from .models import OTP
+
+    if retention_seconds is None:
+        retention_seconds = getattr(settings, 'OTP_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS)
+    # Never delete a code that could still be verified
+    cutoff = timezone.now() - timedelta(seconds=max(retention_seconds, _ttl()))
+    batch_size = batch_size or getattr(settings, 'OTP_PURGE_BATCH_SIZE', 1000)
+    total = 0
+    while True:
+        ids = list(
+            OTP.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = OTP.objects.filter(pk__in=ids).delete()
+        total += deleted
+        if len(ids) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
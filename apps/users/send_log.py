@@ -0,0 +1,92 @@
+"""
+Structured email send log.
+
+`record()` is called on the send path and only buffers the attempt in memory
+(see backend_project.buffered_writer); a background thread writes buffered
+attempts to the `EmailSendLog` table with one INSERT per batch. If the
+database write fails, the batch goes to the rotating JSONL file
+EMAIL_SEND_LOG_FALLBACK_PATH instead so nothing is lost silently.
+
+Look-ups by recipient, OTP id or OTP ref use the table's indexes:
+
+    send_log.lookup(recipient='user@example.com')
+"""
+import json
+import logging
+import logging.handlers
+import os
+import threading
+from django.conf import settings
+from django.utils import timezone
+from backend_project.buffered_writer import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+_fallback_lock = threading.Lock()
+_fallback_logger = None
+
+
+def _fallback():
+    """Rotating JSONL file logger, created on first use."""
+    global _fallback_logger
+    with _fallback_lock:
+        if _fallback_logger is None:
+            path = getattr(settings, 'EMAIL_SEND_LOG_FALLBACK_PATH', 'logs/email_send.jsonl')
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            log = logging.getLogger('apps.users.send_log.fallback')
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+            log.propagate = False
+            _fallback_logger = log
+        return _fallback_logger
+
+
+def _write(records):
+    from .models import EmailSendLog
+    try:
+        EmailSendLog.objects.bulk_create([EmailSendLog(**r) for r in records])
+    except Exception:
+        logger.warning('Failed to write %d email send log records; using %s', len(records),
+                       getattr(settings, 'EMAIL_SEND_LOG_FALLBACK_PATH', 'logs/email_send.jsonl'), exc_info=True)
+        log = _fallback()
+        for r in records:
+            log.info(json.dumps(r, default=str))
+
+
+writer = BufferedWriter('email-send-log', _write, settings_prefix='EMAIL_SEND_LOG')
+
+
+def record(to_email, subject, success, result='', otp_id=None, otp_ref=None):
+    """Buffer one send attempt. Never raises, never touches the database or disk."""
+    try:
+        writer.put({
+            'created_at': timezone.now(),
+            'to_email': (to_email or '').strip().lower()[:254],
+            'subject': (subject or '')[:255],
+            'success': bool(success),
+            'result': str(result or ''),
+            'otp_id': otp_id,
+            'otp_ref': otp_ref,
+        })
+    except Exception:
+        logger.exception('Failed to buffer email send log record')
+
+
+def flush():
+    """Write all buffered records now. Returns the number written."""
+    return writer.flush()
+
+
+def lookup(recipient=None, otp_id=None, otp_ref=None, limit=50):
+    """Most recent send attempts matching any of the given keys."""
+    from .models import EmailSendLog
+    qs = EmailSendLog.objects.all()
+    if recipient:
+        qs = qs.filter(to_email=recipient.strip().lower())
+    if otp_id is not None:
+        qs = qs.filter(otp_id=otp_id)
+    if otp_ref:
+        qs = qs.filter(otp_ref=otp_ref)
+    return list(qs.order_by('-created_at', '-id')[:limit])
@@ -1,8 +1,20 @@
 """
 SMS service for sending OTP and notifications via Twilio or mock provider
+
+The provider is built once per process (`get_sms_provider()`); the Twilio
+client keeps a pool of keep-alive HTTPS connections sized for `send_many()`,
+which sends a batch concurrently on SMS_SEND_WORKERS threads. Set
+TWILIO_API_BASE_URL to point the client at a stand-in API such as
+tools/mock_twilio.py.
 """
+import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +25,52 @@ class SMSProvider:
     def send(self, phone: str, message: str) -> bool:
         raise NotImplementedError
 
+    def send_many(self, messages, workers=None) -> list:
+        """Send (phone, message) pairs concurrently. Returns one bool per message, in order."""
+        messages = list(messages)
+        if not messages:
+            return []
+        workers = max(1, min(workers or getattr(settings, 'SMS_SEND_WORKERS', 8), len(messages)))
+        if workers == 1:
+            return [self._safe_send(phone, text) for phone, text in messages]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sms-send') as pool:
+            return list(pool.map(lambda m: self._safe_send(*m), messages))
+
+    def _safe_send(self, phone, message):
+        try:
+            return bool(self.send(phone, message))
+        except Exception as e:
+            logger.error(f"Error sending SMS to {phone}: {e}")
+            return False
+
+
+def _twilio_http_client():
+    """Twilio HTTP client with a connection pool large enough for send_many()."""
+    from requests.adapters import HTTPAdapter
+    from twilio.http.http_client import TwilioHttpClient
+
+    base_url = getattr(settings, 'TWILIO_API_BASE_URL', '')
+
+    class PooledTwilioHttpClient(TwilioHttpClient):
+        def request(self, method, url, *args, **kwargs):
+            if base_url:
+                # Stand-in API: same paths, different host
+                base = urlsplit(base_url)
+                url = urlsplit(url)._replace(scheme=base.scheme, netloc=base.netloc).geturl()
+            return super().request(method, url, *args, **kwargs)
+
+    client = PooledTwilioHttpClient(timeout=getattr(settings, 'TWILIO_TIMEOUT_SECONDS', 10))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, getattr(settings, 'SMS_SEND_WORKERS', 8)))
+    client.session.mount('https://', adapter)
+    client.session.mount('http://', adapter)
+    return client
+
 
 class TwilioSMSProvider(SMSProvider):
     """Twilio SMS provider"""
     
     def __init__(self):
+        self.from_number = settings.TWILIO_PHONE_NUMBER
         try:
             from twilio.rest import Client
             account_sid = settings.TWILIO_ACCOUNT_SID
@@ -28,8 +81,7 @@ class TwilioSMSProvider(SMSProvider):
                 self.client = None
                 return
             
-            self.client = Client(account_sid, auth_token)
-            self.from_number = settings.TWILIO_PHONE_NUMBER
+            self.client = Client(account_sid, auth_token, http_client=_twilio_http_client())
             logger.info(f"Twilio initialized with account: {account_sid[:5]}...")
         except Exception as e:
             logger.error(f"Failed to initialize Twilio: {e}")
@@ -64,15 +116,32 @@ class MockSMSProvider(SMSProvider):
         return True
 
 
+_provider = None
+_provider_pid = None
+_provider_lock = threading.Lock()
+
+
 def get_sms_provider() -> SMSProvider:
-    """Get the configured SMS provider"""
-    provider_name = settings.SMS_PROVIDER.lower()
-    
-    if provider_name == 'twilio':
-        return TwilioSMSProvider()
-    else:
-        # Default to mock for development
-        return MockSMSProvider()
+    """Get the configured SMS provider, built once per process"""
+    global _provider, _provider_pid
+    with _provider_lock:
+        if _provider is None or _provider_pid != os.getpid():
+            # Connections inherited from the parent process must not be shared
+            provider_name = settings.SMS_PROVIDER.lower()
+            if provider_name == 'twilio':
+                _provider = TwilioSMSProvider()
+            else:
+                # Default to mock for development
+                _provider = MockSMSProvider()
+            _provider_pid = os.getpid()
+        return _provider
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _provider
+    if setting.startswith('SMS_') or setting.startswith('TWILIO_'):
+        _provider = None
 
 
 def send_otp_sms(phone: str, code: str) -> bool:
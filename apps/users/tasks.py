@@ -7,28 +7,65 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
-def send_otp_sms_task(self, phone: str, code: str):
+@shared_task
+def send_otp_sms_task(phone: str, code: str, ref=None):
     """
     Async task to send OTP via SMS
     
     Args:
         phone: Phone number
         code: OTP code
+        ref: OTP reference from apps.users.otp_store, to record the outcome
+
+    Failed sends are re-sent by the resend job (apps.users.otp_resend).
     """
     from .sms import send_otp_sms
+    from . import otp_store
     
     try:
         success = send_otp_sms(phone, code)
-        if success:
-            logger.info(f"OTP SMS sent to {phone}")
-        else:
-            logger.error(f"Failed to send OTP SMS to {phone}")
-        return {"success": success, "phone": phone}
+        error = ''
     except Exception as e:
         logger.error(f"Error in send_otp_sms_task: {e}")
-        # Retry up to 3 times with exponential backoff
-        raise self.retry(exc=e, countdown=60)
+        success, error = False, str(e)
+    if success:
+        logger.info(f"OTP SMS sent to {phone}")
+    else:
+        logger.error(f"Failed to send OTP SMS to {phone}")
+    if ref:
+        otp_store.record_send_result(ref, success, error)
+    return {"success": success, "phone": phone}
+
+
+# Sends stop after OTP_RESEND_TIME_BUDGET_SECONDS, well inside the time limit
+@shared_task(time_limit=120)
+def resend_undelivered_otps_task():
+    """Re-send OTP codes that were never delivered, while still valid (Celery beat)"""
+    from . import otp_resend
+    outcome = otp_resend.resend_undelivered()
+    if outcome['attempted']:
+        logger.info(f"Re-sent undelivered OTPs: {outcome}")
+    return outcome
+
+
+@shared_task
+def flush_otp_audit_task():
+    """Write queued OTP issue/verify/send events to the OTP table in batches (Celery beat)"""
+    from . import otp_store
+    applied = otp_store.flush_audit()
+    if applied:
+        logger.info(f"Flushed {applied} OTP audit events")
+    return applied
+
+
+@shared_task
+def purge_expired_otps_task():
+    """Delete OTP rows past the retention period in bounded batches (Celery beat)"""
+    from . import otp_store
+    deleted = otp_store.purge_expired()
+    if deleted:
+        logger.info(f"Purged {deleted} expired OTPs")
+    return deleted
 
 
 @shared_task(bind=True, max_retries=3)
@@ -55,6 +92,28 @@ def send_trip_notification_task(self, phone: str, trip_status: str, trip_details
         raise self.retry(exc=e, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3, time_limit=120)
+def send_sms_batch_task(self, messages):
+    """
+    Async task to send several notification SMS with the shared provider
+
+    Args:
+        messages: list of [phone, text] pairs
+
+    Messages are sent concurrently (SMS_SEND_WORKERS); only the ones that
+    failed are retried.
+    """
+    from .sms import get_sms_provider
+
+    results = get_sms_provider().send_many([(phone, text) for phone, text in messages])
+    failed = [[phone, text] for (phone, text), ok in zip(messages, results) if not ok]
+
+    logger.info(f"SMS batch: sent={len(messages) - len(failed)} failed={len(failed)}")
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(args=[failed], countdown=60)
+    return {"success": not failed, "sent": len(messages) - len(failed), "failed": len(failed)}
+
+
 @shared_task(bind=True, max_retries=3, time_limit=30)
 def send_email_task(self, to_email: str, subject: str, message: str):
     """
@@ -83,28 +142,66 @@ def send_email_task(self, to_email: str, subject: str, message: str):
         raise self.retry(exc=e, countdown=60)
 
 
-@shared_task(bind=True, max_retries=3, time_limit=30)
-def send_otp_email_task(self, user_email: str, code: str, otp_id=None):
-    """Send OTP email asynchronously via Celery"""
+@shared_task(time_limit=30)
+def send_otp_email_task(user_email: str, code: str, otp_id=None, ref=None):
+    """Send OTP email asynchronously via Celery
+
+    `ref` is the OTP reference from apps.users.otp_store; the outcome of each
+    attempt is recorded against it so clients polling the status see it.
+    Failed sends are not retried here: the resend job (apps.users.otp_resend)
+    re-sends undelivered codes with backoff while they are still valid.
+    """
+    from . import otp_store
+    from .email_utils import send_email_with_logging, OTP_EMAIL_SUBJECT, otp_email_message
+
     try:
-        from .email_utils import send_email_with_logging
-        
         result = send_email_with_logging(
             to_email=user_email,
-            subject="Your AAfri Ride Verification Code",
-            message=f"Your verification code is: {code}\n\nThis code is valid for 5 minutes.\n\nIf you didn't request this code, please ignore this email.",
+            subject=OTP_EMAIL_SUBJECT,
+            message=otp_email_message(code),
             otp=otp_id,
+            otp_ref=ref,
+            template_vars={'passcode': code, 'time': '5 Minutes'},
+            hedge=True,
         )
-        
-        if result.get('success'):
-            logger.info(f"OTP email sent successfully to {user_email}")
-            return {'success': True, 'result': result.get('result')}
-        else:
-            logger.error(f"OTP email failed for {user_email}: {result.get('result')}")
-            # Retry on failure
-            raise Exception(f"Email send failed: {result.get('result')}")
-            
     except Exception as exc:
         logger.exception(f"Error sending OTP email to {user_email}")
-        # Retry with exponential backoff (60s, 120s, 180s)
-        raise self.retry(exc=exc, countdown=60 * (self.request.retries + 1))
+        result = {'success': False, 'result': str(exc)}
+    if ref:
+        otp_store.record_send_result(ref, result.get('success'), '' if result.get('success') else result.get('result'))
+
+    if result.get('success'):
+        logger.info(f"OTP email sent successfully to {user_email}")
+    else:
+        logger.error(f"OTP email failed for {user_email}: {result.get('result')}")
+    return {'success': bool(result.get('success')), 'result': result.get('result')}
+
+
+@shared_task(bind=True, max_retries=3, time_limit=60)
+def send_templated_email_task(self, to_email: str, subject: str, message: str,
+                              emailjs_template_id: str = None, template_vars: dict = None):
+    """Send a transactional email (EmailJS template, SMTP fallback) with logging"""
+    from .email_utils import send_email_with_logging
+
+    result = send_email_with_logging(
+        to_email=to_email,
+        subject=subject,
+        message=message,
+        emailjs_template_id=emailjs_template_id,
+        template_vars=template_vars,
+    )
+    if not result.get('success'):
+        logger.error(f"Email '{subject}' failed for {to_email}: {result.get('result')}")
+        raise self.retry(exc=Exception(result.get('result')), countdown=60 * (self.request.retries + 1))
+    return {'success': True, 'result': result.get('result')}
+
+
+@shared_task(bind=True, max_retries=3, time_limit=60)
+def send_admin_notification_task(self, subject: str, message: str):
+    """Send one message to support with all staff in BCC, over a single SMTP connection"""
+    from .email_utils import send_admin_notification
+
+    result = send_admin_notification(subject, message)
+    if not result.get('success'):
+        raise self.retry(exc=Exception(result.get('result')), countdown=60 * (self.request.retries + 1))
+    return result
@@ -0,0 +1,43 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.users.email_utils import send_admin_notification
+from apps.users.models import RiderProfile
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    SUPPORT_EMAIL='support@aafriride.com',
+    EMAIL_SEND_LOG_FLUSH_SECONDS=0,
+)
+class AdminNotificationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='Admin1@example.com', password='pw', is_staff=True)
+        User.objects.create_user(email='admin2@example.com', password='pw', is_staff=True)
+        User.objects.create_user(email='support@aafriride.com', password='pw', is_staff=True)
+        User.objects.create_user(email='gone@example.com', password='pw', is_staff=True, is_active=False)
+        self.driver = User.objects.create_user(email='driver@example.com', password='pw', role='rider')
+
+    def test_one_message_with_staff_in_bcc(self):
+        result = send_admin_notification('New Driver Application', 'details')
+        self.assertTrue(result['success'])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['support@aafriride.com'])
+        self.assertEqual(sorted(mail.outbox[0].bcc), ['admin1@example.com', 'admin2@example.com'])
+
+    def test_approve_queues_instead_of_sending(self):
+        profile = RiderProfile.objects.create(user=self.driver)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with patch('apps.users.tasks.send_templated_email_task.apply_async') as user_email, \
+                patch('apps.users.tasks.send_admin_notification_task.apply_async') as admin_email, \
+                self.assertNumQueries(3):
+            resp = client.post(f'/api/users/admin/drivers/{profile.pk}/approve/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(user_email.call_args.kwargs['args'][0], 'driver@example.com')
+        admin_email.assert_called_once()
@@ -0,0 +1,110 @@
+import time
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+
+from apps.users import email_providers
+from apps.users.email_providers import CircuitBreaker, Provider, ProviderError
+
+
+class FakeProvider(Provider):
+    def __init__(self, name, fail=False, delay=0.0):
+        super().__init__()
+        self.name = name
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+        self.done = threading.Event()
+
+    def send(self, to_email, subject, message, template_id=None, template_vars=None, from_email=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        self.done.set()
+        if self.fail:
+            raise ProviderError(f'{self.name} down')
+        return 'OK'
+
+
+@override_settings(EMAIL_BREAKER_FAILURES=2, EMAIL_BREAKER_RESET_SECONDS=30,
+                   EMAIL_HEDGE_AFTER_SECONDS=0.05, EMAIL_SEND_TIMEOUT_SECONDS=5)
+class EmailProviderTests(SimpleTestCase):
+    def use(self, *providers):
+        patcher = patch.object(email_providers, '_providers', list(providers))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fails_over_in_order(self):
+        primary, secondary = FakeProvider('a', fail=True), FakeProvider('b')
+        self.use(primary, secondary)
+        result = email_providers.send('u@example.com', 'Hi', 'body')
+        self.assertTrue(result.success)
+        self.assertEqual(result.provider, 'b')
+        self.assertEqual((primary.calls, secondary.calls), (1, 1))
+
+    def test_open_breaker_skips_provider_until_trial(self):
+        primary, secondary = FakeProvider('a', fail=True), FakeProvider('b')
+        self.use(primary, secondary)
+        for _ in range(3):
+            email_providers.send('u@example.com', 'Hi', 'body')
+        self.assertEqual(primary.calls, 2)
+        self.assertEqual(primary.breaker.state, 'open')
+
+        # After the reset period one trial send goes through and closes the breaker
+        primary.fail = False
+        primary.breaker.opened_at -= 30
+        result = email_providers.send('u@example.com', 'Hi', 'body')
+        self.assertEqual(result.provider, 'a')
+        self.assertEqual(primary.breaker.state, 'closed')
+
+    def test_half_open_allows_a_single_trial(self):
+        breaker = CircuitBreaker(failures=1, reset_seconds=0)
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+
+    def test_all_failing_reports_every_provider(self):
+        self.use(FakeProvider('a', fail=True), FakeProvider('b', fail=True))
+        result = email_providers.send('u@example.com', 'Hi', 'body')
+        self.assertFalse(result.success)
+        self.assertIn('a: a down', result.result)
+        self.assertIn('b: b down', result.result)
+
+    def test_hedged_send_does_not_wait_for_slow_primary(self):
+        slow, fast = FakeProvider('slow', delay=0.5), FakeProvider('fast')
+        self.use(slow, fast)
+        started = time.monotonic()
+        result = email_providers.send('u@example.com', 'Hi', 'body', hedge=True)
+        self.assertEqual(result.provider, 'fast')
+        self.assertLess(time.monotonic() - started, 0.4)
+        slow.done.wait(1)
+
+    def test_hedged_send_starts_backup_when_primary_fails(self):
+        self.use(FakeProvider('a', fail=True), FakeProvider('b'))
+        result = email_providers.send('u@example.com', 'Hi', 'body', hedge=True)
+        self.assertTrue(result.success)
+        self.assertEqual(result.provider, 'b')
+
+    def test_hedged_send_keeps_unused_backup_trial(self):
+        primary, backup = FakeProvider('a'), FakeProvider('b')
+        self.use(primary, backup)
+        backup.breaker.record(False)
+        backup.breaker.record(False)
+        backup.breaker.opened_at -= 30
+        self.assertEqual(backup.breaker.state, 'half-open')
+
+        # The primary answers, so the backup's half-open trial must not be taken
+        self.assertEqual(email_providers.send('u@example.com', 'Hi', 'body', hedge=True).provider, 'a')
+        self.assertEqual(backup.calls, 0)
+
+        # ...and it is still there for failover
+        primary.fail = True
+        result = email_providers.send('u@example.com', 'Hi', 'body')
+        self.assertEqual(result.provider, 'b')
+        self.assertEqual(backup.breaker.state, 'closed')
+
+    @override_settings(EMAIL_PROVIDERS=['emailjs', 'smtp'], EMAILJS_SERVICE_ID='',
+                       EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_unconfigured_providers_are_skipped(self):
+        self.assertEqual([p.name for p in email_providers.get_providers()], ['smtp'])
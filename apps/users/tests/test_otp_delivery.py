@@ -0,0 +1,46 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.users import otp_store
+from backend_project import throttling
+
+
+@override_settings(REDIS_URL=None, SMS_PROVIDER='mock')
+class OTPDeliveryTests(TestCase):
+    def setUp(self):
+        throttling.reset_local()
+        self.client = APIClient()
+
+    def test_email_otp_is_queued_and_status_tracked(self):
+        with patch('apps.users.tasks.send_otp_email_task.apply_async') as queued, \
+                patch('apps.users.email_utils.send_email_with_logging') as send_now:
+            resp = self.client.post('/api/users/otp/generate/', {'method': 'email', 'email': 'q@example.com'})
+        self.assertEqual(resp.status_code, 200)
+        send_now.assert_not_called()
+        ref = resp.json()['ref']
+        self.assertEqual(queued.call_args.kwargs['args'], ['q@example.com', resp.json()['code']])
+        self.assertEqual(queued.call_args.kwargs['kwargs'], {'ref': ref})
+
+        status_url = f'/api/users/otp/status/{ref}/'
+        self.assertEqual(self.client.get(status_url).json()['status'], otp_store.STATUS_PENDING)
+        otp_store.record_send_result(ref, False, 'smtp down')
+        self.assertEqual(self.client.get(status_url).json(), {'ref': ref, 'status': 'failed', 'error': 'smtp down'})
+        otp_store.record_send_result(ref, True)
+        self.assertEqual(self.client.get(status_url).json()['status'], otp_store.STATUS_SENT)
+        otp_store.verify('email', 'q@example.com', resp.json()['code'])
+        self.assertEqual(self.client.get(status_url).json()['status'], otp_store.STATUS_VERIFIED)
+
+    def test_unknown_ref(self):
+        self.assertEqual(self.client.get('/api/users/otp/status/nope/').status_code, 404)
+
+    def test_registration_queues_otp_email(self):
+        with patch('apps.users.tasks.send_otp_email_task.apply_async') as otp_email, \
+                patch('apps.users.email_utils.send_email_with_logging') as send_now:
+            resp = self.client.post('/api/users/register/', {
+                'email': 'new@example.com', 'password': 'pw12345!', 'verification_method': 'email',
+            }, format='json')
+        self.assertEqual(resp.status_code, 201, resp.content)
+        send_now.assert_not_called()
+        otp_email.assert_called_once()
+        self.assertEqual(self.client.get(f"/api/users/otp/status/{resp.json()['otp_ref']}/").json()['status'], 'pending')
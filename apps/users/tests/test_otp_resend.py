@@ -0,0 +1,96 @@
+import itertools
+from datetime import timedelta
+from unittest.mock import patch
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.users import otp_resend, send_log
+from apps.users.models import OTP
+
+
+@override_settings(
+    REDIS_URL=None, SMS_PROVIDER='mock', EMAIL_PROVIDERS=['smtp'],
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_SEND_LOG_FLUSH_SECONDS=3600,
+    OTP_TTL_SECONDS=300, OTP_RESEND_AFTER_SECONDS=60, OTP_RESEND_BACKOFF_SECONDS=30, OTP_RESEND_MAX_ATTEMPTS=3,
+)
+class ResendUndeliveredTests(TestCase):
+    def tearDown(self):
+        # Written inside the test transaction, so rolled back with it
+        send_log.flush()
+
+    def otp(self, age, **fields):
+        fields.setdefault('method', OTP.METHOD_EMAIL)
+        return OTP.objects.create(code='123456', created_at=timezone.now() - timedelta(seconds=age), **fields)
+
+    def test_only_due_undelivered_codes_are_resent(self):
+        due = self.otp(90, email='due@example.com', ref='a')
+        failed = self.otp(90, email='failed@example.com', ref='b', send_result=0)
+        self.otp(10, email='fresh@example.com', ref='c')
+        self.otp(90, email='sent@example.com', ref='d', send_result=1)
+        self.otp(90, email='used@example.com', ref='e', verified=True)
+        self.otp(400, email='expired@example.com', ref='f')
+        self.otp(90, method=OTP.METHOD_PHONE, phone='+2348000000000', ref='g')
+
+        # SELECT, lease UPDATE, one bulk UPDATE for the single chunk
+        with self.assertNumQueries(3):
+            outcome = otp_resend.resend_undelivered()
+
+        self.assertEqual(outcome, {'attempted': 3, 'sent': 3, 'failed': 0, 'skipped': 0, 'deferred': 0})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['due@example.com', 'failed@example.com'])
+        due.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual((due.send_result, due.send_attempts, due.next_retry_at), (1, 1, None))
+        self.assertEqual(failed.send_result, 1)
+
+    def test_failures_back_off_exponentially(self):
+        otp = self.otp(90, email='down@example.com', ref='a')
+        with patch('apps.users.email_providers.send') as send:
+            send.return_value.success = False
+            send.return_value.result = 'smtp down'
+            otp_resend.resend_undelivered()
+            otp.refresh_from_db()
+            self.assertEqual((otp.send_result, otp.send_attempts, otp.send_error), (0, 1, 'smtp down'))
+            self.assertAlmostEqual((otp.next_retry_at - otp.sent_at).total_seconds(), 60)
+
+            # Not due again until the backoff has passed
+            self.assertEqual(otp_resend.resend_undelivered()['attempted'], 0)
+            later = timezone.now() + timedelta(seconds=61)
+            self.assertEqual(otp_resend.resend_undelivered(now=later)['attempted'], 1)
+            otp.refresh_from_db()
+            self.assertAlmostEqual((otp.next_retry_at - otp.sent_at).total_seconds(), 120)
+
+    @override_settings(OTP_RESEND_WORKERS=1)
+    def test_time_budget_defers_the_rest_and_keeps_outcomes(self):
+        first, second = self.otp(95, email='a@example.com', ref='a'), self.otp(90, email='b@example.com', ref='b')
+        # Every clock reading is 50s after the previous one
+        with patch('apps.users.otp_resend.time.monotonic', side_effect=itertools.count(0, 50)):
+            outcome = otp_resend.resend_undelivered(budget=10)
+        self.assertEqual((outcome['attempted'], outcome['deferred']), (1, 1))
+        first.refresh_from_db()
+        self.assertEqual((first.send_result, first.send_attempts), (1, 1))
+
+        # The deferred code is leased for a backoff period, not re-sent by the very next run
+        second.refresh_from_db()
+        self.assertEqual((second.send_attempts, second.send_result), (0, None))
+        self.assertEqual(otp_resend.pending(), [])
+        later = timezone.now() + timedelta(seconds=31)
+        self.assertEqual([o.ref for o in otp_resend.pending(now=later)], ['b'])
+
+    def test_stops_after_max_attempts(self):
+        self.otp(90, email='down@example.com', ref='a', send_result=0, send_attempts=3)
+        self.assertEqual(otp_resend.resend_undelivered()['attempted'], 0)
+
+    def test_superseded_codes_are_skipped(self):
+        self.otp(90, email='user@example.com', ref='old')
+        with patch('apps.users.otp_store.live_refs', return_value=set()):
+            outcome = otp_resend.resend_undelivered()
+        self.assertEqual(outcome['skipped'], 1)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(otp_resend.pending(), [])
+
+    def test_filter_by_email(self):
+        self.otp(90, email='One@Example.com', ref='a')
+        self.otp(90, email='two@example.com', ref='b')
+        self.assertEqual([o.ref for o in otp_resend.pending(emails=['one@example.com'])], ['a'])
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users import otp_store
+from apps.users.models import OTP
+
+
+@override_settings(REDIS_URL=None, SMS_PROVIDER='mock')
+class OTPStoreTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_generate_then_verify_once(self):
+        User = get_user_model()
+        user = User.objects.create_user(phone='+15550100', password='pw')
+        from unittest.mock import patch
+        with patch('apps.users.tasks.send_otp_sms_task.apply_async'):
+            resp = self.client.post('/api/users/otp/generate/', {'method': 'phone', 'phone': '+15550100'})
+        code = resp.json()['code']
+
+        bad = self.client.post('/api/users/otp/verify/', {'phone': '+15550100', 'code': '000000'})
+        self.assertEqual(bad.status_code, 400)
+        ok = self.client.post('/api/users/otp/verify/', {'phone': '+15550100', 'code': code})
+        self.assertEqual(ok.status_code, 200)
+        again = self.client.post('/api/users/otp/verify/', {'phone': '+15550100', 'code': code})
+        self.assertEqual(again.status_code, 400)
+
+        user.refresh_from_db()
+        self.assertTrue(user.is_verified)
+
+    def test_expired_code_rejected(self):
+        issued = otp_store.issue(OTP.METHOD_EMAIL, 'late@example.com')
+        OTP.objects.filter(ref=issued.ref).update(created_at=timezone.now() - timedelta(minutes=10))
+        self.assertIsNone(otp_store.verify(OTP.METHOD_EMAIL, 'late@example.com', issued.code))
+
+    def test_audit_events_applied_in_batches(self):
+        issued_at = timezone.now() - timedelta(seconds=30)
+        events = [
+            {'action': 'issued', 'ref': 'a' * 32, 'method': 'email', 'contact': 'a@example.com',
+             'code': '111111', 'user_id': None, 'at': issued_at.isoformat()},
+            {'action': 'issued', 'ref': 'b' * 32, 'method': 'phone', 'contact': '+1555',
+             'code': '222222', 'user_id': None, 'at': issued_at.isoformat()},
+            {'action': 'sent', 'ref': 'a' * 32, 'success': True, 'error': '', 'at': issued_at.isoformat()},
+            {'action': 'verified', 'ref': 'a' * 32, 'at': timezone.now().isoformat()},
+        ]
+        with self.assertNumQueries(4):
+            otp_store._apply_audit(events)
+
+        a = OTP.objects.get(ref='a' * 32)
+        self.assertTrue(a.verified)
+        self.assertEqual(a.send_result, 1)
+        self.assertEqual(a.created_at, issued_at)
+        self.assertEqual(OTP.objects.get(ref='b' * 32).phone, '+1555')
+
+    def test_purge_deletes_old_rows_in_batches(self):
+        old = timezone.now() - timedelta(days=2)
+        OTP.objects.bulk_create([OTP(phone=f'+1555{i}', code='123456', created_at=old) for i in range(5)])
+        fresh = otp_store.issue(OTP.METHOD_PHONE, '+15559999')
+
+        # 3 batches of 2 rows, each one SELECT of ids and one DELETE
+        with self.assertNumQueries(6):
+            deleted = otp_store.purge_expired(retention_seconds=86400, batch_size=2)
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(OTP.objects.values_list('ref', flat=True)), [fresh.ref])
+
+    def test_purge_keeps_codes_that_have_not_expired(self):
+        issued = otp_store.issue(OTP.METHOD_PHONE, '+15558888')
+        OTP.objects.filter(ref=issued.ref).update(created_at=timezone.now() - timedelta(seconds=60))
+        self.assertEqual(otp_store.purge_expired(retention_seconds=0), 0)
+        self.assertIsNotNone(otp_store.verify(OTP.METHOD_PHONE, '+15558888', issued.code))
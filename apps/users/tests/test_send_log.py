@@ -0,0 +1,63 @@
+import json
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+
+from apps.users import send_log
+from apps.users.email_utils import send_email_with_logging
+from apps.users.models import EmailSendLog
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_PROVIDERS=['smtp'],
+    EMAIL_SEND_LOG_FLUSH_SECONDS=3600, EMAIL_SEND_LOG_BATCH_SIZE=100,
+)
+class SendLogTests(TestCase):
+    def setUp(self):
+        # Records of sends made elsewhere in the process are not this test's to write
+        send_log.writer.discard()
+
+    def test_sends_are_buffered_then_written_in_one_insert(self):
+        with self.assertNumQueries(0):
+            for i in range(3):
+                send_email_with_logging(f'User{i}@Example.com', 'Hello', 'body', otp_ref=f'ref{i}')
+        self.assertEqual(send_log.writer.pending(), 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(send_log.flush(), 3)
+
+        rows = send_log.lookup(recipient='user1@example.com')
+        self.assertEqual([(r.otp_ref, r.success) for r in rows], [('ref1', True)])
+        self.assertEqual(len(send_log.lookup(otp_ref='ref2')), 1)
+
+    def test_lookup_by_otp_id(self):
+        send_log.record('a@example.com', 'Code', False, 'timeout', otp_id=41)
+        send_log.record('a@example.com', 'Code', True, 'OK', otp_id=41)
+        send_log.record('b@example.com', 'Code', True, 'OK', otp_id=42)
+        send_log.flush()
+        self.assertEqual([r.success for r in send_log.lookup(otp_id=41)], [True, False])
+
+    def test_database_failure_falls_back_to_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(EMAIL_SEND_LOG_FALLBACK_PATH=f'{tmp}/send.jsonl'), \
+                patch.object(EmailSendLog.objects, 'bulk_create', side_effect=RuntimeError('db down')), \
+                patch.object(send_log, '_fallback_logger', None):
+            send_log.record('a@example.com', 'Hi', False, 'smtp down', otp_id=7)
+            send_log.flush()
+            for handler in send_log._fallback().handlers:
+                handler.flush()
+            with open(f'{tmp}/send.jsonl') as f:
+                line = json.loads(f.readline())
+            for handler in list(send_log._fallback().handlers):
+                handler.close()
+                send_log._fallback().removeHandler(handler)
+        self.assertEqual((line['to_email'], line['result'], line['otp_id']), ('a@example.com', 'smtp down', 7))
+
+    def test_buffer_is_bounded(self):
+        with override_settings(EMAIL_SEND_LOG_MAX_BUFFER=2):
+            for i in range(5):
+                send_log.record(f'{i}@example.com', 's', True)
+        self.assertEqual(send_log.writer.pending(), 2)
+        send_log.flush()
+        sent = EmailSendLog.objects.filter(to_email__in=[f'{i}@example.com' for i in range(5)])
+        self.assertEqual(sorted(sent.values_list('to_email', flat=True)), ['3@example.com', '4@example.com'])
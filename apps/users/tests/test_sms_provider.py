@@ -0,0 +1,57 @@
+import time
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from requests.models import Response
+
+from apps.users import sms
+
+
+class FakeProvider(sms.SMSProvider):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = set()
+
+    def send(self, phone, message):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        if phone == 'boom':
+            raise RuntimeError('provider error')
+        return phone != 'bad'
+
+
+class SMSProviderTests(SimpleTestCase):
+    @override_settings(SMS_PROVIDER='mock')
+    def test_provider_is_built_once(self):
+        first = sms.get_sms_provider()
+        self.assertIs(sms.get_sms_provider(), first)
+        with override_settings(SMS_SEND_WORKERS=2):
+            # Settings changes rebuild it
+            self.assertIsNot(sms.get_sms_provider(), first)
+
+    def test_send_many_keeps_order_and_isolates_failures(self):
+        provider = FakeProvider()
+        results = provider.send_many([('1', 'a'), ('bad', 'b'), ('boom', 'c'), ('2', 'd')])
+        self.assertEqual(results, [True, False, False, True])
+
+    @override_settings(SMS_SEND_WORKERS=8)
+    def test_send_many_is_concurrent(self):
+        provider = FakeProvider(delay=0.1)
+        started = time.monotonic()
+        provider.send_many([(str(i), 'x') for i in range(8)])
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertGreater(len(provider.threads), 1)
+
+    @override_settings(SMS_PROVIDER='twilio', TWILIO_ACCOUNT_SID='ACtest', TWILIO_AUTH_TOKEN='token',
+                       TWILIO_PHONE_NUMBER='+15005550006', TWILIO_API_BASE_URL='http://127.0.0.1:8089')
+    def test_twilio_client_is_pooled_and_can_use_a_stand_in_api(self):
+        response = Response()
+        response.status_code = 201
+        response._content = b'{"sid": "SM123", "status": "queued"}'
+        provider = sms.get_sms_provider()
+        with patch('requests.Session.send', autospec=True, return_value=response) as send:
+            self.assertTrue(provider.send('+2348000000000', 'hi'))
+            self.assertTrue(sms.get_sms_provider().send('+2348000000001', 'hi'))
+        sessions = {id(call.args[0]) for call in send.call_args_list}
+        self.assertEqual(sessions, {id(provider.client.http_client.session)})
+        self.assertTrue(send.call_args.args[1].url.startswith('http://127.0.0.1:8089/2010-04-01/Accounts/ACtest/'))
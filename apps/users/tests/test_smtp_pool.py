@@ -0,0 +1,89 @@
+import smtplib
+from unittest.mock import patch
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.test import SimpleTestCase, override_settings
+
+from backend_project import email_backend
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, **kwargs):
+        self.sent = []
+        self.noops = 0
+        self.alive = True
+        self.drop_next_send = False
+        FakeSMTP.instances.append(self)
+
+    def login(self, user, password):
+        pass
+
+    def starttls(self, context=None):
+        pass
+
+    def noop(self):
+        self.noops += 1
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected('gone')
+        return (250, b'OK')
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.drop_next_send:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent.append(to_addrs)
+        return {}
+
+    def quit(self):
+        self.alive = False
+
+    def close(self):
+        self.alive = False
+
+
+@override_settings(
+    EMAIL_BACKEND='apps.users.email_backend.UnverifiedEmailBackend',
+    EMAIL_HOST='smtp.test', EMAIL_PORT=587, EMAIL_USE_TLS=True,
+    EMAIL_HOST_USER='u', EMAIL_HOST_PASSWORD='p',
+    EMAIL_POOL_SIZE=2, EMAIL_POOL_NOOP_AFTER_SECONDS=5, EMAIL_POOL_MAX_IDLE_SECONDS=60,
+)
+class SMTPPoolTests(SimpleTestCase):
+    def setUp(self):
+        email_backend.close_pools()
+        email_backend._pools.clear()
+        FakeSMTP.instances = []
+        patcher = patch('smtplib.SMTP', FakeSMTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_connection_reused_across_sends(self):
+        for i in range(5):
+            send_mail('s', 'b', 'from@example.com', [f'to{i}@example.com'])
+        with get_connection() as connection:
+            connection.send_messages([EmailMessage('s', 'b', 'from@example.com', [f'bulk{i}@example.com']) for i in range(10)])
+        self.assertEqual(len(FakeSMTP.instances), 1)
+        self.assertEqual(len(FakeSMTP.instances[0].sent), 15)
+
+    def test_idle_connection_checked_with_noop(self):
+        send_mail('s', 'b', 'from@example.com', ['a@example.com'])
+        first = FakeSMTP.instances[0]
+        with patch('time.monotonic', return_value=10 ** 6 + 10):
+            pool = email_backend.get_pool(next(iter(email_backend._pools)))
+            pool._idle = [(first, 10 ** 6)]
+            send_mail('s', 'b', 'from@example.com', ['b@example.com'])
+        self.assertEqual(first.noops, 1)
+        self.assertEqual(len(FakeSMTP.instances), 1)
+
+        first.alive = False
+        with patch('time.monotonic', return_value=10 ** 6 + 10):
+            pool._idle = [(first, 10 ** 6)]
+            send_mail('s', 'b', 'from@example.com', ['c@example.com'])
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, [['c@example.com']])
+
+    def test_dropped_pooled_connection_retried_once_on_new_one(self):
+        send_mail('s', 'b', 'from@example.com', ['a@example.com'])
+        FakeSMTP.instances[0].drop_next_send = True
+        self.assertEqual(send_mail('s', 'b', 'from@example.com', ['b@example.com']), 1)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, [['b@example.com']])
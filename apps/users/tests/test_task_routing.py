@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from backend_project.celery import app, TASK_QUEUES, WORKER_POOLS
+from apps.users.tasks import send_otp_sms_task, send_otp_email_task, send_email_task
+from apps.notifications.tasks import send_push_batch_task
+
+
+class TaskRoutingTests(SimpleTestCase):
+    def route(self, task):
+        return app.amqp.router.route({}, task.name)['queue'].name
+
+    def test_tasks_routed_by_priority(self):
+        self.assertEqual(self.route(send_otp_sms_task), 'otp')
+        self.assertEqual(self.route(send_otp_email_task), 'otp')
+        self.assertEqual(self.route(send_push_batch_task), 'push')
+        self.assertEqual(self.route(send_email_task), 'email')
+
+    def test_every_queue_has_a_worker_pool(self):
+        served = {q for pool in WORKER_POOLS.values() for q in pool['queues']}
+        self.assertEqual(served, set(TASK_QUEUES))
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+from django.conf import settings
+from django.test import TestCase, SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.users import otp_store
+from apps.users.models import OTP
+from backend_project import throttling
+
+
+def rates(**overrides):
+    config = dict(settings.REST_FRAMEWORK)
+    config['DEFAULT_THROTTLE_RATES'] = {'otp_ip': '100/hour', 'otp_contact': '100/hour', 'otp_device': '100/hour', **overrides}
+    return config
+
+
+@override_settings(REDIS_URL=None, SMS_PROVIDER='mock')
+class OTPThrottleTests(TestCase):
+    def setUp(self):
+        throttling.reset_local()
+        self.client = APIClient()
+
+    def generate(self, phone, **extra):
+        return self.client.post('/api/users/otp/generate/', {'method': 'phone', 'phone': phone}, **extra)
+
+    def test_contact_limit_rejects_before_issuing(self):
+        with override_settings(REST_FRAMEWORK=rates(otp_contact='1/30s')), \
+                patch('apps.users.tasks.send_otp_sms_task.apply_async') as send, \
+                patch.object(otp_store, 'issue', wraps=otp_store.issue) as issue:
+            self.assertEqual(self.generate('+15550111').status_code, 200)
+            resp = self.generate('+15550111')
+            self.assertEqual(resp.status_code, 429)
+            self.assertIn('Retry-After', resp)
+            self.assertEqual(self.generate('+15550112').status_code, 200)
+
+        self.assertEqual(issue.call_count, 2)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(OTP.objects.filter(phone='+15550111').count(), 1)
+
+    def test_ip_and_device_limits(self):
+        with override_settings(REST_FRAMEWORK=rates(otp_device='2/hour', otp_ip='3/hour')), \
+                patch('apps.users.tasks.send_otp_sms_task.apply_async'):
+            statuses = [self.generate(f'+1555020{i}', HTTP_X_DEVICE_ID='dev-1').status_code for i in range(3)]
+            self.assertEqual(statuses, [200, 200, 429])
+            # Another device from the same IP still counts against the IP limit
+            self.assertEqual(self.generate('+15550210', HTTP_X_DEVICE_ID='dev-2').status_code, 200)
+            self.assertEqual(self.generate('+15550211', HTTP_X_DEVICE_ID='dev-3').status_code, 429)
+
+
+class ParseRatesTests(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(throttling.parse_rates('5/hour'), [(5, 3600)])
+        self.assertEqual(throttling.parse_rates('1/30s, 5/15m'), [(1, 30), (5, 900)])
+        self.assertEqual(throttling.parse_rates(None), [])
+        with self.assertRaises(ValueError):
+            throttling.parse_rates('5/fortnight')
+
+    def test_local_window_slides(self):
+        throttling.reset_local()
+        windows = [('k', 2, 1000)]
+        self.assertEqual(throttling._hit_local(windows, 0), 0)
+        self.assertEqual(throttling._hit_local(windows, 400), 0)
+        self.assertEqual(throttling._hit_local(windows, 500), 500)
+        self.assertEqual(throttling._hit_local(windows, 1000), 0)
+
+    def test_local_map_is_bounded(self):
+        throttling.reset_local()
+        with patch.object(throttling, 'MAX_LOCAL_KEYS', 10):
+            throttling._hit_local([('active', 1, 10_000)], 0)
+            for i in range(9):
+                throttling._hit_local([(f'old{i}', 5, 100)], 0)
+            # Over the cap: expired keys go first, the active one keeps its hit
+            throttling._hit_local([('new', 5, 100)], 500)
+            throttling._hit_local([('newer', 5, 100)], 500)
+            self.assertEqual(list(throttling._local), ['active', 'new', 'newer'])
+            self.assertEqual(throttling._hit_local([('active', 1, 10_000)], 600), 9400)
+
+            for i in range(20):
+                throttling._hit_local([(f'live{i}', 5, 10_000)], 700)
+            self.assertLessEqual(len(throttling._local), 10)
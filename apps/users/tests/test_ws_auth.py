@@ -0,0 +1,44 @@
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.db import OperationalError
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend_project.token_auth_middleware import TokenAuthMiddleware, clear_user_cache
+
+
+class TokenAuthMiddlewareTests(TestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.user = get_user_model().objects.create_user(email='ws@example.com', password='pw')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.seen = []
+
+        async def inner(scope, receive, send):
+            self.seen.append(scope['user'])
+
+        self.middleware = TokenAuthMiddleware(inner)
+
+    def _connect(self, query_string):
+        scope = {'type': 'websocket', 'query_string': query_string.encode(), 'headers': []}
+        async_to_sync(self.middleware)(scope, None, None)
+        return self.seen[-1]
+
+    @override_settings(WS_AUTH_USER_CACHE_TTL_SECONDS=60)
+    def test_reconnects_reuse_cached_user(self):
+        """Repeated connects with the same token should resolve the user from the DB only once."""
+        with self.assertNumQueries(1):
+            for _ in range(5):
+                user = self._connect(f'token={self.token}')
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_invalid_token_is_anonymous(self):
+        user = self._connect('token=not-a-jwt')
+        self.assertFalse(user.is_authenticated)
+
+    @override_settings(WS_AUTH_USER_CACHE_TTL_SECONDS=60)
+    def test_db_error_is_not_cached(self):
+        with patch('django.db.models.query.QuerySet.get', side_effect=OperationalError('db down')):
+            self.assertFalse(self._connect(f'token={self.token}').is_authenticated)
+        self.assertEqual(self._connect(f'token={self.token}').pk, self.user.pk)
@@ -0,0 +1,23 @@
+from backend_project.throttling import SlidingWindowThrottle
+
+
+class OTPThrottle(SlidingWindowThrottle):
+    """Limit OTP issuance per client IP, per phone/email and per device.
+
+    The device is identified by the `X-Device-ID` header or a `device_id`
+    field. Limits are the `otp_ip`, `otp_contact` and `otp_device` rates.
+    """
+
+    scope = 'otp'
+
+    def get_idents(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        method = data.get('method', 'phone')
+        contact = data.get('email') if method == 'email' else data.get('phone')
+        contact = str(contact).strip().lower() if contact else None
+        device = request.META.get('HTTP_X_DEVICE_ID') or data.get('device_id')
+        return {
+            'ip': self.get_ident(request),
+            'contact': f'{method}:{contact}' if contact else None,
+            'device': str(device)[:128] if device else None,
+        }
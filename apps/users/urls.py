@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     RegisterView, ListUsersView, UserDetailView, ProfileView, 
-    generate_otp, verify_otp, DeviceRegisterView, 
+    generate_otp, verify_otp, otp_status, DeviceRegisterView, 
     ObtainTokenPairView, RefreshTokenView, logout_view,
     OTPListView, DeviceListView, test_email_view,
     DriverProfileView, DriverProfileCreateView
@@ -22,6 +22,7 @@ urlpatterns = [
     path('logout/', logout_view, name='logout'),
     path('otp/generate/', generate_otp, name='otp_generate'),
     path('otp/verify/', verify_otp, name='otp_verify'),
+    path('otp/status/<str:ref>/', otp_status, name='otp_status'),
     path('otps/', OTPListView.as_view(), name='otp_list'),  # Admin OTP list
     path('devices/', DeviceRegisterView.as_view(), name='device_register'),
     path('devices/list/', DeviceListView.as_view(), name='device_list'),  # Admin device list
@@ -2,17 +2,18 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.contrib.auth import get_user_model
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import CustomTokenObtainPairSerializer
 from .serializers import RegisterSerializer, UserSerializer, ProfileSerializer, DeviceSerializer, OTPSerializer
 from .models import OTP, Device
+from . import otp_store
+from .throttles import OTPThrottle
 from django.utils import timezone
-import random
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.conf import settings
-from .email_utils import send_email_with_logging
+from .email_utils import queue_email, queue_admin_notification
 from .serializers import RiderProfileSerializer
 from .models import RiderProfile
 from rest_framework.permissions import IsAdminUser
@@ -82,144 +83,65 @@ class RegisterView(generics.CreateAPIView):
         verification_method = getattr(user, '_verification_method', self.request.data.get('verification_method', 'phone'))
         
         try:
+            from backend_project.task_spool import enqueue
             if verification_method == 'email':
-                # Send OTP via email
-                code = str(random.randint(100000, 999999))
-                otp = OTP.objects.create(user=user, email=user.email, code=code, method='email')
-                
-                # Send using EmailJS (API based, reliable)
-                print(f"[INFO] Sending OTP email via EmailJS to {user.email}")
-                from .email_utils import send_email_via_emailjs
-                
-                # Run in background if possible, but for now call directly to ensure it works
-                try:
-                    result = send_email_via_emailjs(
-                        to_email=user.email,
-                        subject="Your AAfri Ride Verification Code",
-                        message=f"Your code is: {code}\n\nValid for 5 minutes.",
-                        otp=otp,
-                        code=code
-                    )
-                    if result['success']:
-                        print(f"[OK] OTP email sent via EmailJS to {user.email}")
-                    else:
-                        print(f"[ERROR] EmailJS failed: {result['result']}")
-                        otp.send_error = str(result['result'])
-                        otp.save(update_fields=['send_error'])
-                except Exception as email_error:
-                    print(f"[ERROR] EmailJS exception: {email_error}")
-                    otp.send_error = str(email_error)
-                    otp.save(update_fields=['send_error'])
+                # Queue the OTP email (the request does not wait for EmailJS/SMTP)
+                issued = otp_store.issue(OTP.METHOD_EMAIL, user.email, user=user)
+                self._otp_code, self._otp_ref = issued.code, issued.ref
+                from .tasks import send_otp_email_task
+                enqueue(send_otp_email_task, (user.email, issued.code), {'ref': issued.ref})
             
             elif verification_method == 'phone':
-                # Send OTP via SMS
+                # Queue the OTP SMS
                 if user.phone:
-                    code = str(random.randint(100000, 999999))
-                    OTP.objects.create(user=user, phone=user.phone, code=code, method='phone')
-                    
-                    from .sms import send_otp_sms
-                    try:
-                        send_otp_sms(user.phone, code)
-                        print(f"[OK] OTP SMS sent to {user.phone}")
-                    except Exception as sms_error:
-                        print(f"[ERROR] Failed to send OTP SMS: {sms_error}")
+                    issued = otp_store.issue(OTP.METHOD_PHONE, user.phone, user=user)
+                    self._otp_code, self._otp_ref = issued.code, issued.ref
+                    from .tasks import send_otp_sms_task
+                    enqueue(send_otp_sms_task, (user.phone, issued.code), {'ref': issued.ref})
         except Exception as e:
             # Don't fail registration if OTP sending fails
             print(f"[ERROR] in perform_create: {e}")
             import traceback
             traceback.print_exc()
 
-        # If this is a rider registration, send application acknowledgement to user
+        # If this is a rider registration, queue the application acknowledgement
+        # and one notification to support and staff (sent by the email workers)
         try:
                 if getattr(user, 'role', '') == getattr(User, 'RIDER', 'rider'):
                     # Determine template ids (allow env override; fall back to provided id)
                     driver_template = os.getenv('EMAILJS_TEMPLATE_ID_DRIVER', 'template_r06t37s')
-                    support_template = os.getenv('EMAILJS_TEMPLATE_ID_SUPPORT', os.getenv('EMAILJS_TEMPLATE_ID_DRIVER', 'template_r06t37s'))
-                    admin_template = os.getenv('EMAILJS_TEMPLATE_ID_ADMIN', support_template)
-
-                    # Prepare a place to capture send results for later inspection
-                    try:
-                        self._email_send_results = {}
-                    except Exception:
-                        self._email_send_results = {}
-
-                    # Send email to user acknowledging application and expected wait time
-                    user_email = user.email
-                    if user_email:
-                        try:
-                            res_user = send_email_with_logging(
-                                to_email=user_email,
-                                subject='AAfri Ride - Driver Application Received',
-                                message=('Thank you. Your driver application has been received and is under review by our team. '
-                                         'Please allow 24-48 hours for our team to review your application. We will notify you once it is approved.'),
-                                emailjs_template_id=driver_template,
-                                template_vars={
-                                    'first_name': user.first_name,
-                                    'last_name': user.last_name,
-                                    'applicant_email': user.email,
-                                    'applicant_phone': user.phone or '',
-                                    'application_date': timezone.now().isoformat(),
-                                    'status_url': os.getenv('APPLICATION_STATUS_URL', ''),
-                                }
-                            )
-                            self._email_send_results['user'] = res_user
-                        except Exception as e:
-                            self._email_send_results['user'] = {'success': False, 'result': str(e)}
-
-                    # Notify staff/admin users (deduplicated) and record their results
-                    try:
-                        staff_emails = list(User.objects.filter(is_staff=True).exclude(email__isnull=True).exclude(email__exact='').values_list('email', flat=True))
-                        # dedupe and exclude the explicit support email to avoid double-send
-                        unique_admins = [e for e in dict.fromkeys(staff_emails) if e and e.lower() != 'support@aafriride.com']
-                        admin_results = {}
-                        for admin_email in unique_admins:
-                            try:
-                                res_admin = send_email_with_logging(
-                                    to_email=admin_email,
-                                    subject='New Driver Application',
-                                    message=f'A new driver application was submitted by {user.email or user.phone}. Please review in the admin panel.',
-                                    emailjs_template_id=admin_template,
-                                    template_vars={
-                                        'first_name': user.first_name,
-                                        'last_name': user.last_name,
-                                        'applicant_email': user.email,
-                                        'applicant_phone': user.phone or '',
-                                        'application_date': timezone.now().isoformat(),
-                                        'admin_review_url': os.getenv('ADMIN_REVIEW_URL', ''),
-                                    }
-                                )
-                                admin_results[admin_email] = res_admin
-                            except Exception as e:
-                                admin_results[admin_email] = {'success': False, 'result': str(e)}
-                        self._email_send_results['admins'] = admin_results
-                    except Exception:
-                        self._email_send_results['admins'] = {}
-
-                    # Always notify support@aafriride.com with applicant details for operational tracking
-                    try:
-                        support_msg = (
-                            f'New driver application received:\n\n'
-                            f'Name: {user.first_name} {user.last_name}\n'
-                            f'Email: {user.email}\n'
-                            f'Phone: {user.phone}\n'
-                            f'Registered at: {timezone.now().isoformat()}'
-                        )
-                        res_support = send_email_with_logging(
-                            to_email='support@aafriride.com',
-                            subject='New Driver Application Submitted',
-                            message=support_msg,
-                            emailjs_template_id=support_template,
-                            template_vars={
+
+                    # Queue results are reported back in the response
+                    self._email_send_results = {}
+
+                    # Email the user acknowledging application and expected wait time
+                    if user.email:
+                        self._email_send_results['user'] = queue_email(
+                            user.email,
+                            'AAfri Ride - Driver Application Received',
+                            ('Thank you. Your driver application has been received and is under review by our team. '
+                             'Please allow 24-48 hours for our team to review your application. We will notify you once it is approved.'),
+                            driver_template,
+                            {
                                 'first_name': user.first_name,
                                 'last_name': user.last_name,
                                 'applicant_email': user.email,
                                 'applicant_phone': user.phone or '',
                                 'application_date': timezone.now().isoformat(),
-                            }
+                                'status_url': os.getenv('APPLICATION_STATUS_URL', ''),
+                            },
                         )
-                        self._email_send_results['support'] = res_support
-                    except Exception as e:
-                        self._email_send_results['support'] = {'success': False, 'result': str(e)}
+
+                    # Notify support and all staff with a single message
+                    self._email_send_results['admins'] = queue_admin_notification(
+                        'New Driver Application Submitted',
+                        f'New driver application received:\n\n'
+                        f'Name: {user.first_name} {user.last_name}\n'
+                        f'Email: {user.email}\n'
+                        f'Phone: {user.phone}\n'
+                        f'Registered at: {timezone.now().isoformat()}\n\n'
+                        f'Please review in the admin panel. {os.getenv("ADMIN_REVIEW_URL", "")}'.rstrip(),
+                    )
         except Exception:
             pass
 
@@ -234,24 +156,20 @@ class RegisterView(generics.CreateAPIView):
                     response.data['detail'] = 'User registered successfully. Check your email for OTP verification code.'
                     response.data['verification_method'] = 'email'
                     response.data['contact'] = user_email
-                    # Get the latest OTP for this email
-                    try:
-                        latest_otp = OTP.objects.filter(email=user_email, method='email').latest('created_at')
-                        response.data['otp_code'] = latest_otp.code  # For testing purposes
-                    except OTP.DoesNotExist:
-                        pass
+                    # Code issued in perform_create (no need to read it back)
+                    if getattr(self, '_otp_code', None):
+                        response.data['otp_code'] = self._otp_code  # For testing purposes
+                        response.data['otp_ref'] = self._otp_ref
                 else:
                     user_phone = request.data.get('phone')
                     response.data['detail'] = 'User registered successfully. Check your phone for OTP verification code.'
                     self._email_send_results = {}
                     response.data['verification_method'] = 'phone'
                     response.data['contact'] = user_phone
-                    # Get the latest OTP for this phone
-                    try:
-                        latest_otp = OTP.objects.filter(phone=user_phone, method='phone').latest('created_at')
-                        response.data['otp_code'] = latest_otp.code  # For testing purposes
-                    except OTP.DoesNotExist:
-                        pass
+                    # Code issued in perform_create (no need to read it back)
+                    if getattr(self, '_otp_code', None):
+                        response.data['otp_code'] = self._otp_code  # For testing purposes
+                        response.data['otp_ref'] = self._otp_ref
             
             return response
         except Exception as e:
@@ -332,34 +250,21 @@ class DriverProfileView(generics.RetrieveUpdateAPIView):
                 profile.submitted_at = timezone.now()
                 profile.save()
                 
-                # Send confirmation email to driver
-                try:
-                    from .email_utils import send_email_with_logging
-                    send_email_with_logging(
-                        to_email=user.email,
-                        subject='AAfri Ride - Documents Submitted',
-                        message=f'Thank you for submitting your driver documents. Your application is under review.',
+                # Queue confirmation email to driver and notify admins
+                if user.email:
+                    queue_email(
+                        user.email,
+                        'AAfri Ride - Documents Submitted',
+                        'Thank you for submitting your driver documents. Your application is under review.',
                         template_vars={
                             'first_name': user.first_name,
                             'last_name': user.last_name,
-                        }
+                        },
                     )
-                except Exception as e:
-                    print(f"Warning: Could not send submission email: {e}")
-                
-                # Notify admin
-                try:
-                    send_email_with_logging(
-                        to_email='support@aafriride.com',
-                        subject='New Driver Application',
-                        message=f'New driver application submitted by {user.email}',
-                        template_vars={
-                            'applicant_email': user.email,
-                            'applicant_name': f'{user.first_name} {user.last_name}',
-                        }
-                    )
-                except Exception as e:
-                    print(f"Warning: Could not send admin notification: {e}")
+                queue_admin_notification(
+                    'New Driver Application',
+                    f'New driver application submitted by {user.first_name} {user.last_name} ({user.email or user.phone})',
+                )
             
             return Response(serializer.data)
         
@@ -400,24 +305,25 @@ class DriverProfileCreateView(generics.CreateAPIView):
         # Create the profile
         profile = serializer.save(user=user, submitted_at=timezone.now())
         
-        # Send notifications
-        try:
-            from .email_utils import send_email_with_logging
-            send_email_with_logging(
-                to_email=user.email,
-                subject='AAfri Ride - Documents Submitted',
-                message=f'Thank you for submitting your driver documents. Your application is under review.',
+        # Queue notifications
+        if user.email:
+            queue_email(
+                user.email,
+                'AAfri Ride - Documents Submitted',
+                'Thank you for submitting your driver documents. Your application is under review.',
                 template_vars={
                     'first_name': user.first_name,
                     'last_name': user.last_name,
-                }
+                },
             )
-        except Exception as e:
-            print(f"Warning: Could not send submission email: {e}")
-
+        queue_admin_notification(
+            'New Driver Application',
+            f'New driver application submitted by {user.first_name} {user.last_name} ({user.email or user.phone})',
+        )
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPThrottle])
 def generate_otp(request):
     method = request.data.get('method', 'phone')  # 'email' or 'phone'
     
@@ -425,39 +331,36 @@ def generate_otp(request):
         email = request.data.get('email')
         if not email:
             return Response({'detail': 'email required'}, status=status.HTTP_400_BAD_REQUEST)
-        code = str(random.randint(100000, 999999))
-        otp = OTP.objects.create(email=email, code=code, method='email')
-        
-        # Send using EmailJS
-        from .email_utils import send_email_via_emailjs
+        issued = otp_store.issue(OTP.METHOD_EMAIL, email)
+        code = issued.code
+
+        # Queue the email on the OTP queue (non-blocking; spooled if the broker is down).
+        # Clients can poll otp/status/<ref>/ for delivery.
+        from .tasks import send_otp_email_task
+        from backend_project.task_spool import enqueue
         try:
-            send_email_via_emailjs(
-                to_email=email,
-                subject="Your AAfri Ride Verification Code",
-                message=f"Your code is: {code}\n\nValid for 10 minutes.",
-                otp=otp,
-                code=code
-            )
+            enqueue(send_otp_email_task, (email, code), {'ref': issued.ref})
         except Exception as e:
-            print(f"Warning: Could not send email via EmailJS: {e}")
-        
-        return Response({'email': email, 'code': code, 'method': 'email', 'detail': 'OTP sent to email'})
-    
+            print(f"Warning: Could not queue OTP email task: {e}")
+
+        return Response({'email': email, 'code': code, 'ref': issued.ref, 'method': 'email', 'detail': 'OTP sent to email'})
+
     else:  # phone method
         phone = request.data.get('phone')
         if not phone:
             return Response({'detail': 'phone required'}, status=status.HTTP_400_BAD_REQUEST)
-        code = str(random.randint(100000, 999999))
-        otp = OTP.objects.create(phone=phone, code=code, method='phone')
-        
-        # Queue async SMS task (non-blocking)
+        issued = otp_store.issue(OTP.METHOD_PHONE, phone)
+        code = issued.code
+
+        # Queue async SMS task (non-blocking; spooled if the broker is down)
         from .tasks import send_otp_sms_task
+        from backend_project.task_spool import enqueue
         try:
-            send_otp_sms_task.delay(phone, code)
+            enqueue(send_otp_sms_task, (phone, code), {'ref': issued.ref})
         except Exception as e:
             print(f"Warning: Could not queue SMS task: {e}")
-        
-        return Response({'phone': phone, 'code': code, 'method': 'phone', 'detail': 'OTP sent to phone'})
+
+        return Response({'phone': phone, 'code': code, 'ref': issued.ref, 'method': 'phone', 'detail': 'OTP sent to phone'})
 
 
 @api_view(['POST'])
@@ -485,54 +388,59 @@ def verify_otp(request):
     if method == 'email':
         if not email:
             return Response({'detail': 'email required when using email verification method'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            otp = OTP.objects.filter(email=email, code=code, verified=False, method='email').latest('created_at')
-        except OTP.DoesNotExist:
-            return Response({'detail': 'Invalid OTP or already verified'}, status=status.HTTP_400_BAD_REQUEST)
+        contact = email
     else:  # phone method
         if not phone:
             return Response({'detail': 'phone required when using phone verification method'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            otp = OTP.objects.filter(phone=phone, code=code, verified=False, method='phone').latest('created_at')
-        except OTP.DoesNotExist:
-            return Response({'detail': 'Invalid OTP or already verified'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    if otp.is_expired:
-        return Response({'detail': 'OTP expired'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    otp.verified = True
-    otp.save()
-    
+        contact = phone
+
+    # Atomic compare-and-delete in Redis (or a conditional UPDATE on the DB fallback)
+    verified = otp_store.verify(method, contact, code)
+    if verified is None:
+        return Response({'detail': 'Invalid or expired OTP'}, status=status.HTTP_400_BAD_REQUEST)
+
     # Mark user as verified
-    if otp.user:
+    if verified.user_id:
         # If OTP has associated user, use it
-        otp.user.is_verified = True
-        otp.user.save()
-    elif method == 'email' and email:
-        # If OTP was for email, find user by email
-        try:
-            user = User.objects.get(email=email)
-            user.is_verified = True
-            user.save()
-        except User.DoesNotExist:
-            pass
-    elif method == 'phone' and phone:
-        # If OTP was for phone, find user by phone
-        try:
-            user = User.objects.get(phone=phone)
-            user.is_verified = True
-            user.save()
-        except User.DoesNotExist:
-            pass
-    
+        User.objects.filter(pk=verified.user_id).update(is_verified=True)
+    elif method == 'email':
+        User.objects.filter(email=email).update(is_verified=True)
+    else:
+        User.objects.filter(phone=phone).update(is_verified=True)
+
     return Response({'detail': 'verified', 'method': method})
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def otp_status(request, ref):
+    """Delivery status of an OTP (pending, sent, failed or verified) by its ref"""
+    result = otp_store.status(ref)
+    if result is None:
+        return Response({'detail': 'Unknown OTP reference'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'ref': ref, **result})
+
+
 class DeviceRegisterView(generics.CreateAPIView):
     serializer_class = DeviceSerializer
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        from apps.notifications.dispatcher import invalidate_user_tokens
+        user = self.request.user
+        token = serializer.validated_data['token']
+        # A token belongs to one app install: move it away from whoever held it
+        # before and refresh this user's row instead of adding a duplicate.
+        previous_owners = set(
+            Device.objects.filter(token=token).exclude(user=user).values_list('user_id', flat=True)
+        )
+        if previous_owners:
+            Device.objects.filter(token=token).exclude(user=user).delete()
+        device, _ = Device.objects.update_or_create(
+            user=user, token=token,
+            defaults={'platform': serializer.validated_data.get('platform', '')},
+        )
+        serializer.instance = device
+        invalidate_user_tokens(user.pk, *previous_owners)
 
 
 class ObtainTokenPairView(TokenObtainPairView):
@@ -583,7 +491,7 @@ class OTPListView(generics.ListAPIView):
         # Filter by verification status
         is_verified = self.request.query_params.get('is_verified')
         if is_verified is not None:
-            queryset = queryset.filter(is_verified=is_verified.lower() == 'true')
+            queryset = queryset.filter(verified=is_verified.lower() == 'true')
         
         # Search by email or phone
         search = self.request.query_params.get('search')
@@ -665,50 +573,22 @@ class AdminDriverViewSet(viewsets.ViewSet):
                 profile.is_approved = True
                 profile.save()
 
-                # notify user
-                try:
-                    if user.email:
-                        res_user = send_email_with_logging(
-                            to_email=user.email,
-                            subject='AAfri Ride - Driver Account Created and Approved',
-                            message='Your driver account was created and approved by admin. You can now login.',
-                            template_vars={
-                                'first_name': user.first_name,
-                                'last_name': user.last_name,
-                                'applicant_email': user.email,
-                            }
-                        )
-                        # Convert result to a simple user-facing sentence
-                        if isinstance(res_user, dict) and res_user.get('success'):
-                            email_results['user'] = f"Email sent to {user.email}"
-                        else:
-                            # include failure reason if available
-                            reason = res_user.get('result') if isinstance(res_user, dict) else str(res_user)
-                            email_results['user'] = f"Failed to send email to {user.email}: {reason}"
-                except Exception as e:
-                    email_results['user'] = f"Failed to send email to {user.email}: {str(e)}"
-
-                # also notify support email
-                try:
-                    res_support = send_email_with_logging(
-                        to_email='support@aafriride.com',
-                        subject='New Driver Created and Approved',
-                        message=f'Driver {user.email or user.phone} was created and approved by admin.',
+                # queue the user email and one support/staff notification
+                if user.email:
+                    email_results['user'] = queue_email(
+                        user.email,
+                        'AAfri Ride - Driver Account Created and Approved',
+                        'Your driver account was created and approved by admin. You can now login.',
                         template_vars={
                             'first_name': user.first_name,
                             'last_name': user.last_name,
                             'applicant_email': user.email,
-                            'applicant_phone': user.phone or '',
-                            'application_date': timezone.now().isoformat(),
-                        }
+                        },
                     )
-                    if isinstance(res_support, dict) and res_support.get('success'):
-                        email_results['support'] = f"Email sent to support@aafriride.com"
-                    else:
-                        reason = res_support.get('result') if isinstance(res_support, dict) else str(res_support)
-                        email_results['support'] = f"Failed to send email to support@aafriride.com: {reason}"
-                except Exception as e:
-                    email_results['support'] = f"Failed to send email to support@aafriride.com: {str(e)}"
+                email_results['support'] = queue_admin_notification(
+                    'New Driver Created and Approved',
+                    f'Driver {user.email or user.phone} was created and approved by admin.',
+                )
 
             serialized = RiderProfileSerializer(profile, context={'request': request}).data
             # Always return a simple message when the profile is created
@@ -733,50 +613,24 @@ class AdminDriverViewSet(viewsets.ViewSet):
         profile.is_approved = True
         profile.save()
         email_results = {}
-        # notify the user
-        try:
-            if profile.user and profile.user.email:
-                res_user = send_email_with_logging(
-                    to_email=profile.user.email,
-                    subject='AAfri Ride - Driver Application Approved',
-                    message='Congratulations — your driver application has been approved. You can now log in and start driving.',
-                    template_vars={
-                        'first_name': profile.user.first_name,
-                        'last_name': profile.user.last_name,
-                        'applicant_email': profile.user.email,
-                        'approval_date': timezone.now().isoformat(),
-                        'login_url': os.getenv('FRONTEND_LOGIN_URL', ''),
-                    }
-                )
-                if isinstance(res_user, dict) and res_user.get('success'):
-                    email_results['user'] = f"Approval email sent to {profile.user.email}"
-                else:
-                    reason = res_user.get('result') if isinstance(res_user, dict) else str(res_user)
-                    email_results['user'] = f"Failed to send approval email to {profile.user.email}: {reason}"
-        except Exception as e:
-            email_results['user'] = f"Failed to send approval email to {profile.user.email}: {str(e)}"
-
-        # Notify support as well
-        try:
-            res_support = send_email_with_logging(
-                to_email='support@aafriride.com',
-                subject='Driver Application Approved',
-                message=f'Driver {profile.user.email or profile.user.phone} has been approved.',
+        # queue the user email and one support/staff notification
+        if profile.user and profile.user.email:
+            email_results['user'] = queue_email(
+                profile.user.email,
+                'AAfri Ride - Driver Application Approved',
+                'Congratulations — your driver application has been approved. You can now log in and start driving.',
                 template_vars={
                     'first_name': profile.user.first_name,
                     'last_name': profile.user.last_name,
                     'applicant_email': profile.user.email,
-                    'applicant_phone': profile.user.phone or '',
                     'approval_date': timezone.now().isoformat(),
-                }
+                    'login_url': os.getenv('FRONTEND_LOGIN_URL', ''),
+                },
             )
-            if isinstance(res_support, dict) and res_support.get('success'):
-                email_results['support'] = f"Notification sent to support@aafriride.com"
-            else:
-                reason = res_support.get('result') if isinstance(res_support, dict) else str(res_support)
-                email_results['support'] = f"Failed to notify support@aafriride.com: {reason}"
-        except Exception as e:
-            email_results['support'] = f"Failed to notify support@aafriride.com: {str(e)}"
+        email_results['support'] = queue_admin_notification(
+            'Driver Application Approved',
+            f'Driver {profile.user.email or profile.user.phone} has been approved.',
+        )
 
         # Return a simple approval message and plain email results
         return Response({'detail': 'Driver application approved.', 'email_send_results': email_results})
@@ -801,54 +655,27 @@ class AdminDriverViewSet(viewsets.ViewSet):
         profile.save()
 
         email_results = {}
-        # notify the user with the reason
-        try:
-            if profile.user and profile.user.email:
-                msg = 'We are sorry to inform you that your driver application was not approved.'
-                if reason:
-                    msg += f"\n\nReason provided by admin: {reason}"
-                res_user = send_email_with_logging(
-                    to_email=profile.user.email,
-                    subject='AAfri Ride - Driver Application Not Approved',
-                    message=msg,
-                    template_vars={
-                        'first_name': profile.user.first_name,
-                        'last_name': profile.user.last_name,
-                        'applicant_email': profile.user.email,
-                        'disapproval_reason': reason,
-                        'disapproved_at': timezone.now().isoformat(),
-                    }
-                )
-                if isinstance(res_user, dict) and res_user.get('success'):
-                    email_results['user'] = f"Disapproval email sent to {profile.user.email}"
-                else:
-                    reason_text = res_user.get('result') if isinstance(res_user, dict) else str(res_user)
-                    email_results['user'] = f"Failed to send disapproval email to {profile.user.email}: {reason_text}"
-        except Exception as e:
-            email_results['user'] = f"Failed to send disapproval email to {profile.user.email}: {str(e)}"
-
-        # also notify support
-        try:
-            res_support = send_email_with_logging(
-                to_email='support@aafriride.com',
-                subject='Driver Application Disapproved',
-                message=f'Driver {profile.user.email or profile.user.phone} was disapproved. Reason: {reason}',
+        # queue the user email (with the reason) and one support/staff notification
+        if profile.user and profile.user.email:
+            msg = 'We are sorry to inform you that your driver application was not approved.'
+            if reason:
+                msg += f"\n\nReason provided by admin: {reason}"
+            email_results['user'] = queue_email(
+                profile.user.email,
+                'AAfri Ride - Driver Application Not Approved',
+                msg,
                 template_vars={
                     'first_name': profile.user.first_name,
                     'last_name': profile.user.last_name,
                     'applicant_email': profile.user.email,
-                    'applicant_phone': profile.user.phone or '',
                     'disapproval_reason': reason,
                     'disapproved_at': timezone.now().isoformat(),
-                }
+                },
             )
-            if isinstance(res_support, dict) and res_support.get('success'):
-                email_results['support'] = f"Notification sent to support@aafriride.com"
-            else:
-                reason_text = res_support.get('result') if isinstance(res_support, dict) else str(res_support)
-                email_results['support'] = f"Failed to notify support@aafriride.com: {reason_text}"
-        except Exception as e:
-            email_results['support'] = f"Failed to notify support@aafriride.com: {str(e)}"
+        email_results['support'] = queue_admin_notification(
+            'Driver Application Disapproved',
+            f'Driver {profile.user.email or profile.user.phone} was disapproved. Reason: {reason}',
+        )
 
         return Response({'detail': 'Driver application disapproved.', 'email_send_results': email_results})
 
@@ -0,0 +1,122 @@
+"""
+In-memory write buffer drained in batches by a background thread.
+
+    writer = BufferedWriter('email-send-log', write_batch, settings_prefix='EMAIL_SEND_LOG')
+    writer.put(record)
+
+`put()` only appends to a bounded deque, so the caller never waits on the
+database or disk. A daemon thread hands the buffered items to `write_batch`
+every `<prefix>_FLUSH_SECONDS`, or as soon as `<prefix>_BATCH_SIZE` items
+are waiting. When `<prefix>_MAX_BUFFER` items are buffered the oldest are
+dropped and counted. Buffers
+are per process: a forked child starts with an empty buffer and its own
+thread, and everything left is written at interpreter exit (and on Celery
+worker process shutdown, see backend_project.celery).
+
+With `<prefix>_FLUSH_SECONDS = 0` there is no thread and `put()` writes
+synchronously, which is what tests use.
+"""
+import os
+import atexit
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_writers = []
+
+
+class BufferedWriter:
+    def __init__(self, name, write_batch, settings_prefix, batch_size=200, interval=2.0, max_buffer=10000):
+        self.name = name
+        self.write_batch = write_batch
+        self.settings_prefix = settings_prefix
+        self.defaults = {'BATCH_SIZE': batch_size, 'FLUSH_SECONDS': interval, 'MAX_BUFFER': max_buffer}
+        self.dropped = 0
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        _writers.append(self)
+
+    def _setting(self, name):
+        return getattr(settings, f'{self.settings_prefix}_{name}', self.defaults[name])
+
+    @property
+    def batch_size(self):
+        return max(1, int(self._setting('BATCH_SIZE')))
+
+    @property
+    def interval(self):
+        return float(self._setting('FLUSH_SECONDS'))
+
+    def put(self, item):
+        if self.interval <= 0:
+            self._write([item])
+            return
+        with self._lock:
+            self._check_pid()
+            if len(self._buffer) >= self._setting('MAX_BUFFER'):
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(item)
+            pending = len(self._buffer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-writer', daemon=True)
+                self._thread.start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of items handed to write_batch."""
+        total = 0
+        while True:
+            with self._lock:
+                self._check_pid()
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if not batch:
+                return total
+            self._write(batch)
+            total += len(batch)
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # Forked: the parent's buffer and thread are not ours
+            self._buffer.clear()
+            self._thread = None
+            self._pid = os.getpid()
+
+    def pending(self):
+        return len(self._buffer)
+
+    def discard(self):
+        """Drop everything buffered without writing it (used by tests)."""
+        with self._lock:
+            self._buffer.clear()
+
+    def _write(self, batch):
+        try:
+            self.write_batch(batch)
+        except Exception:
+            logger.exception('%s: failed to write %d buffered records', self.name, len(batch))
+
+    def _run(self):
+        from django.db import connections
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+            # This thread's DB connections would otherwise stay open between flushes
+            connections.close_all()
+
+
+def flush_all():
+    """Flush every writer of this process."""
+    for writer in _writers:
+        writer.flush()
+
+
+atexit.register(flush_all)
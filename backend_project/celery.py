@@ -4,6 +4,8 @@ Celery configuration for AAfri Ride backend
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
@@ -29,6 +31,103 @@ app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+# Queues, most urgent first. OTP codes and trip pushes must never wait behind
+# a burst of admin or bulk email, so each class of work gets its own queue
+# and its own worker pool (see WORKER_POOLS).
+TASK_QUEUES = ('otp', 'push', 'email', 'bulk', 'default')
+
+TASK_ROUTES = {
+    'apps.users.tasks.send_otp_sms_task': {'queue': 'otp'},
+    'apps.users.tasks.send_otp_email_task': {'queue': 'otp'},
+    'apps.notifications.tasks.send_push_task': {'queue': 'push'},
+    'apps.notifications.tasks.send_push_batch_task': {'queue': 'push'},
+    'apps.users.tasks.send_trip_notification_task': {'queue': 'push'},
+    'apps.users.tasks.send_sms_batch_task': {'queue': 'push'},
+    'apps.users.tasks.send_email_task': {'queue': 'email'},
+    'apps.users.tasks.send_templated_email_task': {'queue': 'email'},
+    'apps.users.tasks.send_admin_notification_task': {'queue': 'bulk'},
+    'apps.users.tasks.flush_otp_audit_task': {'queue': 'bulk'},
+    'apps.users.tasks.purge_expired_otps_task': {'queue': 'bulk'},
+    'apps.users.tasks.resend_undelivered_otps_task': {'queue': 'otp'},
+}
+
+# Worker pools: the queues each worker serves, its concurrency and prefetch.
+# Realtime pools prefetch one task per process so a slow send never holds
+# queued OTPs behind it; the bulk pool trades latency for throughput.
+# Start one worker per pool with `python manage.py run_worker <pool>`.
+WORKER_POOLS = {
+    'otp': {
+        'queues': ['otp'],
+        'concurrency': int(os.getenv('CELERY_OTP_CONCURRENCY', '4')),
+        'prefetch_multiplier': 1,
+    },
+    'push': {
+        'queues': ['push'],
+        'concurrency': int(os.getenv('CELERY_PUSH_CONCURRENCY', '4')),
+        'prefetch_multiplier': 1,
+    },
+    'bulk': {
+        'queues': ['email', 'bulk', 'default'],
+        'concurrency': int(os.getenv('CELERY_BULK_CONCURRENCY', '2')),
+        'prefetch_multiplier': 4,
+    },
+}
+
+# Periodic jobs (run `celery -A backend_project beat`)
+app.conf.beat_schedule = {
+    'flush-otp-audit': {
+        'task': 'apps.users.tasks.flush_otp_audit_task',
+        'schedule': float(os.getenv('OTP_AUDIT_FLUSH_INTERVAL_SECONDS', '10')),
+    },
+    'purge-expired-otps': {
+        'task': 'apps.users.tasks.purge_expired_otps_task',
+        'schedule': crontab(minute=17),
+    },
+    'resend-undelivered-otps': {
+        'task': 'apps.users.tasks.resend_undelivered_otps_task',
+        'schedule': float(os.getenv('OTP_RESEND_INTERVAL_SECONDS', '30')),
+        # A run that waited longer than one interval is superseded by the next
+        'options': {'expires': float(os.getenv('OTP_RESEND_INTERVAL_SECONDS', '30'))},
+    },
+}
+
+app.conf.update(
+    task_queues=[Queue(name) for name in TASK_QUEUES],
+    task_default_queue='default',
+    task_routes=TASK_ROUTES,
+)
+
+
+def worker_argv(pool):
+    """Command line for a `celery worker` serving one entry of WORKER_POOLS."""
+    cfg = WORKER_POOLS[pool]
+    return [
+        'worker',
+        '--queues', ','.join(cfg['queues']),
+        '--concurrency', str(cfg['concurrency']),
+        '--prefetch-multiplier', str(cfg['prefetch_multiplier']),
+        '-O', 'fair',
+        '--hostname', f'{pool}@%h',
+        '--loglevel', 'info',
+    ]
+
+
+@worker_process_init.connect
+def init_push_client(**kwargs):
+    """Initialize firebase_admin once per worker process, before the first push task."""
+    from apps.notifications.fcm import get_push_client
+    get_push_client().init()
+
+
+@worker_process_shutdown.connect
+def close_worker_resources(**kwargs):
+    """Write buffered logs and QUIT pooled SMTP sessions before the process exits."""
+    from backend_project.buffered_writer import flush_all
+    from backend_project.email_backend import close_pools
+    flush_all()
+    close_pools()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
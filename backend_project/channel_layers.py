@@ -0,0 +1,189 @@
+"""
+In-process channel layer for single-node deployments and tests.
+
+Selected with `CHANNEL_LAYER_BACKEND=memory`. Compared to
+`channels.layers.InMemoryChannelLayer` it avoids the per-operation
+full scan of every channel and group:
+
+- message expiry is checked lazily when a channel is read;
+- group membership expiry is checked while a group is fanned out;
+- a full sweep (expired messages, stale members, dead channels) runs at
+  most once per `sweep_interval` seconds;
+- `group_send` enqueues directly instead of creating one task per member.
+
+Queues are bounded by `capacity` (or `channel_capacity` patterns). Sending to
+a full channel raises `ChannelFull`; `group_send` silently skips full
+members, matching the Redis layer.
+
+Only valid when HTTP and WebSocket traffic are served by the same ASGI
+process (e.g. a single Daphne instance); use the Redis layer otherwise.
+"""
+import time
+import random
+import string
+import asyncio
+from copy import deepcopy
+from collections import deque
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+class _Channel:
+    __slots__ = ('messages', 'waiters', 'capacity')
+
+    def __init__(self, capacity):
+        self.messages = deque()
+        self.waiters = deque()
+        self.capacity = capacity
+
+
+class BoundedInMemoryChannelLayer(BaseChannelLayer):
+    """Channel layer with bounded per-channel queues and group expiry, held in memory."""
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None,
+                 sweep_interval=30, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.group_expiry = group_expiry
+        self.sweep_interval = sweep_interval
+        self.channels = {}
+        self.groups = {}
+        self._next_sweep = time.time() + sweep_interval
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+        self._maybe_sweep()
+        if not self._put(channel, deepcopy(message), time.time() + self.expiry):
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        self._maybe_sweep()
+        chan = self._get_channel(channel)
+        while True:
+            now = time.time()
+            while chan.messages:
+                expires, message = chan.messages.popleft()
+                if expires >= now:
+                    return message
+            waiter = asyncio.get_running_loop().create_future()
+            chan.waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    # We were woken for a message but are leaving; pass it on
+                    self._wake(chan)
+                else:
+                    try:
+                        chan.waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+
+    async def new_channel(self, prefix='specific.'):
+        return '%s.inmemory!%s' % (
+            prefix,
+            ''.join(random.choice(string.ascii_letters) for _ in range(12)),
+        )
+
+    # Flush extension
+
+    async def flush(self):
+        self.channels = {}
+        self.groups = {}
+
+    async def close(self):
+        pass
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        self.groups.setdefault(group, {})[channel] = time.time()
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        members = self.groups.get(group)
+        if members:
+            members.pop(channel, None)
+            if not members:
+                self.groups.pop(group, None)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        self._maybe_sweep()
+        members = self.groups.get(group)
+        if not members:
+            return
+        now = time.time()
+        joined_after = now - self.group_expiry
+        expires = now + self.expiry
+        # One deep copy isolates the sender; members get shallow copies
+        message = deepcopy(message)
+        for channel, joined in list(members.items()):
+            if joined < joined_after:
+                del members[channel]
+                continue
+            self._put(channel, dict(message), expires)
+        if not members:
+            self.groups.pop(group, None)
+
+    # Internals
+
+    def _get_channel(self, name):
+        chan = self.channels.get(name)
+        if chan is None:
+            chan = self.channels[name] = _Channel(self.get_capacity(name))
+        return chan
+
+    def _put(self, channel, message, expires):
+        chan = self._get_channel(channel)
+        if len(chan.messages) >= chan.capacity:
+            # Make room by dropping expired messages before declaring it full
+            now = time.time()
+            while chan.messages and chan.messages[0][0] < now:
+                chan.messages.popleft()
+            if len(chan.messages) >= chan.capacity:
+                return False
+        chan.messages.append((expires, message))
+        self._wake(chan)
+        return True
+
+    def _wake(self, chan):
+        while chan.waiters:
+            waiter = chan.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        dead = set()
+        for name, chan in list(self.channels.items()):
+            if chan.messages and chan.messages[0][0] < now:
+                # Nobody is reading this channel: drop it and its memberships
+                dead.add(name)
+                del self.channels[name]
+            elif not chan.messages and not chan.waiters:
+                del self.channels[name]
+        joined_after = now - self.group_expiry
+        for group, members in list(self.groups.items()):
+            for channel, joined in list(members.items()):
+                if channel in dead or joined < joined_after:
+                    del members[channel]
+            if not members:
+                del self.groups[group]
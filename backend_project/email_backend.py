@@ -1,72 +1,215 @@
 """
-Custom SMTP email backend for Zoho Mail with SSL certificate bypass
-This is needed for Windows Python SSL certificate verification issues
+SMTP email backends with a per-process pool of authenticated connections.
+
+Opening an SMTP session costs a TCP connect, TLS handshake and AUTH, which
+is most of the time spent sending one message. `PooledEmailBackend` keeps up
+to EMAIL_POOL_SIZE logged-in connections per worker process and server and
+hands them out to each `send_messages()` call (or `with get_connection()`
+block), so every message in a batch, and every batch after it, reuses an
+open session. A connection that has been idle for more than
+EMAIL_POOL_NOOP_AFTER_SECONDS is checked with NOOP before reuse, and one
+idle for more than EMAIL_POOL_MAX_IDLE_SECONDS is closed. If the server
+drops a reused session mid-send, the message is retried once on a fresh
+connection; there is no sleep-and-retry on the request path.
+
+ZohoEmailBackend also skips certificate verification (needed for Windows
+Python SSL certificate issues).
 """
+import os
 import ssl
-import smtplib
-import socket
 import time
+import smtplib
+import logging
+import threading
+from django.conf import settings
 from django.core.mail.backends.smtp import EmailBackend as DjangoEmailBackend
 
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Idle SMTP connections for one server/account, most recently used first."""
+
+    def __init__(self, max_size, max_idle, noop_after):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.noop_after = noop_after
+        self._idle = []  # [(connection, returned_at)]
+        self._lock = threading.Lock()
+
+    def acquire(self, connect):
+        """Return a live connection from the pool, or a new one from `connect()`."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, returned_at = self._idle.pop()
+            idle = time.monotonic() - returned_at
+            if idle > self.max_idle:
+                _quit(connection)
+                continue
+            if idle > self.noop_after and not _alive(connection):
+                _quit(connection)
+                continue
+            return connection
+        return connect()
+
+    def release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        _quit(connection)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            _quit(connection)
+
+
+def _alive(connection):
+    try:
+        return connection.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def _dropped(err):
+    """Whether `err` means the session is gone (421 is the server's idle timeout)."""
+    if isinstance(err, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(err, smtplib.SMTPResponseException):
+        return err.smtp_code == 421
+    return isinstance(err, OSError)
+
+
+def _quit(connection):
+    try:
+        connection.quit()
+    except (smtplib.SMTPException, OSError, ssl.SSLError):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(key):
+    """Process-wide pool for `key`. Pools inherited across fork() are dropped."""
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Sockets inherited from the parent process must not be shared
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SMTPConnectionPool(
+                max_size=getattr(settings, 'EMAIL_POOL_SIZE', 4),
+                max_idle=getattr(settings, 'EMAIL_POOL_MAX_IDLE_SECONDS', 60),
+                noop_after=getattr(settings, 'EMAIL_POOL_NOOP_AFTER_SECONDS', 5),
+            )
+        return pool
+
+
+def close_pools():
+    """Close every pooled connection of this process (e.g. on worker shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.clear()
+
+
+class PooledEmailBackend(DjangoEmailBackend):
+    """Django SMTP backend that borrows connections from a per-process pool."""
+
+    verify_certificates = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.verify_certificates:
+            self.ssl_context = ssl.create_default_context()
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self._pool = get_pool((
+            type(self).__name__, self.host, self.port, self.username,
+            self.use_ssl, self.use_tls, self.verify_certificates,
+        ))
+        self._reused = False
+
+    def _connect(self):
+        # Let Django build and log in a fresh connection, then take it over
+        self.connection = None
+        if not super().open():
+            return None
+        connection, self.connection = self.connection, None
+        return connection
 
-class ZohoEmailBackend(DjangoEmailBackend):
-    """
-    Custom SMTP backend for Zoho Mail that bypasses SSL verification
-    """
-    
     def open(self):
-        """
-        Initiate a TLS (encrypted) connection with shorter timeout and retry logic.
-        """
-        if self.connection is not None:
+        if self.connection:
             return False
+        fresh = []
 
-        # Try with shorter timeout and retry up to 2 times
-        max_retries = 2
-        timeout = 10  # Reduced timeout to prevent Gunicorn worker timeout (30s)
-        
-        for attempt in range(max_retries):
-            try:
-                if self.use_ssl:
-                    # Create SSL context that doesn't verify certificates
-                    ssl_context = ssl.create_default_context()
-                    ssl_context.check_hostname = False
-                    ssl_context.verify_mode = ssl.CERT_NONE
-                    
-                    self.connection = smtplib.SMTP_SSL(
-                        self.host, self.port,
-                        timeout=timeout,
-                        context=ssl_context
-                    )
-                else:
-                    self.connection = smtplib.SMTP(
-                        self.host, self.port,
-                        timeout=timeout
-                    )
-                    
-                    if self.use_tls:
-                        # Create SSL context that doesn't verify certificates for TLS
-                        ssl_context = ssl.create_default_context()
-                        ssl_context.check_hostname = False
-                        ssl_context.verify_mode = ssl.CERT_NONE
-                        self.connection.starttls(context=ssl_context)
-                
-                if self.username and self.password:
-                    self.connection.login(self.username, self.password)
-                return True
-                
-            except (smtplib.SMTPException, socket.timeout, socket.error, OSError) as err:
-                if attempt < max_retries - 1:
-                    # Wait briefly before retry
-                    time.sleep(0.5)
-                    continue
-                else:
-                    # Final attempt failed
-                    if not self.fail_silently:
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.error(f"Failed to connect to SMTP server after {max_retries} attempts: {err}")
-                    return False
-        
-        return False
+        def connect():
+            fresh.append(True)
+            return self._connect()
+
+        try:
+            self.connection = self._pool.acquire(connect)
+        except OSError:
+            if not self.fail_silently:
+                raise
+            return None
+        if self.connection is None:
+            return None
+        self._reused = not fresh
+        return True
+
+    def close(self, broken=False):
+        """Return the connection to the pool (or drop it if it is broken)."""
+        if self._partial_connection is not None:
+            _quit(self._partial_connection)
+            self._partial_connection = None
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        if broken:
+            _quit(connection)
+        else:
+            self._pool.release(connection)
+
+    def _send(self, email_message):
+        try:
+            return super()._send(email_message)
+        except (smtplib.SMTPException, OSError) as err:
+            if not (self._reused and _dropped(err)):
+                if _dropped(err):
+                    self.close(broken=True)
+                raise
+            # A pooled session went stale between the liveness check and use
+            logger.info('Pooled SMTP connection dropped (%s); retrying on a new one', err)
+            self.close(broken=True)
+            self.connection = self._connect()
+            self._reused = False
+            if self.connection is None:
+                return False
+            return super()._send(email_message)
+
+
+class ZohoEmailBackend(PooledEmailBackend):
+    """
+    Pooled SMTP backend for Zoho Mail that bypasses SSL verification
+    """
+
+    verify_certificates = False
 
+    def __init__(self, *args, timeout=None, **kwargs):
+        # Keep sends well inside Gunicorn's 30s worker timeout
+        if timeout is None:
+            timeout = getattr(settings, 'EMAIL_TIMEOUT', None) or 10
+        super().__init__(*args, timeout=timeout, **kwargs)
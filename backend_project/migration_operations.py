@@ -0,0 +1,26 @@
+"""
+Migration operations shared by the apps.
+
+`AddIndexConcurrently` builds an index with CREATE INDEX CONCURRENTLY on
+PostgreSQL, so inserts into a large, busy table are not blocked for the
+whole build, and falls back to a plain CREATE INDEX on other databases
+(SQLite in development and tests). Migrations using it must set
+`atomic = False`.
+"""
+from django.contrib.postgres import operations as postgres_operations
+from django.db import migrations
+
+
+class AddIndexConcurrently(postgres_operations.AddIndexConcurrently):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,40 @@
+"""
+Shared Redis client for application code.
+
+`redis.from_url()` builds a fresh connection pool on every call, which is too
+expensive for per-request and per-event paths. `get_redis()` keeps a single
+client (and pool) per process for the configured REDIS_URL.
+"""
+import threading
+from django.conf import settings
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_redis():
+    """Return the process-wide Redis client, or None when Redis is not configured.
+
+    Callers must still be prepared for connection errors (Redis configured
+    but unreachable) and fall back to their non-Redis path.
+    """
+    url = getattr(settings, 'REDIS_URL', None)
+    if not url:
+        return None
+    client = _clients.get(url)
+    if client is None:
+        with _lock:
+            client = _clients.get(url)
+            if client is None:
+                try:
+                    import redis
+                except ImportError:
+                    return None
+                client = redis.Redis.from_url(
+                    url,
+                    socket_connect_timeout=2,
+                    socket_timeout=2,
+                    health_check_interval=30,
+                )
+                _clients[url] = client
+    return client
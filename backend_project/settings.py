@@ -123,6 +123,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app. The client IP used by throttles and error
+    # capture caps is the X-Forwarded-For entry the outermost one appended;
+    # anything before it is set by the client. 0 = use REMOTE_ADDR.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
+    # Sliding-window limits for backend_project.throttling ('N/<period>', comma-separated)
+    'DEFAULT_THROTTLE_RATES': {
+        # OTP issuance per client IP, per phone/email and per device
+        'otp_ip': os.getenv('OTP_RATE_PER_IP', '20/hour'),
+        'otp_contact': os.getenv('OTP_RATE_PER_CONTACT', '1/30s,5/hour'),
+        'otp_device': os.getenv('OTP_RATE_PER_DEVICE', '10/hour'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -164,6 +175,14 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+# Fail fast when publishing to an unreachable broker (Kombu otherwise retries
+# for several seconds inside the request); see backend_project.task_spool.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'max_retries': int(os.getenv('CELERY_BROKER_PUBLISH_MAX_RETRIES', '1')),
+    'interval_start': 0,
+    'interval_step': 0.2,
+    'interval_max': 0.5,
+}
 
 # In development, run tasks synchronously to avoid needing a separate worker process
 # Also enable this if CELERY_TASK_ALWAYS_EAGER_FORCE env var is set (useful for production debugging)
@@ -177,15 +196,67 @@ SHARE_TOKEN_TTL_SECONDS = int(os.getenv('SHARE_TOKEN_TTL_SECONDS', str(6 * 3600)
 # Redis key prefix for share tokens
 SHARE_TOKEN_REDIS_PREFIX = os.getenv('SHARE_TOKEN_REDIS_PREFIX', 'share:token:')
 
+# WebSocket liveness: server heartbeat interval, how long a socket may stay
+# silent before it is closed, and how long a group membership survives
+# without being refreshed by a heartbeat.
+WS_HEARTBEAT_INTERVAL_SECONDS = int(os.getenv('WS_HEARTBEAT_INTERVAL_SECONDS', '25'))
+WS_IDLE_TIMEOUT_SECONDS = int(os.getenv('WS_IDLE_TIMEOUT_SECONDS', '75'))
+WS_GROUP_EXPIRY_SECONDS = int(os.getenv('WS_GROUP_EXPIRY_SECONDS', '300'))
+# A user counts as online while one of their sockets heart-beat within this window
+PRESENCE_TTL_SECONDS = int(os.getenv('PRESENCE_TTL_SECONDS', str(WS_IDLE_TIMEOUT_SECONDS + 15)))
+
+# Resumable trip events: how many events are kept per trip for replay on
+# reconnect, and how long an idle trip stream is retained.
+TRIP_EVENT_STREAM_MAXLEN = int(os.getenv('TRIP_EVENT_STREAM_MAXLEN', '200'))
+TRIP_EVENT_STREAM_TTL_SECONDS = int(os.getenv('TRIP_EVENT_STREAM_TTL_SECONDS', str(24 * 3600)))
+
 # Channels / channel layers
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            'hosts': [os.getenv('REDIS_URL', REDIS_URL)],
+# CHANNEL_LAYER_BACKEND=redis (default) shares groups across processes via
+# REDIS_URL. CHANNEL_LAYER_BACKEND=memory keeps them in-process, which is
+# enough for a single Daphne node and for tests, and needs no Redis.
+CHANNEL_LAYER_BACKEND = os.getenv('CHANNEL_LAYER_BACKEND', 'redis')
+CHANNEL_LAYER_CAPACITY = int(os.getenv('CHANNEL_LAYER_CAPACITY', '100'))
+if CHANNEL_LAYER_BACKEND == 'memory':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'backend_project.channel_layers.BoundedInMemoryChannelLayer',
+            'CONFIG': {
+                'capacity': CHANNEL_LAYER_CAPACITY,
+                'group_expiry': WS_GROUP_EXPIRY_SECONDS,
+            },
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.getenv('REDIS_URL', REDIS_URL)],
+                'capacity': CHANNEL_LAYER_CAPACITY,
+                'group_expiry': WS_GROUP_EXPIRY_SECONDS,
+            },
+        },
+    }
+
+# WebSocket JWT auth: how long (seconds) a resolved user is cached per process,
+# and the maximum number of cached users before eviction.
+WS_AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv('WS_AUTH_USER_CACHE_TTL_SECONDS', '30'))
+WS_AUTH_USER_CACHE_MAX = int(os.getenv('WS_AUTH_USER_CACHE_MAX', '10000'))
+
+# Push notifications: how long (seconds) a user's device tokens are cached
+# in Redis between device registrations.
+PUSH_TOKEN_CACHE_TTL_SECONDS = int(os.getenv('PUSH_TOKEN_CACHE_TTL_SECONDS', '300'))
+
+# The same notification event for the same trip and user is sent at most once
+# within this window (seconds), even if the triggering action is repeated.
+NOTIFY_DEDUP_TTL_SECONDS = int(os.getenv('NOTIFY_DEDUP_TTL_SECONDS', '600'))
+# How long a user's unread inbox count stays cached in Redis
+UNREAD_COUNT_CACHE_TTL_SECONDS = int(os.getenv('UNREAD_COUNT_CACHE_TTL_SECONDS', '3600'))
+
+# Celery calls that cannot be published (broker down) are spooled to disk
+# here and re-published later instead of running inside the request.
+TASK_SPOOL_DIR = os.getenv('TASK_SPOOL_DIR', str(BASE_DIR / 'spool'))
+TASK_SPOOL_DRAIN_INTERVAL_SECONDS = int(os.getenv('TASK_SPOOL_DRAIN_INTERVAL_SECONDS', '30'))
 
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
@@ -194,6 +265,14 @@ EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.Em
 # Also set a timeout to prevent Gunicorn worker kills
 EMAIL_TIMEOUT = 10  # Reduced to 10s to allow for retries within Gunicorn's 30s limit
 
+# SMTP connection pool (backend_project.email_backend.PooledEmailBackend and the
+# Zoho/Unverified backends built on it): idle connections kept per worker process,
+# idle time after which a connection is NOOP-checked before reuse, and idle time
+# after which it is closed.
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', '4'))
+EMAIL_POOL_NOOP_AFTER_SECONDS = float(os.getenv('EMAIL_POOL_NOOP_AFTER_SECONDS', '5'))
+EMAIL_POOL_MAX_IDLE_SECONDS = float(os.getenv('EMAIL_POOL_MAX_IDLE_SECONDS', '60'))
+
 import platform
 if (platform.system() != 'Windows' and 'ZohoEmailBackend' in EMAIL_BACKEND) or os.getenv('RAILWAY_ENVIRONMENT_NAME'):
     # Use our custom backend that ignores SSL cert errors
@@ -213,17 +292,107 @@ if os.getenv('RAILWAY_ENVIRONMENT_NAME') and 'zoho' in EMAIL_HOST:
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+# Operational inbox: admin notifications go here, with staff users in BCC
+SUPPORT_EMAIL = os.getenv('SUPPORT_EMAIL', 'support@aafriride.com')
+
+# Email providers (apps.users.email_providers), tried in this order with
+# failover. Providers that are not configured (e.g. EmailJS without keys)
+# are skipped; with none left, messages are only logged.
+EMAIL_PROVIDERS = [p.strip() for p in os.getenv('EMAIL_PROVIDERS', 'emailjs,smtp').split(',') if p.strip()]
+EMAILJS_SERVICE_ID = os.getenv('EMAILJS_SERVICE_ID', '')
+EMAILJS_TEMPLATE_ID = os.getenv('EMAILJS_TEMPLATE_ID', '')
+EMAILJS_PUBLIC_KEY = os.getenv('EMAILJS_PUBLIC_KEY') or os.getenv('EMAILJS_USER_ID', '')
+EMAILJS_PRIVATE_KEY = os.getenv('EMAILJS_PRIVATE_KEY', '')
+EMAILJS_TIMEOUT_SECONDS = float(os.getenv('EMAILJS_TIMEOUT_SECONDS', '5'))
+# A provider is skipped for EMAIL_BREAKER_RESET_SECONDS after this many consecutive failures
+EMAIL_BREAKER_FAILURES = int(os.getenv('EMAIL_BREAKER_FAILURES', '5'))
+EMAIL_BREAKER_RESET_SECONDS = float(os.getenv('EMAIL_BREAKER_RESET_SECONDS', '30'))
+# Hedged sends (OTP codes): start the next provider if the first is this slow
+EMAIL_HEDGE_AFTER_SECONDS = float(os.getenv('EMAIL_HEDGE_AFTER_SECONDS', '2'))
+EMAIL_SEND_TIMEOUT_SECONDS = float(os.getenv('EMAIL_SEND_TIMEOUT_SECONDS', '15'))
+
+# Email send log (apps.users.send_log): attempts are buffered in memory and
+# written to the EmailSendLog table every EMAIL_SEND_LOG_FLUSH_SECONDS or once
+# EMAIL_SEND_LOG_BATCH_SIZE are waiting (0 seconds = write synchronously).
+# If the database write fails, records go to a rotating JSONL file.
+EMAIL_SEND_LOG_FLUSH_SECONDS = float(os.getenv('EMAIL_SEND_LOG_FLUSH_SECONDS', '2'))
+EMAIL_SEND_LOG_BATCH_SIZE = int(os.getenv('EMAIL_SEND_LOG_BATCH_SIZE', '200'))
+EMAIL_SEND_LOG_MAX_BUFFER = int(os.getenv('EMAIL_SEND_LOG_MAX_BUFFER', '10000'))
+EMAIL_SEND_LOG_FALLBACK_PATH = os.getenv('EMAIL_SEND_LOG_FALLBACK_PATH', str(BASE_DIR / 'logs' / 'email_send.jsonl'))
 EMAIL_SSL_CERTFILE = None
 EMAIL_SSL_KEYFILE = None
 
+# OTP codes: lifetime (seconds) of a code in the Redis OTP store, and how
+# many audit events are written to the OTP table per batch.
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '300'))
+OTP_AUDIT_BATCH_SIZE = int(os.getenv('OTP_AUDIT_BATCH_SIZE', '1000'))
+# OTP audit rows older than this are deleted by `purge_expired_otps`, in
+# batches of OTP_PURGE_BATCH_SIZE rows. Default: one week, as
+# apps.users.otp_store.DEFAULT_RETENTION_SECONDS.
+OTP_RETENTION_SECONDS = int(os.getenv('OTP_RETENTION_SECONDS', str(7 * 24 * 3600)))
+OTP_PURGE_BATCH_SIZE = int(os.getenv('OTP_PURGE_BATCH_SIZE', '1000'))
+# Undelivered OTP codes are re-sent by the resend job (apps.users.otp_resend):
+# first OTP_RESEND_AFTER_SECONDS after issue, then with exponential backoff
+# from OTP_RESEND_BACKOFF_SECONDS, at most OTP_RESEND_MAX_ATTEMPTS times, on
+# OTP_RESEND_WORKERS threads and up to OTP_RESEND_BATCH_SIZE codes per run.
+OTP_RESEND_INTERVAL_SECONDS = float(os.getenv('OTP_RESEND_INTERVAL_SECONDS', '30'))
+OTP_RESEND_AFTER_SECONDS = int(os.getenv('OTP_RESEND_AFTER_SECONDS', '60'))
+OTP_RESEND_BACKOFF_SECONDS = int(os.getenv('OTP_RESEND_BACKOFF_SECONDS', '30'))
+OTP_RESEND_MAX_ATTEMPTS = int(os.getenv('OTP_RESEND_MAX_ATTEMPTS', '3'))
+OTP_RESEND_WORKERS = int(os.getenv('OTP_RESEND_WORKERS', '8'))
+OTP_RESEND_BATCH_SIZE = int(os.getenv('OTP_RESEND_BATCH_SIZE', '500'))
+# No new chunk of sends is started after this many seconds; with one chunk
+# taking up to EMAIL_SEND_TIMEOUT_SECONDS it stays under the task's 120s limit
+OTP_RESEND_TIME_BUDGET_SECONDS = float(os.getenv('OTP_RESEND_TIME_BUDGET_SECONDS', '60'))
+
 # SMS Configuration (Twilio)
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', '')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER', '')
+TWILIO_TIMEOUT_SECONDS = float(os.getenv('TWILIO_TIMEOUT_SECONDS', '10'))
+# Point the Twilio client at a stand-in API (e.g. tools/mock_twilio.py) for load tests
+TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL', '')
+# Threads used by SMSProvider.send_many() (batched notification SMS)
+SMS_SEND_WORKERS = int(os.getenv('SMS_SEND_WORKERS', '8'))
 
 # SMS Provider (twilio or mock for testing)
 SMS_PROVIDER = os.getenv('SMS_PROVIDER', 'mock')  # Set to 'twilio' in production
 
+# Error log (apps.errors.pipeline): failed API responses are buffered and
+# written every ERROR_LOG_FLUSH_SECONDS or once ERROR_LOG_BATCH_SIZE are
+# waiting (0 seconds = write synchronously). Request/response bodies larger
+# than ERROR_LOG_MAX_BODY_BYTES are not kept.
+ERROR_LOG_FLUSH_SECONDS = float(os.getenv('ERROR_LOG_FLUSH_SECONDS', '2'))
+ERROR_LOG_BATCH_SIZE = int(os.getenv('ERROR_LOG_BATCH_SIZE', '200'))
+ERROR_LOG_MAX_BUFFER = int(os.getenv('ERROR_LOG_MAX_BUFFER', '10000'))
+ERROR_LOG_MAX_BODY_BYTES = int(os.getenv('ERROR_LOG_MAX_BODY_BYTES', '8192'))
+# Errors are grouped by fingerprint; each group keeps this many recent occurrences
+ERROR_GROUP_MAX_SAMPLES = int(os.getenv('ERROR_GROUP_MAX_SAMPLES', '5'))
+# Error capture admission (apps.errors.sampling). Sample rates by status
+# ('401'), status class ('4xx') or 'frontend', as "key=rate,..."; endpoint
+# prefixes as "/api/path/=rate,...". Kept errors are counted with weight
+# 1/rate. Token-bucket caps per client IP and per error fingerprint, and one
+# for all frontend-reported errors (whose messages, and so fingerprints, the
+# client chooses).
+ERROR_SAMPLE_RATES = {
+    key.strip(): float(rate)
+    for key, rate in (item.split('=') for item in os.getenv('ERROR_SAMPLE_RATES', '401=0.1,404=0.1').split(',') if item)
+}
+ERROR_SAMPLE_ENDPOINT_RATES = {
+    key.strip(): float(rate)
+    for key, rate in (item.split('=') for item in os.getenv('ERROR_SAMPLE_ENDPOINT_RATES', '').split(',') if item)
+}
+ERROR_RATE_PER_IP = os.getenv('ERROR_RATE_PER_IP', '60/min')
+ERROR_RATE_PER_FINGERPRINT = os.getenv('ERROR_RATE_PER_FINGERPRINT', '600/min')
+ERROR_RATE_FRONTEND = os.getenv('ERROR_RATE_FRONTEND', '600/min')
+# Responses of these paths are not captured by ErrorLoggingMiddleware
+ERROR_LOG_IGNORE_PATHS = ['/api/errors/']
+# Error stats (/api/errors/errors/stats/?hours=N) are read from hourly rollups
+# and cached in Redis for ERROR_STATS_CACHE_SECONDS (0 = no cache); N is at
+# most ERROR_STATS_MAX_HOURS.
+ERROR_STATS_CACHE_SECONDS = int(os.getenv('ERROR_STATS_CACHE_SECONDS', '30'))
+ERROR_STATS_MAX_HOURS = int(os.getenv('ERROR_STATS_MAX_HOURS', str(30 * 24)))
+
 # drf-spectacular
 SPECTACULAR_SETTINGS = {
     'TITLE': 'AAfriRide API',
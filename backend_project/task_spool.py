@@ -0,0 +1,129 @@
+"""
+Local disk spool for Celery tasks that could not be published.
+
+`enqueue()` publishes a task without Kombu's connection retries; if the
+broker is unreachable the call is appended as one JSON line to
+`TASK_SPOOL_DIR/tasks.jsonl` instead of being executed inline in the
+request. The spool is drained (re-published with `send_task`) after the
+next successful publish, at most once every TASK_SPOOL_DRAIN_INTERVAL_SECONDS,
+and by `python manage.py drain_task_spool`.
+
+The spool is per host: run the drain command where the web processes run.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILENAME = 'tasks.jsonl'
+
+_lock = threading.Lock()
+_next_drain = 0.0
+
+
+def _spool_path():
+    spool_dir = getattr(settings, 'TASK_SPOOL_DIR', None) or os.path.join(settings.BASE_DIR, 'spool')
+    return os.path.join(str(spool_dir), SPOOL_FILENAME)
+
+
+def spool(name, args=(), kwargs=None, options=None):
+    """Append one task call to the spool file."""
+    path = _spool_path()
+    line = json.dumps({
+        'task': name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'options': options or {},
+        'spooled_at': time.time(),
+    })
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def pending():
+    """Number of task calls waiting in the spool."""
+    try:
+        with open(_spool_path(), encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+    except FileNotFoundError:
+        return 0
+
+
+def enqueue(task, args=(), kwargs=None, **options):
+    """Publish `task` to the broker, spooling it to disk if the broker is down.
+
+    Results are not stored unless `ignore_result=False` is passed, since
+    subscribing to the result backend blocks when Redis is down.
+    Returns True when the task was published, False when it was spooled.
+    """
+    options.setdefault('ignore_result', True)
+    try:
+        task.apply_async(args=list(args), kwargs=kwargs or {}, retry=False, **options)
+    except Exception:
+        logger.warning('Broker unavailable; spooling %s', task.name, exc_info=True)
+        spool(task.name, args, kwargs, options)
+        return False
+    _maybe_drain()
+    return True
+
+
+def _maybe_drain():
+    global _next_drain
+    now = time.monotonic()
+    if now < _next_drain:
+        return
+    _next_drain = now + getattr(settings, 'TASK_SPOOL_DRAIN_INTERVAL_SECONDS', 30)
+    if os.path.exists(_spool_path()):
+        try:
+            drain()
+        except Exception:
+            logger.exception('Failed to drain task spool')
+
+
+def drain(limit=None):
+    """Re-publish spooled tasks. Returns (published, remaining).
+
+    The spool file is renamed before reading so concurrent drains never
+    publish the same line twice; anything that still cannot be published is
+    written back to the spool.
+    """
+    from celery import current_app
+
+    path = _spool_path()
+    draining = f'{path}.{os.getpid()}.draining'
+    with _lock:
+        try:
+            os.replace(path, draining)
+        except FileNotFoundError:
+            return 0, 0
+
+    with open(draining, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    published = 0
+    leftover = []
+    for i, entry in enumerate(entries):
+        if limit is not None and published >= limit:
+            leftover.extend(entries[i:])
+            break
+        try:
+            current_app.send_task(entry['task'], args=entry['args'], kwargs=entry['kwargs'],
+                                  retry=False, **{'ignore_result': True, **entry.get('options', {})})
+            published += 1
+        except Exception:
+            # Broker went away again; keep the rest for the next drain
+            leftover.extend(entries[i:])
+            break
+
+    for entry in leftover:
+        spool(entry['task'], entry['args'], entry['kwargs'], entry.get('options'))
+    os.remove(draining)
+    if published:
+        logger.info('Drained %d spooled tasks (%d remaining)', published, len(leftover))
+    return published, len(leftover)
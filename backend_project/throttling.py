@@ -0,0 +1,157 @@
+"""
+Sliding-window rate limiting for DRF views.
+
+A `SlidingWindowThrottle` subclass names a `scope` and returns the
+identities a request is counted against (IP, contact, device, ...). Each
+identity kind gets its limits from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+under `<scope>_<kind>`, e.g.
+
+    'otp_contact': '1/30s,5/hour'
+
+Each limit is a sliding window stored as a Redis sorted set of request
+timestamps (`throttle:<scope>:<kind>:<window>:<ident>`). All windows of a
+request are checked and, if every one has room, recorded in one Lua call,
+so concurrent requests cannot overshoot a limit. Rejected requests are not
+recorded. Without Redis an in-process map is used; it holds at most
+MAX_LOCAL_KEYS identities, dropping expired ones first and then the least
+recently used.
+"""
+import re
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from backend_project.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'throttle:'
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Keys kept in the in-process fallback. A sweep trims it to 90% of this, so
+# it runs once per MAX_LOCAL_KEYS // 10 new keys rather than on every request.
+MAX_LOCAL_KEYS = 10000
+
+# KEYS: one sorted set per window. ARGV: now_ms, member, then limit and
+# window_ms for each key. Returns 0 if recorded, else milliseconds to wait.
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i + 1])
+    local window = tonumber(ARGV[2 * i + 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, -limit, -limit, 'WITHSCORES')
+        wait = math.max(wait, tonumber(oldest[2]) + window - now)
+    end
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, ARGV[2 * i + 2])
+end
+return 0
+"""
+
+_local_lock = threading.Lock()
+# key -> (window_ms, deque of request times in ms), least recently used
+# first; used when Redis is unavailable
+_local = OrderedDict()
+
+
+def parse_rates(value):
+    """Parse '5/hour' or '1/30s,5/15m' into [(limit, window_seconds), ...]."""
+    rates = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        num, period = part.split('/')
+        match = re.fullmatch(r'(\d*)\s*([smhd])\w*', period.strip())
+        if not match:
+            raise ValueError(f'Invalid throttle rate: {part!r}')
+        rates.append((int(num), int(match.group(1) or 1) * _UNITS[match.group(2)]))
+    return rates
+
+
+def reset_local():
+    """Forget all in-process counters (used by tests)."""
+    with _local_lock:
+        _local.clear()
+
+
+def _prune_local(now_ms):
+    """Drop keys with no hit inside their window, then the least recently used."""
+    for key in [k for k, (window_ms, hits) in _local.items() if not hits or hits[-1] <= now_ms - window_ms]:
+        del _local[key]
+    while len(_local) > MAX_LOCAL_KEYS * 9 // 10:
+        _local.popitem(last=False)
+
+
+def _hit_local(windows, now_ms):
+    with _local_lock:
+        wait = 0
+        for key, limit, window_ms in windows:
+            _, hits = _local.setdefault(key, (window_ms, deque()))
+            _local.move_to_end(key)
+            while hits and hits[0] <= now_ms - window_ms:
+                hits.popleft()
+            if len(hits) >= limit:
+                wait = max(wait, hits[-limit] + window_ms - now_ms)
+        if wait <= 0:
+            for key, _, _ in windows:
+                _local[key][1].append(now_ms)
+        if len(_local) > MAX_LOCAL_KEYS:
+            _prune_local(now_ms)
+        return max(wait, 0)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle requests per identity with one or more sliding windows."""
+
+    scope = None
+
+    def get_idents(self, request, view):
+        """Return {kind: ident} for this request. Kinds without an ident are skipped."""
+        return {'ip': self.get_ident(request)}
+
+    def get_rates(self, kind):
+        return parse_rates(api_settings.DEFAULT_THROTTLE_RATES.get(f'{self.scope}_{kind}'))
+
+    def allow_request(self, request, view):
+        windows = []
+        for kind, ident in self.get_idents(request, view).items():
+            if not ident:
+                continue
+            for limit, seconds in self.get_rates(kind):
+                windows.append((f'{KEY_PREFIX}{self.scope}:{kind}:{seconds}:{ident}', limit, seconds * 1000))
+        if not windows:
+            return True
+
+        now_ms = int(time.time() * 1000)
+        self._wait_ms = self._hit(windows, now_ms)
+        if self._wait_ms:
+            logger.info('Throttled %s request from %s', self.scope, self.get_ident(request))
+        return not self._wait_ms
+
+    def _hit(self, windows, now_ms):
+        r = get_redis()
+        if r is not None:
+            args = [now_ms, f'{now_ms}-{uuid.uuid4().hex[:8]}']
+            for _, limit, window_ms in windows:
+                args += [limit, window_ms]
+            try:
+                return int(r.eval(_SLIDING_WINDOW_SCRIPT, len(windows), *[w[0] for w in windows], *args))
+            except Exception:
+                logger.warning('Throttle unavailable in Redis; using local map', exc_info=True)
+        return _hit_local(windows, now_ms)
+
+    def wait(self):
+        return getattr(self, '_wait_ms', 0) / 1000.0
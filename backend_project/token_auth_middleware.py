@@ -1,38 +1,104 @@
+import time
+import asyncio
 import urllib.parse
+from functools import lru_cache
 from django.contrib.auth import get_user_model
 from django.db import close_old_connections
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.backends import TokenBackend
+from channels.db import database_sync_to_async
 from django.conf import settings
 
 
+# user_id -> (expires_at, user). Process-local; entries live for
+# WS_AUTH_USER_CACHE_TTL_SECONDS so a reconnect storm resolves each user once.
+_user_cache = {}
+# user_id -> asyncio.Task for lookups currently in flight, so concurrent
+# connects for the same user share a single DB query.
+_pending_lookups = {}
+
+
+@lru_cache(maxsize=None)
+def get_token_backend():
+    """Return the process-wide TokenBackend used to decode WebSocket JWTs."""
+    return TokenBackend(algorithm=settings.SIMPLE_JWT.get('ALGORITHM', 'HS256'), signing_key=settings.SECRET_KEY)
+
+
+def clear_user_cache(user_id=None):
+    """Drop one cached user (or all of them), e.g. after a user is deactivated."""
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(str(user_id), None)
+
+
+def _cache_put(key, user):
+    ttl = getattr(settings, 'WS_AUTH_USER_CACHE_TTL_SECONDS', 30)
+    max_size = getattr(settings, 'WS_AUTH_USER_CACHE_MAX', 10000)
+    now = time.monotonic()
+    if len(_user_cache) >= max_size:
+        # Evict expired entries first, then the oldest insertions
+        for k in [k for k, (exp, _) in _user_cache.items() if exp <= now]:
+            _user_cache.pop(k, None)
+        while len(_user_cache) >= max_size:
+            _user_cache.pop(next(iter(_user_cache)))
+    _user_cache[key] = (now + ttl, user)
+
+
+@database_sync_to_async
+def _fetch_user(user_id):
+    close_old_connections()
+    User = get_user_model()
+    try:
+        return User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return AnonymousUser()
+    # Any other error (e.g. a brief DB outage) propagates, so it is never cached
+
+
+async def get_user_for_id(user_id):
+    """Resolve a user id to a User, hitting the DB at most once per TTL window."""
+    key = str(user_id)
+    cached = _user_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    task = _pending_lookups.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_user(user_id))
+        _pending_lookups[key] = task
+        try:
+            user = await task
+        finally:
+            _pending_lookups.pop(key, None)
+        _cache_put(key, user)
+        return user
+    return await task
+
+
 class TokenAuthMiddleware:
     """ASGI middleware that takes a `token` querystring or `Authorization` header
     and authenticates the user for WebSocket connections using Simple JWT.
+
+    The JWT backend is shared across connections and user lookups run through
+    `database_sync_to_async` behind a short-TTL cache, so the event loop is
+    never blocked on the database during reconnect bursts.
     """
 
     def __init__(self, inner):
         self.inner = inner
 
-    def __call__(self, scope):
-        return TokenAuthMiddlewareInstance(scope, self.inner)
-
-
-class TokenAuthMiddlewareInstance:
-    def __init__(self, scope, inner):
-        self.scope = dict(scope)
-        self.inner = inner
-
-    async def __call__(self, receive, send):
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
         # Extract token from querystring `token` or from headers Authorization: Bearer <token>
         token = None
-        qs = self.scope.get('query_string', b'').decode()
+        qs = scope.get('query_string', b'').decode()
         params = urllib.parse.parse_qs(qs)
         if 'token' in params:
             token = params['token'][0]
         else:
             # Look in headers
-            headers = dict((k.decode(), v.decode()) for k, v in self.scope.get('headers', []))
+            headers = dict((k.decode(), v.decode()) for k, v in scope.get('headers', []))
             auth = headers.get('authorization') or headers.get('Authorization')
             if auth and auth.lower().startswith('bearer '):
                 token = auth.split(' ', 1)[1]
@@ -40,19 +106,12 @@ class TokenAuthMiddlewareInstance:
         user = AnonymousUser()
         if token:
             try:
-                close_old_connections()
-                tb = TokenBackend(algorithm=settings.SIMPLE_JWT.get('ALGORITHM', 'HS256'), signing_key=settings.SECRET_KEY)
-                data = tb.decode(token, verify=True)
+                data = get_token_backend().decode(token, verify=True)
                 user_id = data.get('user_id') or data.get('user')
                 if user_id:
-                    User = get_user_model()
-                    try:
-                        user = User.objects.get(pk=user_id)
-                    except Exception:
-                        user = AnonymousUser()
+                    user = await get_user_for_id(user_id)
             except Exception:
                 user = AnonymousUser()
 
-        self.scope['user'] = user
-        inner = self.inner(self.scope)
-        return await inner(receive, send)
+        scope['user'] = user
+        return await self.inner(scope, receive, send)
@@ -1,8 +1,39 @@
-import pathlib,sys
-p=pathlib.Path('logs/email_send.log')
-if not p.exists():
-    print('no log')
-    sys.exit(0)
-for line in p.read_text().splitlines():
-    if 'adebolaaaaa' in line or 'oyenugaridwan' in line:
-        print(line)
+"""
+Show recent email send attempts for recipients or an OTP.
+Usage: python scripts/grep_logs.py [email ...] [--otp-id N] [--otp-ref REF] [--limit N]
+Without arguments, shows the default support lookups. Reads the indexed
+EmailSendLog table (apps.users.send_log) instead of scanning a log file.
+"""
+import os
+import sys
+import argparse
+import django
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+django.setup()
+
+from apps.users import send_log
+
+parser = argparse.ArgumentParser()
+parser.add_argument('emails', nargs='*', default=['adebolaaaaa@gmail.com', 'oyenugaridwan@gmail.com'])
+parser.add_argument('--otp-id', type=int)
+parser.add_argument('--otp-ref')
+parser.add_argument('--limit', type=int, default=50)
+args = parser.parse_args()
+
+if args.otp_id is not None or args.otp_ref:
+    queries = [{'otp_id': args.otp_id, 'otp_ref': args.otp_ref}]
+else:
+    queries = [{'recipient': email} for email in args.emails]
+
+for query in queries:
+    rows = send_log.lookup(limit=args.limit, **query)
+    if not rows:
+        print('no sends for', {k: v for k, v in query.items() if v is not None})
+    for row in rows:
+        status = 'RESULT' if row.success else 'ERROR'
+        print(f"{row.created_at.isoformat()} | TO={row.to_email} | SUBJECT={row.subject} | {status}={row.result}"
+              + (f" | OTP={row.otp_id or row.otp_ref}" if (row.otp_id or row.otp_ref) else ''))
@@ -1,56 +1,30 @@
 """
-Resend pending OTP emails for given addresses.
-Usage: edit `TARGET_EMAILS` below or pass via env var `TARGET_EMAILS` (comma-separated)
-This script runs within Django context and uses `send_email_with_logging` to resend.
+Re-send undelivered OTP codes now, instead of waiting for the scheduled job.
+Usage: python scripts/resend_pending.py [email ...]
+       (or pass addresses via env var `TARGET_EMAILS`, comma-separated)
+Without addresses, every due undelivered code is re-sent.
+This script runs within Django context and uses apps.users.otp_resend, the
+same code as the `resend-undelivered-otps` Celery beat job: only codes that
+are still valid are re-sent, concurrently, with backoff between attempts.
 """
 import os
+import sys
 import django
-import time
-os.environ.setdefault('DJANGO_SETTINGS_MODULE','backend_project.settings')
-django.setup()
 
-from apps.users.models import OTP
-from apps.users.email_utils import send_email_with_logging
-from django.db.models import Q
+# If script is executed from scripts/ the project root may not be on sys.path; add it
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-TARGET_EMAILS = os.getenv('TARGET_EMAILS', 'oyenugaridwan@gmail.com,adebolaaaaa@gmail.com').split(',')
-MAX_ATTEMPTS = 3
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+django.setup()
 
-print('Target emails:', TARGET_EMAILS)
+from apps.users import otp_resend
 
-for email in TARGET_EMAILS:
-    email = email.strip()
-    if not email:
-        continue
-    print('\nChecking pending OTPs for', email)
-    pending = OTP.objects.filter(email__iexact=email).filter(Q(send_result__isnull=True) | ~Q(send_result=1)).order_by('created_at')[:10]
-    if not pending:
-        print('  No pending OTPs found for', email)
-        continue
-    for otp in pending:
-        print(f"  OTP id={otp.pk} code={otp.code} created_at={otp.created_at} send_result={otp.send_result}")
-        attempt = 0
-        while attempt < MAX_ATTEMPTS:
-            attempt += 1
-            print(f"    Attempt {attempt}/{MAX_ATTEMPTS} sending to {otp.email}...")
-            try:
-                res = send_email_with_logging(
-                    to_email=otp.email,
-                    subject='Your AAfri Ride Verification Code',
-                    message=f'Your code is: {otp.code}\\n\\nValid for 5 minutes.',
-                    otp=otp,
-                )
-                print('    send_email_with_logging returned:', res)
-                if res.get('success'):
-                    print('    Success — breaking')
-                    break
-                else:
-                    print('    Failed result, retrying in 2s...')
-            except Exception as e:
-                print('    Exception during send:', repr(e))
-            time.sleep(2)
-        # Refresh from DB
-        otp.refresh_from_db()
-        print(f"  Final status: sent_at={otp.sent_at} send_result={otp.send_result} send_error={otp.send_error}")
+TARGET_EMAILS = [e.strip() for e in (sys.argv[1:] or os.getenv('TARGET_EMAILS', '').split(',')) if e.strip()]
 
-print('\nDone.')
+print('Target emails:', TARGET_EMAILS or 'all')
+for otp in otp_resend.pending(emails=TARGET_EMAILS):
+    print(f"  due: OTP id={otp.pk} to={otp.email or otp.phone} created_at={otp.created_at} "
+          f"send_result={otp.send_result} attempts={otp.send_attempts}")
+print('Result:', otp_resend.resend_undelivered(emails=TARGET_EMAILS))
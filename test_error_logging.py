@@ -6,7 +6,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
 django.setup()
 
-from apps.notifications.models import ErrorLog
+from apps.errors import pipeline
+from apps.errors.models import ErrorGroup
 from apps.notifications.utils import log_error, log_exception
 from django.contrib.auth import get_user_model
 
@@ -27,9 +28,6 @@ if not test_user:
 else:
     print(f'\n[OK] Using existing test user: {test_user.email}')
 
-# Clear existing errors for this user
-ErrorLog.objects.filter(user=test_user).delete()
-print(f'[OK] Cleared existing error logs for this user')
 
 # =========================================================================
 # Test 1: Log a validation error
@@ -49,9 +47,9 @@ error1 = log_error(
 )
 
 if error1:
-    print(f'[OK] Error logged: {error1.id}')
-    print(f'  Title: {error1.title}')
-    print(f'  Severity: {error1.get_severity_display()}')
+    print(f'[OK] Error logged: {error1["id"]}')
+    print(f'  Title: {error1["title"]}')
+    print(f'  Severity: {error1["severity"]}')
 else:
     print(f'[FAIL] Failed to log error')
 
@@ -72,9 +70,9 @@ error2 = log_error(
 )
 
 if error2:
-    print(f'[OK] Error logged: {error2.id}')
-    print(f'  Title: {error2.title}')
-    print(f'  Severity: {error2.get_severity_display()}')
+    print(f'[OK] Error logged: {error2["id"]}')
+    print(f'  Title: {error2["title"]}')
+    print(f'  Severity: {error2["severity"]}')
 else:
     print(f'[FAIL] Failed to log error')
 
@@ -98,33 +96,25 @@ except ZeroDivisionError as e:
     )
     
     if error3:
-        print(f'[OK] Error logged: {error3.id}')
-        print(f'  Title: {error3.title}')
-        print(f'  Severity: {error3.get_severity_display()}')
-        if error3.traceback:
+        print(f'[OK] Error logged: {error3["id"]}')
+        print(f'  Title: {error3["title"]}')
+        print(f'  Severity: {error3["severity"]}')
+        if error3['traceback']:
             print(f'  Has traceback: Yes')
     else:
         print(f'[FAIL] Failed to log error')
 
 # =========================================================================
-# Test 4: Query recent errors
+# Test 4: Write the buffer and query the error groups
 # =========================================================================
-print('\n[TEST 4] Querying recent errors...')
-
-recent_errors = ErrorLog.objects.filter(user=test_user).order_by('-created_at')[:5]
-print(f'[OK] Found {recent_errors.count()} errors')
-for error in recent_errors:
-    print(f'  - {error.title} ({error.error_type}) [{error.get_severity_display()}]')
-
-# =========================================================================
-# Test 5: Check auto-deletion property
-# =========================================================================
-print('\n[TEST 5] Checking auto-deletion property...')
-
-if error1:
-    print(f'  Error is_old: {error1.is_old}')
-    print(f'  Error created_at: {error1.created_at}')
-    print(f'  Errors older than 30 days will be auto-deleted')
+print('\n[TEST 4] Querying error groups...')
+
+pipeline.flush()
+fingerprints = [e['fingerprint'] for e in (error1, error2, error3) if e]
+groups = ErrorGroup.objects.filter(fingerprint__in=fingerprints)
+print(f'[OK] Found {groups.count()} error groups')
+for group in groups:
+    print(f'  - {group.title} ({group.error_type}) [{group.severity}] x{group.count}')
 
 print('\n' + '=' * 70)
 print('All Tests Completed!')
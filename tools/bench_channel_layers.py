@@ -0,0 +1,130 @@
+"""Benchmark group_send throughput and delivery latency for the channel layers.
+
+Creates `--groups` groups with `--members` channels each, then fans out
+`--messages` group_send calls round-robin across the groups while every
+member channel drains its queue. Reports group_send calls/s, deliveries/s
+and end-to-end latency percentiles.
+
+Run from the project root:
+
+    python tools/bench_channel_layers.py --backend both
+    python tools/bench_channel_layers.py --backend redis --redis-url redis://localhost:6379/0
+
+`memory` is backend_project.channel_layers.BoundedInMemoryChannelLayer,
+`stock-memory` is channels.layers.InMemoryChannelLayer (for comparison) and
+`redis` is channels_redis.core.RedisChannelLayer (needs a running Redis).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+
+# If script is executed from tools/ the project root may not be on sys.path; add it
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def build_layer(name, args):
+    capacity = max(args.capacity, args.messages)
+    if name == 'memory':
+        from backend_project.channel_layers import BoundedInMemoryChannelLayer
+        return BoundedInMemoryChannelLayer(capacity=capacity)
+    if name == 'stock-memory':
+        from channels.layers import InMemoryChannelLayer
+        return InMemoryChannelLayer(capacity=capacity)
+    if name == 'redis':
+        from channels_redis.core import RedisChannelLayer
+        return RedisChannelLayer(hosts=[args.redis_url], capacity=capacity)
+    raise ValueError(name)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def run(name, args):
+    layer = build_layer(name, args)
+    groups = [f'bench_{g}' for g in range(args.groups)]
+    channels = {}
+    for group in groups:
+        channels[group] = []
+        for _ in range(args.members):
+            channel = await layer.new_channel()
+            await layer.group_add(group, channel)
+            channels[group].append(channel)
+
+    per_group = {g: 0 for g in groups}
+    for i in range(args.messages):
+        per_group[groups[i % len(groups)]] += 1
+
+    latencies = []
+
+    async def drain(channel, expected):
+        for _ in range(expected):
+            message = await layer.receive(channel)
+            latencies.append(time.perf_counter() - message['sent'])
+
+    receivers = [
+        asyncio.ensure_future(drain(channel, per_group[group]))
+        for group in groups for channel in channels[group]
+    ]
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    for i in range(args.messages):
+        group = groups[i % len(groups)]
+        await layer.group_send(group, {'type': 'send_update', 'data': {'event': 'bench', 'n': i}, 'sent': time.perf_counter()})
+        # Yield so receivers drain as they would between real requests
+        await asyncio.sleep(0)
+    send_elapsed = time.perf_counter() - start
+    await asyncio.wait_for(asyncio.gather(*receivers), timeout=args.timeout)
+    total_elapsed = time.perf_counter() - start
+
+    await layer.flush()
+    latencies.sort()
+    deliveries = len(latencies)
+    print(f'[{name}] groups={args.groups} members={args.members} group_sends={args.messages}')
+    print(f'  group_send rate : {args.messages / send_elapsed:,.0f} calls/s')
+    print(f'  delivery rate   : {deliveries / total_elapsed:,.0f} msgs/s ({deliveries} delivered)')
+    print('  latency ms      : p50={:.3f} p95={:.3f} p99={:.3f} max={:.3f}'.format(
+        percentile(latencies, 50) * 1000,
+        percentile(latencies, 95) * 1000,
+        percentile(latencies, 99) * 1000,
+        (latencies[-1] if latencies else 0) * 1000,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default='both', choices=['memory', 'stock-memory', 'redis', 'both', 'all'])
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    args = parser.parse_args()
+
+    if args.backend == 'both':
+        backends = ['memory', 'redis']
+    elif args.backend == 'all':
+        backends = ['memory', 'stock-memory', 'redis']
+    else:
+        backends = [args.backend]
+
+    for name in backends:
+        try:
+            asyncio.run(run(name, args))
+        except Exception as e:
+            print(f'[{name}] benchmark failed: {e!r}')
+
+
+if __name__ == '__main__':
+    main()
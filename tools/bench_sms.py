@@ -0,0 +1,75 @@
+"""Benchmark: SMS throughput during an OTP storm, against a mock Twilio API.
+
+Starts tools/mock_twilio.py in-process and sends `--messages` SMS through
+apps.users.sms three ways:
+
+- `per-call`: a new provider (and Twilio client) per message, as before;
+- `shared`: the process-wide provider, one message at a time;
+- `send_many`: the process-wide provider's concurrent batch API.
+
+Run from the project root:
+
+    python tools/bench_sms.py
+    python tools/bench_sms.py --messages 500 --latency 0.2 --workers 16
+"""
+import os
+import sys
+import time
+import argparse
+
+# If script is executed from tools/ the project root may not be on sys.path; add it
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from mock_twilio import MockTwilioHandler, MockTwilioServer  # noqa: E402
+
+
+def run(name, args, messages):
+    from apps.users import sms
+
+    MockTwilioHandler.connections = MockTwilioHandler.messages = 0
+    started = time.perf_counter()
+    if name == 'per-call':
+        results = [sms.TwilioSMSProvider().send(phone, text) for phone, text in messages]
+    elif name == 'shared':
+        provider = sms.get_sms_provider()
+        results = [provider.send(phone, text) for phone, text in messages]
+    else:
+        results = sms.get_sms_provider().send_many(messages, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    print(f'  {name:<9} {len(messages) / elapsed:8.1f} msg/s  ({elapsed:6.2f}s, '
+          f'{MockTwilioHandler.connections} connections, {sum(results)} delivered)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='API response time (s)')
+    parser.add_argument('--handshake', type=float, default=0.1, help='extra delay on a new connection (s)')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    server = MockTwilioServer.start(latency=args.latency, handshake=args.handshake)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+    os.environ.update({
+        'SMS_PROVIDER': 'twilio', 'TWILIO_API_BASE_URL': server.url, 'TWILIO_ACCOUNT_SID': 'ACbench',
+        'TWILIO_AUTH_TOKEN': 'bench', 'TWILIO_PHONE_NUMBER': '+15005550006', 'SMS_SEND_WORKERS': str(args.workers),
+    })
+    import django
+    django.setup()
+    import logging
+    logging.getLogger('apps.users.sms').setLevel(logging.WARNING)
+
+    messages = [(f'+234800000{i:04d}', f'Your AAfri Ride verification code is: {i:06d}.') for i in range(args.messages)]
+    print(f'[{args.messages} messages, latency={args.latency * 1000:.0f}ms, '
+          f'handshake={args.handshake * 1000:.0f}ms, workers={args.workers}]')
+    try:
+        for name in ('per-call', 'shared', 'send_many'):
+            run(name, args, messages)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark: SMTP throughput with and without the connection pool.
+
+Starts a local SMTP sink that delays every reply by `--rtt` seconds and the
+greeting by `--handshake` seconds (standing in for TCP + TLS + AUTH), then
+sends `--messages` one-recipient emails the way the app does (one
+`send_mail()` per message) through:
+
+- `django`: Django's stock SMTP backend, a new session per message;
+- `pooled`: backend_project.email_backend.PooledEmailBackend.
+
+Run from the project root:
+
+    python tools/bench_smtp_pool.py
+    python tools/bench_smtp_pool.py --messages 500 --rtt 0.02 --handshake 0.15
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import socketserver
+
+# If script is executed from tools/ the project root may not be on sys.path; add it
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BACKENDS = {
+    'django': 'django.core.mail.backends.smtp.EmailBackend',
+    'pooled': 'backend_project.email_backend.PooledEmailBackend',
+}
+
+
+class SMTPSink(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    rtt = 0.0
+    handshake = 0.0
+    sessions = 0
+    messages = 0
+
+    def reply(self, line):
+        time.sleep(self.rtt)
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        type(self).sessions += 1
+        time.sleep(self.handshake)
+        self.reply('220 bench ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors='replace').strip().split(' ', 1)[0].upper()
+            if cmd == 'EHLO':
+                self.reply('250-bench')
+                self.wfile.write(b'250 8BITMIME\r\n')
+            elif cmd == 'DATA':
+                self.reply('354 go ahead')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                type(self).messages += 1
+                self.reply('250 queued')
+            elif cmd == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def run(name, args, port):
+    from django.core.mail import send_mail
+    from django.test.utils import override_settings
+    from backend_project.email_backend import close_pools
+
+    SMTPSink.sessions = SMTPSink.messages = 0
+    with override_settings(EMAIL_BACKEND=BACKENDS[name], EMAIL_HOST='127.0.0.1', EMAIL_PORT=port,
+                           EMAIL_USE_TLS=False, EMAIL_USE_SSL=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD=''):
+        started = time.perf_counter()
+        for i in range(args.messages):
+            send_mail('Bench', 'body', 'bench@example.com', [f'user{i}@example.com'])
+        elapsed = time.perf_counter() - started
+        close_pools()
+    print(f'  {name:<7} {args.messages / elapsed:8.1f} msg/s  ({elapsed:6.2f}s, '
+          f'{SMTPSink.sessions} SMTP sessions, {SMTPSink.messages} delivered)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rtt', type=float, default=0.01, help='delay before every server reply (s)')
+    parser.add_argument('--handshake', type=float, default=0.1, help='extra delay before the greeting (s)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_project.settings')
+    import django
+    django.setup()
+
+    SMTPSink.rtt, SMTPSink.handshake = args.rtt, args.handshake
+    server = Server(('127.0.0.1', 0), SMTPSink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'[{args.messages} messages, rtt={args.rtt * 1000:.0f}ms, handshake={args.handshake * 1000:.0f}ms]')
+    try:
+        for name in BACKENDS:
+            run(name, args, server.server_address[1])
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
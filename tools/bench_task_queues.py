@@ -0,0 +1,197 @@
+"""Load test: OTP task latency while bulk email floods the workers.
+
+Starts real `celery worker` processes against a running broker (Redis by
+default; `docker compose up redis` is enough, or `--broker filesystem://`
+with its folders in a temporary directory) and uses stand-in tasks that
+sleep instead of calling SMTP/Twilio. Two setups are compared:
+
+- `shared`: every task on one queue served by one worker whose concurrency
+  is the sum of all pools (the old single-queue behaviour);
+- `routed`: tasks routed by backend_project.celery.TASK_ROUTES and served
+  by one worker per entry of WORKER_POOLS, with each pool's concurrency
+  and prefetch settings.
+
+`--emails` email tasks are published in one burst, then `--otps` OTP tasks
+are published one every `--otp-interval` seconds. Reports queue-wait
+percentiles (publish -> task start) per task type.
+
+Run from the project root:
+
+    python tools/bench_task_queues.py
+    python tools/bench_task_queues.py --broker redis://localhost:6379/15 --emails 2000
+
+The broker database is flushed of the benchmark queues between runs, so
+do not point it at a production Redis.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+# If script is executed from tools/ the project root may not be on sys.path; add it
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+OTP_TASK = 'apps.users.tasks.send_otp_sms_task'
+EMAIL_TASK = 'apps.users.tasks.send_email_task'
+
+
+def build_app(mode, workdir, broker):
+    """Celery app with stand-in tasks routed like the real OTP and email tasks."""
+    from celery import Celery
+    from kombu import Queue
+    from backend_project.celery import TASK_QUEUES, TASK_ROUTES
+
+    app = Celery('bench_task_queues', broker=broker, set_as_current=True)
+    app.conf.update(
+        task_ignore_result=True,
+        task_default_queue='default',
+        worker_hijack_root_logger=False,
+    )
+    if broker.startswith('filesystem://'):
+        # Keep the kombu message and control folders out of the working tree
+        app.conf.broker_transport_options = {
+            'data_folder_in': os.path.join(workdir, 'broker'),
+            'data_folder_out': os.path.join(workdir, 'broker'),
+            'control_folder': os.path.join(workdir, 'control'),
+        }
+        os.makedirs(os.path.join(workdir, 'broker'), exist_ok=True)
+    if mode == 'routed':
+        app.conf.task_queues = [Queue(name) for name in TASK_QUEUES]
+        app.conf.task_routes = {'bench.otp': TASK_ROUTES[OTP_TASK], 'bench.email': TASK_ROUTES[EMAIL_TASK]}
+    else:
+        app.conf.task_queues = [Queue('default')]
+
+    results_path = os.path.join(workdir, 'waits.log')
+
+    def record(kind, published_at):
+        with open(results_path, 'a') as f:
+            f.write(f'{kind} {time.time() - published_at:.6f}\n')
+
+    @app.task(name='bench.otp')
+    def otp(published_at, seconds):
+        record('otp', published_at)
+        time.sleep(seconds)
+
+    @app.task(name='bench.email')
+    def email(published_at, seconds):
+        record('email', published_at)
+        time.sleep(seconds)
+
+    return app, otp, email, results_path
+
+
+def pools_for(mode):
+    from backend_project.celery import WORKER_POOLS
+    if mode == 'shared':
+        total = sum(p['concurrency'] for p in WORKER_POOLS.values())
+        return {'shared': {'queues': ['default'], 'concurrency': total, 'prefetch_multiplier': 4}}
+    return WORKER_POOLS
+
+
+def read_waits(results_path):
+    waits = {'otp': [], 'email': []}
+    try:
+        with open(results_path) as f:
+            for line in f:
+                kind, value = line.split()
+                waits[kind].append(float(value))
+    except FileNotFoundError:
+        pass
+    return waits
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def run_worker(mode, workdir, broker, pool):
+    """Entry point of the worker subprocesses."""
+    app, _, _, _ = build_app(mode, workdir, broker)
+    from backend_project.celery import worker_argv
+    if mode == 'routed':
+        # Exactly what `manage.py run_worker <pool>` runs in production
+        argv = worker_argv(pool)
+    else:
+        cfg = pools_for(mode)[pool]
+        argv = [
+            'worker',
+            '--queues', ','.join(cfg['queues']),
+            '--concurrency', str(cfg['concurrency']),
+            '--prefetch-multiplier', str(cfg['prefetch_multiplier']),
+        ]
+    # Threads start faster than prefork processes and are fine for sleeping tasks
+    app.worker_main(argv + [
+        '--pool', 'threads',
+        '--without-heartbeat', '--without-gossip', '--without-mingle',
+        '--loglevel', 'ERROR',
+    ])
+
+
+def run(mode, args):
+    workdir = tempfile.mkdtemp(prefix=f'bench_queues_{mode}_')
+    app, otp, email, results_path = build_app(mode, workdir, args.broker)
+    app.control.purge()
+
+    # Publish the email flood before any worker starts so it is all queued up
+    for _ in range(args.emails):
+        email.delay(time.time(), args.email_seconds)
+
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', mode, workdir, args.broker, pool],
+                         cwd=ROOT, stdout=subprocess.DEVNULL)
+        for pool in pools_for(mode)
+    ]
+    try:
+        # Wait until the workers have started consuming
+        deadline = time.time() + args.timeout
+        while not read_waits(results_path)['email'] and time.time() < deadline:
+            time.sleep(0.05)
+        for _ in range(args.otps):
+            otp.delay(time.time(), args.otp_seconds)
+            time.sleep(args.otp_interval)
+        while len(read_waits(results_path)['otp']) < args.otps and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.wait()
+
+    waits = read_waits(results_path)
+    print(f'[{mode}]')
+    for kind in ('otp', 'email'):
+        values = sorted(waits[kind])
+        print(f'  {kind:<5} started={len(values):>5}  wait p50={percentile(values, 50) * 1000:9.1f}ms  '
+              f'p95={percentile(values, 95) * 1000:9.1f}ms  max={(values[-1] if values else 0) * 1000:9.1f}ms')
+
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == '--worker':
+        run_worker(*sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--broker', default='redis://localhost:6379/15')
+    parser.add_argument('--mode', choices=['shared', 'routed', 'both'], default='both')
+    parser.add_argument('--emails', type=int, default=500)
+    parser.add_argument('--email-seconds', type=float, default=0.05, help='simulated SMTP time per email')
+    parser.add_argument('--otps', type=int, default=20)
+    parser.add_argument('--otp-seconds', type=float, default=0.01, help='simulated SMS time per OTP')
+    parser.add_argument('--otp-interval', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    modes = ['shared', 'routed'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
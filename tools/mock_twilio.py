@@ -0,0 +1,101 @@
+"""Local stand-in for the Twilio Messages API, for SMS load tests.
+
+Answers `POST /2010-04-01/Accounts/<sid>/Messages.json` like Twilio does
+(201 with a message resource), after `--latency` seconds, and delays the
+first request on every new connection by `--handshake` seconds (standing in
+for TCP + TLS setup). Connections are kept alive, so a client that reuses
+them only pays the handshake once.
+
+    python tools/mock_twilio.py --port 8089 --latency 0.15
+    TWILIO_API_BASE_URL=http://127.0.0.1:8089 SMS_PROVIDER=twilio \
+        TWILIO_ACCOUNT_SID=ACtest TWILIO_AUTH_TOKEN=x TWILIO_PHONE_NUMBER=+15005550006 ...
+
+tools/bench_sms.py starts one in-process.
+"""
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class MockTwilioHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    latency = 0.0
+    handshake = 0.0
+    connections = 0
+    messages = 0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self._lock:
+            type(self).connections += 1
+        self._first = True
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        time.sleep(self.latency + (self.handshake if self._first else 0.0))
+        self._first = False
+        if not self.path.endswith('/Messages.json'):
+            self.reply(404, {'code': 20404, 'message': 'The requested resource was not found', 'status': 404})
+            return
+        with self._lock:
+            type(self).messages += 1
+        self.reply(201, {
+            'sid': 'SM' + uuid.uuid4().hex,
+            'status': 'queued',
+            'to': form.get('To', [''])[0],
+            'from': form.get('From', [''])[0],
+            'body': form.get('Body', [''])[0],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockTwilioServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    @classmethod
+    def start(cls, port=0, latency=0.0, handshake=0.0):
+        """Serve on a background thread. Returns the server; its URL is `server.url`."""
+        MockTwilioHandler.latency, MockTwilioHandler.handshake = latency, handshake
+        MockTwilioHandler.connections = MockTwilioHandler.messages = 0
+        server = cls(('127.0.0.1', port), MockTwilioHandler)
+        server.url = f'http://127.0.0.1:{server.server_address[1]}'
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.15, help='delay before every response (s)')
+    parser.add_argument('--handshake', type=float, default=0.1, help='extra delay on a new connection (s)')
+    args = parser.parse_args()
+    server = MockTwilioServer.start(args.port, args.latency, args.handshake)
+    print(f'Mock Twilio API on {server.url} (Ctrl-C to stop)')
+    try:
+        while True:
+            time.sleep(10)
+            print(f'  {MockTwilioHandler.messages} messages, {MockTwilioHandler.connections} connections')
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()